@@ -0,0 +1,443 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from season_analyzer import SeasonAnalyzer, ALL_LEAGUES, compute_data_version, resolve_league
+
+# ==================================================
+# SQLite 분석 저장소 (SeasonAnalyzer backend="sqlite")
+#  - 전처리된 선수/팀/Big5 테이블을 하나의 .sqlite 파일로 저장
+#  - 워커는 DataFrame을 메모리에 올리지 않고 인덱스 기반 SQL로 랭킹 조회
+#  - 파일은 mmap으로 읽으므로 OS 페이지 캐시를 프로세스 간 공유
+#  - meta에 원본 CSV 내용 해시를 기록 → 열 때 CSV가 바뀌었으면(저장소가 오래됨) 경고
+# ==================================================
+BASE_DIR = Path(__file__).resolve().parent
+PROCESSED_DATA_DIR = BASE_DIR / "processed_data"
+STORE_PATH = PROCESSED_DATA_DIR / "analytics.sqlite"
+
+# 테이블별 인덱스 (이름, 컬럼들)
+STORE_INDEXES = {
+    "player_match": [
+        ("ix_pm_player", ["player_id", "club_id", "Date"]),
+        ("ix_pm_club", ["club_id"]),
+        ("ix_pm_date", ["Date"]),
+        ("ix_pm_position", ["Position"]),
+        ("ix_pm_opponent", ["Opponent_ID"]),
+    ],
+    "team_match": [
+        ("ix_tm_season", ["League", "Season"]),
+        ("ix_tm_date", ["Date"]),
+        ("ix_tm_home", ["home_club_id"]),
+        ("ix_tm_away", ["away_club_id"]),
+    ],
+    "player_season": [
+        ("ix_ps_player", ["player_id", "club_id"]),
+        ("ix_ps_club", ["Club"]),
+        ("ix_ps_position", ["Position"]),
+        ("ix_ps_goals", ["Goals"]),
+        ("ix_ps_conv", ["Conversion_Rate"]),
+        ("ix_ps_xg", ["OverUnder_xG"]),
+    ],
+    "big5_player": [
+        ("ix_b5_player", ["player_id"]),
+        ("ix_b5_club", ["Club"]),
+        ("ix_b5_position", ["Position"]),
+        ("ix_b5_goals", ["Goals"]),
+        ("ix_b5_conv", ["Conversion_Rate"]),
+        ("ix_b5_xg", ["OverUnder_xG"]),
+        ("ix_b5_league_goals", ["League", "Goals"]),
+        ("ix_b5_league_conv", ["League", "Conversion_Rate"]),
+        ("ix_b5_league_xg", ["League", "OverUnder_xG"]),
+    ],
+}
+
+# 워커당 SQLite 페이지 캐시 상한 (KiB, 음수) / mmap 크기 (bytes)
+CACHE_SIZE_KIB = 2000
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def q(col):
+    """SQL 식별자 인용 ("Player Name", "Top1_Share(%)" 등)"""
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+# ==================================================
+# 저장소 생성 (전처리 후 1회 실행)
+# ==================================================
+def build_store(db_path=STORE_PATH, analyzer=None):
+    """
+    SeasonAnalyzer(pandas)로 표준화한 테이블을 SQLite 파일로 저장합니다.
+    임시 파일에 만든 뒤 교체하므로 실행 중인 워커는 이전 파일을 계속 읽을 수 있습니다.
+    """
+    db_path = Path(db_path)
+    analyzer = analyzer or SeasonAnalyzer()
+    if analyzer.player_data is None or analyzer.team_data is None:
+        print("오류: 저장소를 만들 선수/팀 데이터가 없습니다. data_preprocessor.py를 먼저 실행하세요.")
+        return None
+
+    tables = {
+        "player_match": analyzer.player_data,
+        "team_match": analyzer.team_data,
+        "player_season": analyzer._aggregate_season_by_player_club(),
+    }
+    if analyzer.big5_data is not None:
+        tables["big5_player"] = analyzer.big5_data
+
+    tmp_path = db_path.with_suffix(".sqlite.tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for name, df in tables.items():
+            df = df.copy()
+            for c in df.columns:
+                if isinstance(df[c].dtype, pd.CategoricalDtype):
+                    df[c] = df[c].astype(str)
+            # rowid = DataFrame 행 순서. 랭킹 SQL의 'ORDER BY ..., rowid'는 SeasonAnalyzer pandas 경로의
+            # 안정 정렬(kind="mergesort", 동점은 원래 행 순서 유지)과 같은 동점 순서를 냄
+            df.to_sql(name, conn, index=False)
+            for ix_name, cols in STORE_INDEXES.get(name, []):
+                conn.execute(f"CREATE INDEX {ix_name} ON {name} ({', '.join(q(c) for c in cols)})")
+            print(f"[저장소] {name}: {len(df)}행")
+
+        # 이름 검색용 FTS5 (trigram → 부분 문자열 검색)
+        conn.execute("CREATE VIRTUAL TABLE player_names USING fts5(name, source UNINDEXED, ref UNINDEXED, tokenize='trigram')")
+        conn.execute("INSERT INTO player_names SELECT \"Player Name\", 'player_season', rowid FROM player_season")
+        if "big5_player" in tables:
+            conn.execute("INSERT INTO player_names SELECT \"Player Name\", 'big5_player', rowid FROM big5_player")
+
+        meta = {
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "player_match_league": (analyzer.player_match_season or ("", ""))[0],
+            "player_match_season": (analyzer.player_match_season or ("", ""))[1],
+            # 저장소를 만든 원본 CSV와 내용 해시 (열 때 현재 CSV와 비교)
+            "source_paths": json.dumps([str(p) for p in analyzer.data_paths], ensure_ascii=False),
+            "source_version": compute_data_version(analyzer.data_paths),
+        }
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", list(meta.items()))
+
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    tmp_path.replace(db_path)
+    print(f"SQLite 분석 저장소 생성 완료: {db_path}")
+    return db_path
+
+
+# ==================================================
+# 저장소 조회 (랭킹 SQL)
+#  - 모든 메서드는 SeasonAnalyzer pandas 경로와 같은 컬럼의 DataFrame 또는 {"error": ...} 반환
+# ==================================================
+class AnalyticsStore:
+    """
+    읽기 전용 SQLite 저장소. 스레드마다 연결을 하나씩 열어 사용합니다.
+    """
+
+    def __init__(self, db_path=STORE_PATH):
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"'{self.db_path}' 저장소가 없습니다. analytics_store.py를 먼저 실행하세요.")
+        self._local = threading.local()
+
+        conn = self._conn()
+        self.tables = {
+            r[0]: [c[1] for c in conn.execute(f"PRAGMA table_info({r[0]})")]
+            for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        self.meta = dict(conn.execute("SELECT key, value FROM meta"))
+        self.source_paths = [Path(p) for p in json.loads(self.meta.get("source_paths") or "[]")]
+        self.stale = self._check_source()
+        self.leagues = []
+        if "big5_player" in self.tables:
+            self.leagues = [r[0] for r in conn.execute("SELECT DISTINCT League FROM big5_player ORDER BY League")]
+
+    def _check_source(self):
+        """
+        원본 CSV가 저장소를 만든 뒤 바뀌었으면 True (경고 출력). 기록이 없는 예전 저장소는 비교 없이 재생성만 안내
+        """
+        built = self.meta.get("source_version")
+        if not built or not self.source_paths:
+            print(f"경고: '{self.db_path}' 저장소에 원본 데이터 버전이 없습니다. analytics_store.py로 다시 만드세요.")
+            return False
+        if compute_data_version(self.source_paths) != built:
+            print(f"경고: '{self.db_path}' 저장소가 전처리 데이터보다 오래되었습니다. "
+                  "analytics_store.py를 다시 실행하기 전까지 이전 데이터로 응답합니다.")
+            return True
+        return False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path.resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = 1")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def read(self, sql, params=()):
+        return pd.read_sql_query(sql, self._conn(), params=list(params))
+
+    # --------------------------------------------------
+    # league 인자 → (테이블, WHERE절, 파라미터)
+    # --------------------------------------------------
+    def _source(self, league=None):
+        if league is None:
+            return "player_season", "", []
+        if "big5_player" not in self.tables:
+            return {"error": "Big5 선수 데이터가 저장소에 없습니다. data_preprocessor.py 후 저장소를 다시 만드세요."}
+        if str(league).strip().lower() in ALL_LEAGUES:
+            return "big5_player", "", []
+        comp = resolve_league(league, self.leagues)
+        if comp is None:
+            return {"error": f"알 수 없는 리그입니다: {league} (가능: {self.leagues})"}
+        return "big5_player", "WHERE League = ?", [comp]
+
+    def _cols(self, cols, table):
+        # Big5 결과에는 Club 뒤에 League 컬럼을 함께 표시 (SeasonAnalyzer._with_league와 동일)
+        return SeasonAnalyzer._with_league(cols, pd.DataFrame(columns=self.tables[table]))
+
+    @staticmethod
+    def _limit(top_n):
+        return -1 if top_n is None else int(top_n)
+
+    def _ranking(self, cols, league, order, where="", params=(), top_n=None):
+        src = self._source(league)
+        if isinstance(src, dict):
+            return src
+        table, league_where, league_params = src
+
+        conds = [c for c in [league_where.replace("WHERE ", ""), where] if c]
+        where_sql = ("WHERE " + " AND ".join(conds)) if conds else ""
+        cols = self._cols(cols, table)
+        sql = (f"SELECT {', '.join(q(c) for c in cols)} FROM {table} {where_sql} "
+               f"ORDER BY {order}, rowid LIMIT ?")
+        return self.read(sql, list(league_params) + list(params) + [self._limit(top_n)])
+
+    # ==================================================
+    # 시즌 누적 랭킹
+    # ==================================================
+    def top_scorers(self, top_n=20, league=None):
+        return self._ranking(["Player Name", "Club", "Goals", "Appearances"], league, "Goals DESC", top_n=top_n)
+
+    def efficient_finishers(self, min_shots=0, top_n=None, league=None):
+        return self._ranking(["Player Name", "Club", "Shots", "Goals", "Conversion_Rate"], league,
+                             "Conversion_Rate DESC", "Shots >= ?", [int(min_shots or 0)], top_n)
+
+    def position_ranking(self, position_keyword="FW", metric="Goals", top_n=20, league=None):
+        src = self._source(league)
+        if isinstance(src, dict):
+            return src
+        table = src[0]
+        if metric not in self.tables[table]:
+            metric = "Goals"
+
+        where, params = "", []
+        if position_keyword:
+            where, params = "instr(upper(Position), ?) > 0", [str(position_keyword).upper()]
+
+        cols = ["Player Name", "Club", "Position", metric, "Goals", "Assists", "Shots", "xG", "Conversion_Rate"]
+        cols = list(dict.fromkeys(c for c in cols if c in self.tables[table]))
+        out = self._ranking(cols, league, f"{q(metric)} DESC", where, params, top_n)
+        if isinstance(out, pd.DataFrame) and out.empty:
+            return {"error": f"해당 포지션({position_keyword}) 데이터가 없습니다."}
+        return out
+
+    def xg_over_under(self, top_n=20, mode="over", league=None):
+        order = "OverUnder_xG ASC" if mode == "under" else "OverUnder_xG DESC"
+        return self._ranking(["Player Name", "Club", "Goals", "xG", "OverUnder_xG", "Shots", "Conversion_Rate"],
+                             league, order, top_n=top_n)
+
+    def team_dependency(self, top_n_teams=20, league=None):
+        src = self._source(league)
+        if isinstance(src, dict):
+            return src
+        table, where_sql, params = src
+
+        keys = ["League", "Club"] if "League" in self.tables[table] else ["Club"]
+        k = ", ".join(keys)
+        sql = f"""
+            WITH g AS (
+                SELECT {k}, "Player Name" AS player, Goals,
+                       ROW_NUMBER() OVER (PARTITION BY {k} ORDER BY Goals DESC, rowid) AS rk
+                FROM {table} {where_sql}
+            )
+            SELECT {', '.join(keys[::-1])},
+                   SUM(Goals) AS Team_Goals,
+                   MAX(CASE WHEN rk = 1 THEN player END) AS Top1_Player,
+                   MAX(CASE WHEN rk = 1 THEN Goals END) AS Top1_Goals,
+                   100.0 * MAX(CASE WHEN rk = 1 THEN Goals END) / SUM(Goals) AS "Top1_Share(%)",
+                   100.0 * SUM(CASE WHEN rk <= 3 THEN Goals ELSE 0 END) / SUM(Goals) AS "Top3_Share(%)"
+            FROM g
+            GROUP BY {k}
+            HAVING SUM(Goals) > 0
+            ORDER BY "Top1_Share(%)" DESC, {k}
+            LIMIT ?
+        """
+        out = self.read(sql, params + [self._limit(top_n_teams)])
+        if out.empty:
+            return {"error": "팀 의존도 결과가 비어있습니다."}
+        return out
+
+    def player_season_summary(self, player_name_keyword, league=None):
+        src = self._source(league)
+        if isinstance(src, dict):
+            return src
+        table, where_sql, params = src
+
+        kw = str(player_name_keyword)
+        if len(kw) >= 3:
+            # trigram FTS5: 대소문자 무시 부분 문자열 검색을 인덱스로 처리
+            cond = f"rowid IN (SELECT ref FROM player_names WHERE player_names MATCH ? AND source = '{table}')"
+            cond_params = [q(kw)]
+        else:
+            cond = "instr(lower(\"Player Name\"), ?) > 0"
+            cond_params = [kw.lower()]
+
+        conds = [c for c in [where_sql.replace("WHERE ", ""), cond] if c]
+        sql = f"SELECT * FROM {table} WHERE {' AND '.join(conds)} ORDER BY Goals DESC, rowid LIMIT 1"
+        out = self.read(sql, params + cond_params)
+        if out.empty:
+            return {"error": f"'{player_name_keyword}' 선수를 찾을 수 없습니다."}
+        return out.iloc[0].to_dict()
+
+    def player_stats(self, player_name):
+        out = self.read(
+            "SELECT * FROM player_match WHERE instr(lower(\"Player Name\"), ?) > 0 ORDER BY rowid LIMIT 1",
+            [str(player_name).lower()],
+        )
+        if out.empty:
+            return {"error": f"'{player_name}' 선수를 찾을 수 없습니다."}
+        return out.iloc[0].to_dict()
+
+    # ==================================================
+    # 경기 단위 랭킹 (PL, player_match)
+    #  - 선수/클럽 이름은 시즌 집계 테이블(player_season)에서 가져옴
+    # ==================================================
+    def recent_form(self, last_n=5, metric="Goals", top_n=20):
+        cols = ["Goals", "Assists", "Shots", "xG", "Conversion_Rate", "Matches(Recent)"]
+        if metric not in cols:
+            metric = "Goals"
+        sql = f"""
+            WITH r AS (
+                SELECT player_id, club_id, Goals, Assists, Shots, xG,
+                       ROW_NUMBER() OVER (PARTITION BY player_id, club_id ORDER BY Date DESC, rowid DESC) AS rn
+                FROM player_match
+            ), a AS (
+                SELECT player_id, club_id,
+                       SUM(Goals) AS Goals, SUM(Assists) AS Assists, SUM(Shots) AS Shots, SUM(xG) AS xG,
+                       COUNT(*) AS "Matches(Recent)"
+                FROM r WHERE rn <= ?
+                GROUP BY player_id, club_id
+            )
+            SELECT "Player Name", Club, Goals, Assists, Shots, xG, Conversion_Rate, "Matches(Recent)" FROM (
+                SELECT a.player_id, a.club_id, s."Player Name", s.Club, a.Goals, a.Assists, a.Shots, a.xG,
+                       CASE WHEN a.Shots > 0 THEN a.Goals * 100.0 / a.Shots ELSE 0 END AS Conversion_Rate,
+                       a."Matches(Recent)"
+                FROM a JOIN player_season s USING (player_id, club_id)
+            )
+            ORDER BY {q(metric)} DESC, player_id, club_id
+            LIMIT ?
+        """
+        out = self.read(sql, [int(last_n), self._limit(top_n)])
+        if out.empty:
+            return {"error": "최근 폼 집계 결과가 비어있습니다."}
+        return out
+
+    def league_table(self, league="PL", season=None, top_k=None):
+        if season is None:
+            season = self.read("SELECT MAX(Season) AS s FROM team_match WHERE League = ?", [league])["s"].iloc[0]
+        sql = """
+            WITH sides AS (
+                SELECT home_club_id AS club_id, "FTH Goals" AS GF, "FTA Goals" AS GA
+                FROM team_match WHERE League = ? AND Season = ?
+                UNION ALL
+                SELECT away_club_id, "FTA Goals", "FTH Goals"
+                FROM team_match WHERE League = ? AND Season = ?
+            )
+            SELECT club_id, COUNT(*) AS Played, SUM(GF) AS GF, SUM(GA) AS GA,
+                   SUM(CASE WHEN GF > GA THEN 3 WHEN GF = GA THEN 1 ELSE 0 END) AS Pts,
+                   SUM(GF) - SUM(GA) AS GD
+            FROM sides GROUP BY club_id
+            ORDER BY Pts DESC, GD DESC, GF DESC
+            LIMIT ?
+        """
+        return self.read(sql, [league, season, league, season, self._limit(top_k)])
+
+    def goals_vs_top_opponents(self, top_k=6, top_n=20):
+        league = self.meta.get("player_match_league") or "PL"
+        season = self.meta.get("player_match_season") or None
+        top_ids = self.league_table(league, season, top_k)["club_id"].astype(int).tolist()
+        if not top_ids:
+            return {"error": "순위표를 만들 팀 데이터가 없습니다."}
+
+        sql = f"""
+            SELECT s."Player Name", s.Club,
+                   SUM(m.Goals) AS Goals, SUM(m.Assists) AS Assists, SUM(m.xG) AS xG,
+                   COUNT(DISTINCT m.Match_Row) AS Matches,
+                   SUM(m.Goals) * 1.0 / COUNT(DISTINCT m.Match_Row) AS Goals_per_Match
+            FROM player_match m JOIN player_season s USING (player_id, club_id)
+            WHERE m.Opponent_ID IN ({', '.join('?' * len(top_ids))})
+            GROUP BY m.player_id, m.club_id
+            ORDER BY Goals DESC, Goals_per_Match DESC, m.player_id, m.club_id
+            LIMIT ?
+        """
+        out = self.read(sql, top_ids + [self._limit(top_n)])
+        if out.empty:
+            return {"error": f"상위 {top_k}팀 상대 경기 데이터가 없습니다."}
+        return out
+
+    def home_away_split(self, metric="Goals", top_n=20):
+        if metric not in ("Goals", "Assists", "xG", "Shots"):
+            metric = "Goals"
+        m = q(metric)
+        sql = f"""
+            WITH a AS (
+                SELECT player_id, club_id,
+                       SUM(CASE WHEN Home = 1 THEN {m} ELSE 0 END) AS home_v,
+                       SUM(CASE WHEN Home = 1 THEN 0 ELSE {m} END) AS away_v,
+                       SUM(Home = 1) AS home_m, SUM(Home = 0) AS away_m
+                FROM player_match WHERE Home >= 0
+                GROUP BY player_id, club_id
+            )
+            SELECT s."Player Name", s.Club,
+                   a.home_v AS "Home_{metric}", a.away_v AS "Away_{metric}",
+                   a.home_m AS Home_Matches, a.away_m AS Away_Matches,
+                   CASE WHEN a.home_m > 0 THEN a.home_v * 1.0 / a.home_m ELSE 0 END AS "Home_{metric}_per_Match",
+                   CASE WHEN a.away_m > 0 THEN a.away_v * 1.0 / a.away_m ELSE 0 END AS "Away_{metric}_per_Match"
+            FROM a JOIN player_season s USING (player_id, club_id)
+            ORDER BY a.home_v + a.away_v DESC, a.player_id, a.club_id
+            LIMIT ?
+        """
+        return self.read(sql, [self._limit(top_n)])
+
+    def team_goal_share(self, min_matches=5, top_n=20):
+        sql = """
+            WITH a AS (
+                SELECT player_id, club_id, SUM(Goals) AS Goals, SUM(Team_Goals) AS Team_Goals,
+                       COUNT(DISTINCT Match_Row) AS Matches
+                FROM player_match WHERE Match_Row >= 0
+                GROUP BY player_id, club_id
+                HAVING COUNT(DISTINCT Match_Row) >= ?
+            )
+            SELECT s."Player Name", s.Club, a.Goals, a.Team_Goals, a.Matches,
+                   CASE WHEN a.Team_Goals > 0 THEN a.Goals * 100.0 / a.Team_Goals ELSE 0 END AS "Team_Goal_Share(%)"
+            FROM a JOIN player_season s USING (player_id, club_id)
+            ORDER BY "Team_Goal_Share(%)" DESC, a.Goals DESC, a.player_id, a.club_id
+            LIMIT ?
+        """
+        out = self.read(sql, [int(min_matches or 0), self._limit(top_n)])
+        if out.empty:
+            return {"error": "팀 득점 비중 결과가 비어있습니다."}
+        return out
+
+
+if __name__ == "__main__":
+    build_store()
@@ -1,55 +1,237 @@
 # app.py
-from flask import Flask, jsonify
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 
 from season_analyzer import SeasonAnalyzer
 from prediction_model import PredictionModel  # ✅ 이제 실제로 존재함
+from model_cache import cache_stats
+from prediction_memo import PLAYER_PREDICTION_MEMO
+from model_registry import REGISTRY
+from response_cache import ResponseCache
 
 app = Flask(__name__)
-CORS(app)
+# 애드혹 SQL(/api/query)은 CORS 허용 대상에서 제외 (다른 사이트 페이지가 결과를 읽지 못하도록)
+CORS(app, resources={r"/api/(?!query).*": {}})
+
+
+def load_serving(backend):
+    # 분석기와 예측 모델을 둘 다 만든 뒤 (analyzer, predictor) 한 쌍으로 반환
+    return SeasonAnalyzer(backend=backend), PredictionModel()
+
 
 print("Flask 앱 시작 중... 분석기 및 예측 모델을 로드합니다.")
-analyzer = SeasonAnalyzer()
-predictor = PredictionModel()
+# ANALYZER_BACKEND=sqlite 이면 DataFrame 대신 SQLite 저장소(analytics_store.py로 생성)에서 조회
+# 서빙 중인 (분석기, 예측 모델) 쌍: 다시 로드할 때는 새 쌍을 다 만든 뒤 한 번에 교체
+_serving = {"pair": load_serving(os.environ.get("ANALYZER_BACKEND", "pandas"))}
 print("분석기 및 예측 모델 로드 완료. API 서버 준비 완료.")
+if "player_goal" not in REGISTRY.stats()["models"]:
+    print("경고: 레지스트리에 선수 득점 모델이 없습니다. 'python model_trainer.py'로 학습하면 첫 버전(v1)이 등록됩니다.")
+
+# 랭킹 API 응답 형식: 기본은 컬럼 지향 JSON ({col: [...]}), ?format=records|split 으로 변경 가능
+JSON_RESULT_FORMATS = ("columns", "records", "split")
+# 시즌 시뮬레이션 API 요청당 최대 시뮬레이션 수
+SIMULATION_MAX_SIMS = 200_000
+# 데이터 파일 변경 확인 주기(초): 바뀌었으면 분석기/예측 모델을 다시 로드 (응답 캐시 키의 데이터 버전도 바뀜)
+DATA_CHECK_INTERVAL_S = 5.0
+
+# 통계 응답 캐시 (경로 + 쿼리 인자 + 분석기 데이터 버전)
+response_cache = ResponseCache()
+
+
+def serving():
+    # 요청 하나는 처음 받은 쌍만 사용 (처리 중에 교체돼도 분석기/예측 모델/캐시 키 버전이 섞이지 않음)
+    if "serving" not in g:
+        g.serving = _serving["pair"]
+    return g.serving
+
+
+def data_version():
+    analyzer, _ = serving()
+    return analyzer.data_version
+
+
+def _data_signature():
+    analyzer, _ = _serving["pair"]
+    signature = []
+    for path in analyzer.data_paths:
+        try:
+            st = path.stat()
+            signature.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+_data_state = {"signature": _data_signature(), "checked_at": time.monotonic(), "reloading": False}
+_reload_lock = threading.Lock()
+
+
+def _reload_serving(signature):
+    # 백그라운드 스레드: 새 쌍을 다 만든 뒤 교체 (그동안 요청은 이전 쌍으로 응답)
+    try:
+        analyzer, _ = _serving["pair"]
+        pair = load_serving(analyzer.backend)
+    except Exception as e:
+        print(f"데이터 다시 로드 실패 (이전 데이터로 계속 응답): {e}")
+        with _reload_lock:
+            _data_state["reloading"] = False
+        return
+    with _reload_lock:
+        _serving["pair"] = pair
+        _data_state["signature"] = signature
+        _data_state["reloading"] = False
+    response_cache.clear()
+    print("분석기 및 예측 모델 교체 완료.")
+
+
+@app.before_request
+def reload_data_if_changed():
+    # 전처리(data_preprocessor.py / analytics_store.py)로 데이터가 바뀌면 재시작 없이 다시 로드
+    now = time.monotonic()
+    if now - _data_state["checked_at"] < DATA_CHECK_INTERVAL_S:
+        return
+    with _reload_lock:
+        if now - _data_state["checked_at"] < DATA_CHECK_INTERVAL_S or _data_state["reloading"]:
+            return
+        _data_state["checked_at"] = now
+        signature = _data_signature()
+        if signature == _data_state["signature"]:
+            return
+        _data_state["reloading"] = True
+    print("데이터 파일 변경 감지: 분석기 및 예측 모델을 백그라운드에서 다시 로드합니다.")
+    threading.Thread(target=_reload_serving, args=(signature,), name="data-reload", daemon=True).start()
+
+
+def result_format():
+    fmt = request.args.get("format", "columns")
+    return fmt if fmt in JSON_RESULT_FORMATS else "columns"
+
+
+def league_arg():
+    # ?league=all | La Liga | Premier League ... (없으면 PL 경기 단위 데이터)
+    return request.args.get("league") or None
 
 @app.route('/')
 def home():
     return "EPL 데이터 분석 API 서버(v2)가 실행 중입니다."
 
 @app.route('/api/stats/team/<team_name>', methods=['GET'])
+@response_cache.cached(data_version)
 def get_team_stats(team_name):
+    analyzer, _ = serving()
     stats = analyzer.get_team_stats(team_name)
     trend = analyzer.get_team_trend(team_name)
     return jsonify({"stats": stats, "trend": trend})
 
+@app.route('/api/stats/season-simulation', methods=['GET'])
+@response_cache.cached(data_version)
+def get_season_simulation():
+    # ?league=PL|Championship&sims=100000 (요청당 최대 SIMULATION_MAX_SIMS회)
+    analyzer, _ = serving()
+    sims = min(request.args.get("sims", 100_000, type=int), SIMULATION_MAX_SIMS)
+    result = analyzer.simulate_season(
+        team_league=request.args.get("league", "PL"), n_sims=sims, format=result_format()
+    )
+    return jsonify(result)
+
 @app.route('/api/stats/player/<player_name>', methods=['GET'])
+@response_cache.cached(data_version)
 def get_player_stats(player_name):
+    analyzer, _ = serving()
     stats = analyzer.get_player_stats(player_name)
     return jsonify(stats)
 
 @app.route('/api/stats/top-scorers', methods=['GET'])
+@response_cache.cached(data_version)
 def get_top_scorers():
-    top_scorers = analyzer.get_top_scorers(top_n=10)
+    analyzer, _ = serving()
+    top_scorers = analyzer.get_top_scorers(top_n=10, format=result_format(), league=league_arg())
     return jsonify(top_scorers)
 
 @app.route('/api/stats/efficient-finishers', methods=['GET'])
+@response_cache.cached(data_version)
 def get_efficient_finishers():
-    efficient_finishers = analyzer.get_efficient_finishers(min_shots=20, top_n=10)
+    analyzer, _ = serving()
+    efficient_finishers = analyzer.get_efficient_finishers(min_shots=20, top_n=10, format=result_format(), league=league_arg())
     return jsonify(efficient_finishers)
 
+# 분석가용 애드혹 SQL (DuckDB, 읽기 전용) - 로컬 요청만 허용
+LOCAL_ADDRS = ("127.0.0.1", "::1")
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def is_local_origin():
+    # 브라우저가 보낸 Origin이 있으면 로컬 페이지여야 함 (Origin 없음 = curl/스크립트 등 비브라우저 요청)
+    origin = request.headers.get("Origin")
+    if not origin:
+        return True
+    try:
+        return urlsplit(origin).hostname in LOCAL_HOSTS
+    except ValueError:
+        return False
+
+@app.route('/api/query', methods=['GET', 'POST'])
+def run_query():
+    if request.remote_addr not in LOCAL_ADDRS or not is_local_origin():
+        return jsonify({"error": "SQL 쿼리 API는 로컬에서만 사용할 수 있습니다."}), 403
+
+    body = request.get_json(silent=True) or {}
+    sql = body.get("sql") or request.args.get("sql")
+    if not sql:
+        # SQL 없이 호출하면 조회 가능한 테이블/컬럼 목록 반환
+        sql = "SELECT table_name, column_name, data_type FROM information_schema.columns ORDER BY table_name"
+    analyzer, _ = serving()
+    result = analyzer.query(sql, format=result_format(), max_rows=body.get("max_rows") or request.args.get("max_rows"))
+    return jsonify(result)
+
 @app.route('/api/predict/team/<team_name>', methods=['GET'])
 def get_team_prediction(team_name):
-    import pandas as pd
-    features_df = pd.DataFrame([{"past_points": 80, "past_goals": 90}])  # TODO: 실제 피처로 수정
-    prediction = predictor.predict_team_performance(features_df)
+    # ?opponent=Arsenal&venue=home|away 이면 해당 경기 예측, 없으면 리그 내 경기당 기대 승점/순위
+    _, predictor = serving()
+    prediction = predictor.predict_team(
+        team_name,
+        opponent=request.args.get("opponent"),
+        venue=request.args.get("venue", "home"),
+    )
     return jsonify(prediction)
 
+@app.route('/api/cache/responses', methods=['GET'])
+def get_response_cache_stats():
+    # 통계 응답 캐시 항목 수/바이트/적중률/제거 횟수 (현재 데이터 버전 포함)
+    return jsonify({"data_version": data_version(), **response_cache.stats()})
+
+@app.route('/api/models/cache', methods=['GET'])
+def get_model_cache_stats():
+    # 프로세스에 캐시된 모델 파일별 로드 시간/메모리/조회 횟수
+    return jsonify(cache_stats())
+
+@app.route('/api/models/memo', methods=['GET'])
+def get_prediction_memo_stats():
+    # 예측 결과 메모(LRU) 크기/적중률/제거 횟수
+    _, predictor = serving()
+    return jsonify({"team": predictor.memo_stats(), "player": PLAYER_PREDICTION_MEMO.stats()})
+
+@app.route('/api/models/registry', methods=['GET'])
+def get_model_registry():
+    # 등록된 모델별 기본 버전/라우팅, ?name=player_goal 이면 버전별 피처/지표/학습 시각
+    name = request.args.get("name")
+    if name:
+        try:
+            return jsonify(REGISTRY.versions(name))
+        except KeyError as e:
+            return jsonify({"error": str(e)}), 404
+    return jsonify(REGISTRY.stats())
+
 @app.route('/api/predict/player/<player_name>', methods=['GET'])
 def get_player_prediction(player_name):
-    import pandas as pd
-    features_df = pd.DataFrame([{"past_goals": 15, "past_assists": 8}])  # TODO: 실제 피처로 수정
-    prediction = predictor.predict_player_performance(features_df)
+    # 오프라인 스코어링 결과 조회만 (?version=v1-xxxxxxxx 로 특정 모델 결과, 없으면 레지스트리 A/B 라우팅)
+    _, predictor = serving()
+    prediction = predictor.predict_player(player_name, version=request.args.get("version"))
     return jsonify(prediction)
 
 if __name__ == '__main__':
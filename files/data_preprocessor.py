@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from identity_resolution import resolve_clubs, resolve_players, estimate_born_year
+
 BASE_DIR = Path(__file__).resolve().parent  # 현재 data_preprocessor.py가 있는 폴더 (files)
 PROCESSED_DATA_DIR = BASE_DIR / "processed_data"
 
@@ -56,6 +58,228 @@ def load_data(file_paths):
     return raw_data
 
 
+# Big5 시즌 테이블: 스탯 블록마다 반복되는 식별 컬럼(Rk_stats_shooting 등)
+BIG5_REPEATED_ID_COLS = ("Rk", "Nation", "Pos", "Comp", "Age", "Born", "90s", "MP", "Starts", "Min")
+
+# Big5 원본 컬럼 → 표준 스키마
+BIG5_COLUMN_MAP = {
+    "Player": "Player Name",
+    "Squad": "Club",
+    "Pos": "Position",
+    "Nation": "Nation",
+    "Age": "Age",
+    "Born": "Born",
+    "MP": "Appearances",
+    "Starts": "Starts",
+    "Min": "Minutes",
+    "Gls": "Goals",
+    "Ast": "Assists",
+    "Sh": "Shots",
+    "SoT": "Shots On Target",
+    "xG": "xG",
+    "npxG": "npxG",
+    "xAG": "xA",
+    "Cmp": "Passes Completed",
+    "Att": "Passes Attempted",
+    "PrgP": "Progressive Passes",
+    "PrgC": "Progressive Carries",
+    "Touches": "Touches",
+    "Tkl": "Tackles",
+    "Blocks": "Blocks",
+    "CrdY": "Yellow Cards",
+    "CrdR": "Red Cards",
+    "Fls": "Fouls",
+}
+
+
+def preprocess_big5_players(big5_df):
+    """
+    Europe Big5 선수 시즌 테이블을 중복 제거 후 표준 스키마로 정규화합니다.
+    - 스탯 블록마다 반복되는 Rk/Nation/Pos/Comp 등의 컬럼 제거
+    - 컬럼명 표준화 (Player Name, Club, Goals, Shots, xG ...)
+    - Comp("eng Premier League") → 리그명("Premier League")
+    """
+    df = big5_df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+
+    # 1) 반복 식별 컬럼 + 원본과 값이 완전히 같은 *_stats_* 컬럼 제거
+    drop_cols = []
+    for c in df.columns:
+        if "_stats_" not in c:
+            continue
+        base = c.split("_stats_")[0]
+        if base in BIG5_REPEATED_ID_COLS or (base in df.columns and df[c].equals(df[base])):
+            drop_cols.append(c)
+    df = df.drop(columns=drop_cols)
+    print(f" - Big5: 반복 컬럼 {len(drop_cols)}개 제거")
+
+    # 2) 같은 선수-팀-출생연도 중복 행 제거 (이적 선수는 팀이 달라 유지됨)
+    before = len(df)
+    df = df.drop_duplicates(subset=[c for c in ["Player", "Squad", "Comp", "Born"] if c in df.columns])
+    if len(df) != before:
+        print(f" - Big5: 중복 행 {before - len(df)}개 제거")
+
+    # 3) 표준 스키마
+    out = pd.DataFrame(index=df.index)
+    for src, dst in BIG5_COLUMN_MAP.items():
+        if src in df.columns:
+            out[dst] = df[src]
+        elif dst in ("Player Name", "Club", "Position", "Nation"):
+            out[dst] = ""
+        else:
+            out[dst] = 0
+
+    comp = df["Comp"].astype(str) if "Comp" in df.columns else pd.Series("", index=df.index)
+    out["Comp"] = comp.str.replace(r"^[a-z]{2,3}\s+", "", regex=True).str.strip()
+    out["Nation"] = out["Nation"].astype(str).str.split().str[-1]
+
+    for c in ["Player Name", "Club", "Position", "Nation"]:
+        out[c] = out[c].fillna("").astype(str).str.strip()
+
+    num_cols = [c for c in out.columns if c not in ("Player Name", "Club", "Position", "Nation", "Comp")]
+    for c in num_cols:
+        out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0)
+
+    # 4) 파생 변수 (PL 선수 데이터와 같은 이름)
+    minutes_nz = out["Minutes"].replace(0, np.nan)
+    out["Goals_per90"] = np.where(out["Minutes"] > 0, (out["Goals"] / minutes_nz) * 90, 0)
+    out["Assists_per90"] = np.where(out["Minutes"] > 0, (out["Assists"] / minutes_nz) * 90, 0)
+    out["Conversion_Rate"] = np.where(out["Shots"] > 0, (out["Goals"] / out["Shots"]) * 100, 0)
+    out["Shots_Accuracy"] = np.where(out["Shots"] > 0, (out["Shots On Target"] / out["Shots"]) * 100, 0)
+    out["Total_Cards"] = out["Yellow Cards"] + out["Red Cards"]
+
+    out = out.replace([np.inf, -np.inf], np.nan).fillna(0)
+    out = out.sort_values(["Comp", "Club", "Player Name"]).reset_index(drop=True)
+    return out
+
+
+def resolve_identities(processed_data):
+    """
+    데이터셋 간 선수/클럽 ID 통합 단계.
+    - 경기 결과(HomeTeam/AwayTeam), PL 선수(Club), Big5(Club)의 클럽 표기 → club_id
+    - PL 선수와 Big5 선수(이적 선수 포함) → player_id
+    이후 조인/집계는 문자열 대신 정수 ID를 키로 사용합니다.
+    """
+    team_df = processed_data.get("team_data_cleaned")
+    player_df = processed_data.get("player_data_cleaned")
+    big5_df = processed_data.get("big5_player_data_cleaned")
+
+    club_names = []
+    if team_df is not None:
+        club_names += [team_df["HomeTeam"], team_df["AwayTeam"]]
+    if player_df is not None:
+        club_names.append(player_df["Club"])
+    if big5_df is not None:
+        club_names.append(big5_df["Club"])
+    if not club_names:
+        return processed_data
+
+    # 1) 클럽
+    clubs = resolve_clubs(pd.concat(club_names, ignore_index=True), PROCESSED_DATA_DIR / "club_index.csv")
+    club_ids = dict(zip(clubs["Club Name"], clubs["club_id"]))
+    print(f" - 클럽 ID 통합: 표기 {len(clubs)}개 → 클럽 {clubs['club_id'].nunique()}개")
+
+    def to_club_id(s):
+        return s.astype(str).str.strip().map(club_ids).fillna(0).astype("int32")
+
+    if team_df is not None:
+        team_df["home_club_id"] = to_club_id(team_df["HomeTeam"])
+        team_df["away_club_id"] = to_club_id(team_df["AwayTeam"])
+    if player_df is not None:
+        player_df["club_id"] = to_club_id(player_df["Club"])
+    if big5_df is not None:
+        big5_df["club_id"] = to_club_id(big5_df["Club"])
+
+    # 2) 선수 (PL은 선수-클럽당 1행으로 줄여서 비교, 출생연도는 나이+경기일로 추정)
+    if player_df is not None:
+        pl_rows = player_df[["Player Name", "club_id"]].copy()
+        if "Age" in player_df.columns and "Date" in player_df.columns:
+            pl_rows["Born"] = estimate_born_year(player_df["Age"], player_df["Date"])
+        else:
+            pl_rows["Born"] = np.nan
+        pl_mentions = pl_rows.groupby(["Player Name", "club_id"], as_index=False)["Born"].median()
+    else:
+        pl_mentions = pd.DataFrame(columns=["Player Name", "club_id", "Born"])
+
+    if big5_df is not None:
+        big5_mentions = big5_df[["Player Name", "club_id", "Born"]]
+    else:
+        big5_mentions = pd.DataFrame(columns=["Player Name", "club_id", "Born"])
+
+    pl_ids, big5_ids, player_index = resolve_players(
+        pl_mentions, big5_mentions, PROCESSED_DATA_DIR / "player_index.csv"
+    )
+    print(f" - 선수 ID 통합: 선수 {player_index['player_id'].nunique()}명 "
+          f"(PL {pl_ids.nunique()}명 중 Big5와 연결 {pl_ids[pl_ids.isin(big5_ids)].nunique()}명)")
+
+    if player_df is not None:
+        pl_mentions["player_id"] = pl_ids
+        player_df = player_df.merge(pl_mentions[["Player Name", "club_id", "player_id"]],
+                                    on=["Player Name", "club_id"], how="left")
+        player_df["player_id"] = player_df["player_id"].fillna(0).astype("int32")
+        processed_data["player_data_cleaned"] = player_df
+    if big5_df is not None:
+        big5_df["player_id"] = big5_ids
+
+    processed_data["club_index_cleaned"] = clubs
+    processed_data["player_index_cleaned"] = player_index
+    return processed_data
+
+
+def build_player_match_index(player_df, team_df):
+    """
+    선수 경기 행(Date, club_id) → 팀 경기 행(Date, home/away_club_id) 조인 인덱스.
+    팀 경기를 (club_id, 날짜) 정수 키로 펼쳐 정렬한 뒤 searchsorted로 한 번에 매칭합니다.
+    반환: player_data와 같은 행 순서의 DataFrame
+      player_row, match_row(-1: 매칭 없음), is_home, opponent_club_id, team_goals, opp_goals, result(W/D/L)
+    """
+    match_date = pd.to_datetime(team_df["Date"], format="%d/%m/%Y", errors="coerce")
+    match_day = (match_date - pd.Timestamp("1970-01-01")).dt.days.fillna(-1).to_numpy(np.int64)
+
+    home_goals = pd.to_numeric(team_df["FTH Goals"], errors="coerce").fillna(0).to_numpy(np.int16)
+    away_goals = pd.to_numeric(team_df["FTA Goals"], errors="coerce").fillna(0).to_numpy(np.int16)
+    home_id = team_df["home_club_id"].to_numpy(np.int64)
+    away_id = team_df["away_club_id"].to_numpy(np.int64)
+    n = len(team_df)
+
+    # 팀 경기 1행 → (홈 팀 관점, 원정 팀 관점) 2행
+    side = pd.DataFrame({
+        "key": np.concatenate([(home_id << 32) | match_day, (away_id << 32) | match_day]),
+        "match_row": np.concatenate([np.arange(n), np.arange(n)]),
+        "is_home": np.concatenate([np.ones(n, np.int8), np.zeros(n, np.int8)]),
+        "opponent_club_id": np.concatenate([away_id, home_id]).astype(np.int32),
+        "team_goals": np.concatenate([home_goals, away_goals]),
+        "opp_goals": np.concatenate([away_goals, home_goals]),
+    })
+    side = side[np.concatenate([match_day >= 0, match_day >= 0])]
+    side = side.sort_values("key", kind="mergesort").reset_index(drop=True)
+    side_keys = side["key"].to_numpy()
+
+    player_day = (pd.to_datetime(player_df["Date"], errors="coerce") - pd.Timestamp("1970-01-01")).dt.days
+    player_day = player_day.fillna(-1).to_numpy(np.int64)
+    player_key = (player_df["club_id"].to_numpy(np.int64) << 32) | player_day
+
+    pos = np.searchsorted(side_keys, player_key)
+    pos_c = np.minimum(pos, len(side_keys) - 1)
+    found = (len(side_keys) > 0) & (side_keys[pos_c] == player_key) & (player_day >= 0)
+
+    hit = side.iloc[pos_c].reset_index(drop=True)
+    index = pd.DataFrame({
+        "player_row": np.arange(len(player_df), dtype=np.int32),
+        "match_row": np.where(found, hit["match_row"], -1).astype(np.int32),
+        "is_home": np.where(found, hit["is_home"], -1).astype(np.int8),
+        "opponent_club_id": np.where(found, hit["opponent_club_id"], 0).astype(np.int32),
+        "team_goals": np.where(found, hit["team_goals"], 0).astype(np.int16),
+        "opp_goals": np.where(found, hit["opp_goals"], 0).astype(np.int16),
+    })
+    index["result"] = np.select(
+        [~found, index["team_goals"] > index["opp_goals"], index["team_goals"] == index["opp_goals"]],
+        ["", "W", "D"],
+        default="L",
+    )
+    return index
+
+
 def preprocess_data(raw_data):
     """
     원본 DataFrame들을 받아 전처리합니다.
@@ -272,6 +496,35 @@ def preprocess_data(raw_data):
         processed_data["player_data_cleaned"] = player_df
         print(" - 선수 데이터 전처리 및 Feature 엔지니어링 완료.")
 
+    # 3. Europe Big5 선수 시즌 데이터 (리그 간 비교용)
+    if "europe_big5_league_players_data" in raw_data:
+        print(" - Europe Big5 선수 데이터 전처리 중...")
+        try:
+            big5_df = preprocess_big5_players(raw_data["europe_big5_league_players_data"])
+            processed_data["big5_player_data_cleaned"] = big5_df
+            print(f" - Big5 선수 데이터 전처리 완료 (행: {len(big5_df)}, 리그: {big5_df['Comp'].nunique()})")
+        except Exception as e:
+            print(f"오류: Big5 선수 데이터 전처리 실패: {e}")
+
+    # 4. 선수/클럽 ID 통합 (데이터셋 간 조인 키)
+    print(" - 선수/클럽 ID 통합 중...")
+    try:
+        processed_data = resolve_identities(processed_data)
+    except Exception as e:
+        print(f"오류: 선수/클럽 ID 통합 실패: {e}")
+
+    # 5. 선수 경기 ↔ 팀 경기 조인 인덱스 (상대팀/홈·원정/결과/팀 득점)
+    player_df = processed_data.get("player_data_cleaned")
+    team_df = processed_data.get("team_data_cleaned")
+    if player_df is not None and team_df is not None and "club_id" in player_df.columns:
+        print(" - 선수 경기 ↔ 팀 경기 조인 인덱스 생성 중...")
+        try:
+            match_index = build_player_match_index(player_df, team_df)
+            processed_data["player_match_index_cleaned"] = match_index
+            print(f" - 조인 인덱스 완료 (매칭 {int((match_index['match_row'] >= 0).sum())}/{len(match_index)}행)")
+        except Exception as e:
+            print(f"오류: 조인 인덱스 생성 실패: {e}")
+
     print("모든 데이터 전처리 완료.")
     return processed_data
 
@@ -301,6 +554,21 @@ def main():
     if raw_dataframes:
         processed_dataframes = preprocess_data(raw_dataframes)
         save_data(processed_dataframes)
+
+        # SQLite 분석 저장소(ANALYZER_BACKEND=sqlite)를 쓰고 있으면 새 데이터로 다시 생성
+        try:
+            from analytics_store import STORE_PATH, build_store
+            if STORE_PATH.exists():
+                build_store()
+        except Exception as e:
+            print(f"경고: 분석 저장소 갱신 실패: {e}")
+
+        # 학습된 모델이 있으면 새 데이터로 예측 테이블 갱신
+        try:
+            from prediction_scoring import score_players
+            score_players()
+        except Exception as e:
+            print(f"경고: 예측 테이블 갱신 실패: {e}")
         print("\n=== 데이터 전처리 작업 완료 ===")
     else:
         print("\n=== 데이터 전처리 작업 실패: 데이터를 로드할 수 없습니다. ===")
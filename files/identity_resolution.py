@@ -0,0 +1,297 @@
+# identity_resolution.py
+"""
+데이터셋 간 선수/클럽 식별자(ID) 통합
+- PL 선수 경기 데이터 (Player Name + Club, 예: "Manchester United")
+- Europe Big5 시즌 데이터 (Player Name + Club, 예: "Manchester Utd")
+- 경기 결과 데이터 (HomeTeam/AwayTeam, 예: "Man United")
+
+이름 정규화 → 블로킹(같은 토큰을 가진 후보끼리만 비교) → 문자 n-gram 유사도(벡터화)로
+같은 선수/클럽을 묶고, 안정적인 정수 ID(player_id, club_id)를 부여합니다.
+기존 player_index.csv / club_index.csv가 있으면 이미 부여된 ID는 그대로 유지합니다.
+"""
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# 유니코드 분해(NFKD)로 안 지워지는 문자
+SPECIAL_CHARS = str.maketrans({
+    "ø": "o", "Ø": "o", "æ": "ae", "Æ": "ae", "ß": "ss", "đ": "d", "Đ": "d",
+    "ł": "l", "Ł": "l", "ı": "i", "þ": "th", "ð": "d", "œ": "oe",
+})
+
+# 클럽 약칭 → 표준 토큰
+CLUB_TOKEN_ALIASES = {
+    "man": "manchester",
+    "utd": "united",
+    "nottm": "nottingham",
+    "nottham": "nottingham",
+    "wolves": "wolverhampton",
+    "spurs": "tottenham",
+    "weds": "wednesday",
+    "brom": "bromwich",
+    "peterboro": "peterborough",
+    "qpr": "queens park rangers",
+    "eint": "eintracht",
+}
+CLUB_STOPWORDS = {"fc", "afc", "cf", "the"}
+
+# 유사도 기준
+CLUB_MIN_SIMILARITY = 0.9
+PLAYER_MIN_SIMILARITY = 0.85          # 클럽이 달라도 같은 선수로 볼 이름 유사도
+PLAYER_MIN_SIMILARITY_SAME_CLUB = 0.35  # 같은 클럽이면 완화 (예: Bobby Reid ↔ Bobby De Cordova-Reid)
+
+
+# ==================================================
+# 이름 정규화
+# ==================================================
+def normalize_name(s: pd.Series) -> pd.Series:
+    """
+    소문자 + 악센트 제거 + 구두점 제거. (예: "Martin Ødegaard" → "martin odegaard")
+    """
+    s = s.fillna("").astype(str).str.translate(SPECIAL_CHARS)
+    s = s.map(lambda x: unicodedata.normalize("NFKD", x).encode("ascii", "ignore").decode("ascii"))
+    s = s.str.lower().str.replace("'", "", regex=False)
+    s = s.str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+    return s
+
+
+def normalize_club(s: pd.Series) -> pd.Series:
+    """
+    클럽명 정규화: 약칭 확장 + 불용어 제거. (예: "Nott'm Forest" → "nottingham forest")
+    """
+    s = normalize_name(s)
+
+    def expand(x):
+        tokens = []
+        for t in x.split():
+            if t in CLUB_STOPWORDS:
+                continue
+            tokens.extend(CLUB_TOKEN_ALIASES.get(t, t).split())
+        return " ".join(tokens)
+
+    # 고유값만 변환 후 매핑 (클럽명은 종류가 적음)
+    uniq = pd.Series(s.unique())
+    return s.map(dict(zip(uniq, uniq.map(expand))))
+
+
+def _pair_similarity(left: pd.Series, right: pd.Series) -> np.ndarray:
+    """
+    (left[i], right[i]) 쌍별 문자 n-gram TF-IDF 코사인 유사도 (희소행렬 연산으로 한 번에 계산)
+    """
+    if len(left) == 0:
+        return np.zeros(0)
+    vec = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 3))
+    vec.fit(pd.concat([left, right]).unique())
+    a = vec.transform(left.values)
+    b = vec.transform(right.values)
+    return np.asarray(a.multiply(b).sum(axis=1)).ravel()
+
+
+def _blocks(keys: pd.Series, how=("first", "last")) -> pd.DataFrame:
+    """
+    정규화 이름 → 블로킹 키 (첫 토큰 / 마지막 토큰). 같은 블록 안에서만 후보 쌍을 만듭니다.
+    """
+    tokens = keys.str.split()
+    parts = []
+    if "first" in how:
+        parts.append(pd.DataFrame({"idx": keys.index, "block": tokens.str[0]}))
+    if "last" in how:
+        parts.append(pd.DataFrame({"idx": keys.index, "block": tokens.str[-1]}))
+    out = pd.concat(parts, ignore_index=True).dropna()
+    return out[out["block"] != ""].drop_duplicates()
+
+
+def _assign_stable_ids(keys: pd.Series, existing: dict) -> dict:
+    """
+    key → 정수 ID. 기존 인덱스의 ID는 유지하고, 새 key는 정렬 순서대로 max+1부터 부여합니다.
+    """
+    mapping = dict(existing)
+    next_id = max(mapping.values(), default=0) + 1
+    for k in sorted(set(keys) - set(mapping)):
+        mapping[k] = next_id
+        next_id += 1
+    return mapping
+
+
+def _load_index(path, key_col, id_col):
+    path = Path(path) if path is not None else None
+    if path is None or not path.exists():
+        return {}
+    try:
+        df = pd.read_csv(path, encoding="utf-8-sig", keep_default_na=False)
+        return dict(zip(df[key_col].astype(str), df[id_col].astype(int)))
+    except Exception as e:
+        print(f"경고: 기존 인덱스 '{path}' 로드 실패 ({e}). 새로 부여합니다.")
+        return {}
+
+
+class _UnionFind:
+    def __init__(self, items):
+        self.parent = {x: x for x in items}
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+# ==================================================
+# 클럽 통합
+# ==================================================
+def resolve_clubs(names: pd.Series, existing_index_path=None) -> pd.DataFrame:
+    """
+    모든 출처의 클럽명을 묶어 club_id를 부여합니다.
+    반환: 원본 이름별 1행 (club_id, Club, Club Name, norm_key, club_key)
+      - Club     : 표시용 대표 이름 (묶음 안에서 가장 긴 원본 이름)
+      - Club Name: 원본 이름 (출처별 표기)
+      - club_key : 묶음의 표준 정규화 키
+    """
+    names = pd.Series(pd.unique(names.dropna().astype(str).str.strip()))
+    names = names[names != ""].reset_index(drop=True)
+    keys = normalize_club(names)
+
+    # 정규화 키가 같으면 같은 클럽 ("Manchester Utd" = "Man United")
+    uniq_keys = pd.Series(keys.unique())
+    uf = _UnionFind(uniq_keys.tolist())
+
+    # 블로킹: 첫 토큰이 같은 키끼리만 후보 쌍
+    blocks = _blocks(uniq_keys, how=("first",))
+    pairs = blocks.merge(blocks, on="block", suffixes=("_a", "_b"))
+    pairs = pairs[pairs["idx_a"] < pairs["idx_b"]]
+    if not pairs.empty:
+        ka = uniq_keys.loc[pairs["idx_a"]].reset_index(drop=True)
+        kb = uniq_keys.loc[pairs["idx_b"]].reset_index(drop=True)
+        sim = _pair_similarity(ka, kb)
+
+        # 토큰 포함 관계 ("leicester" ⊂ "leicester city", "brighton" ⊂ "brighton hove albion")
+        ta, tb = ka.str.split().map(set), kb.str.split().map(set)
+        subset = np.array([a <= b or b <= a for a, b in zip(ta, tb)])
+
+        cand = pd.DataFrame({"a": ka, "b": kb, "ok": subset | (sim >= CLUB_MIN_SIMILARITY)})
+        cand = cand[cand["ok"]]
+
+        # 짧은 이름이 서로 다른 두 클럽에 동시에 걸리면(예: "manchester") 모호하므로 연결하지 않음
+        short = np.where(cand["a"].str.len() <= cand["b"].str.len(), cand["a"], cand["b"])
+        long_ = np.where(cand["a"].str.len() <= cand["b"].str.len(), cand["b"], cand["a"])
+        links = pd.DataFrame({"short": short, "long": long_})
+        n_long = links.groupby("short")["long"].transform("nunique")
+        for s, l in links[n_long == 1].itertuples(index=False):
+            uf.union(s, l)
+
+    root = {k: uf.find(k) for k in uniq_keys}
+    out = pd.DataFrame({"Club Name": names, "norm_key": keys})
+    out["root"] = out["norm_key"].map(root)
+
+    # 묶음의 표준 키 = 가장 긴 정규화 키, 표시명 = 가장 긴 원본 이름
+    out["club_key"] = out.groupby("root")["norm_key"].transform(lambda x: max(x, key=len))
+    out["Club"] = out.groupby("root")["Club Name"].transform(lambda x: max(x, key=len))
+
+    # 기존 인덱스: 묶음 안의 어떤 이름이든 이미 ID가 있으면 그 ID 유지 (새 표기가 추가돼도 안정)
+    existing = _load_index(existing_index_path, "norm_key", "club_id")
+    known = out.assign(eid=out["norm_key"].map(existing)).dropna(subset=["eid"])
+    known = known.groupby("club_key")["eid"].min().astype(int).to_dict()
+    ids = _assign_stable_ids(out["club_key"], known)
+    out["club_id"] = out["club_key"].map(ids).astype("int32")
+    return out[["club_id", "Club", "Club Name", "norm_key", "club_key"]].sort_values(["club_id", "Club Name"])
+
+
+# ==================================================
+# 선수 통합
+# ==================================================
+def _born_compatible(a: pd.Series, b: pd.Series, tol=1) -> np.ndarray:
+    a = pd.to_numeric(a, errors="coerce")
+    b = pd.to_numeric(b, errors="coerce")
+    return (a.isna() | b.isna() | ((a - b).abs() <= tol)).to_numpy()
+
+
+def estimate_born_year(age: pd.Series, date: pd.Series) -> pd.Series:
+    """
+    FBref 형식 나이("29-343" = 29년 343일)와 경기 날짜로 출생연도를 추정합니다.
+    """
+    parts = age.astype(str).str.extract(r"^(\d+)-(\d+)$").astype(float)
+    days = parts[0] * 365.25 + parts[1]
+    date = pd.to_datetime(date, errors="coerce")
+    born = date - pd.to_timedelta(days, unit="D")
+    return born.dt.year
+
+
+def resolve_players(pl_mentions: pd.DataFrame, big5_mentions: pd.DataFrame, existing_index_path=None):
+    """
+    PL/Big5 선수 언급(mention)을 같은 선수끼리 묶어 player_id를 부여합니다.
+    입력 컬럼: Player Name, club_id, Born (PL은 추정 출생연도)
+    - Big5: (정규화 이름, 출생연도)가 같으면 같은 선수 (이적 선수: 팀이 달라도 같은 ID)
+    - PL  : 같은 블록(이름 첫/마지막 토큰)의 Big5 선수 중 유사도 최고 후보에 연결,
+            맞는 후보가 없으면 새 선수로 등록
+    반환: (pl_ids, big5_ids, player_index)
+      - pl_ids / big5_ids: 입력과 같은 index의 player_id Series
+      - player_index     : player_id별 대표 이름/출생연도 테이블
+    """
+    big5 = big5_mentions.copy()
+    big5["name_key"] = normalize_name(big5["Player Name"])
+    born_b = pd.to_numeric(big5["Born"], errors="coerce")
+    big5["entity_key"] = big5["name_key"] + "|" + born_b.map(lambda x: "" if pd.isna(x) else str(int(x)))
+
+    pl = pl_mentions.copy()
+    pl["name_key"] = normalize_name(pl["Player Name"])
+
+    # Big5 대표 엔티티 1행씩 (후보 집합)
+    ent = big5.drop_duplicates("entity_key").reset_index(drop=True)
+    ent_clubs = big5.groupby("entity_key")["club_id"].agg(set)
+
+    # 블로킹 후 후보 쌍 생성 (전체 쌍 비교 X)
+    bp = _blocks(pl["name_key"])
+    be = _blocks(ent["name_key"])
+    pairs = bp.merge(be, on="block", suffixes=("_pl", "_ent"))[["idx_pl", "idx_ent"]].drop_duplicates()
+
+    matched = pd.Series(pd.NA, index=pl.index, dtype="object")
+    if not pairs.empty:
+        pl_rows = pl.loc[pairs["idx_pl"]].reset_index(drop=True)
+        ent_rows = ent.loc[pairs["idx_ent"]].reset_index(drop=True)
+
+        sim = _pair_similarity(pl_rows["name_key"], ent_rows["name_key"])
+        exact = (pl_rows["name_key"] == ent_rows["name_key"]).to_numpy()
+        born_ok = _born_compatible(pl_rows["Born"], ent_rows["Born"])
+        same_club = np.array([
+            c in ent_clubs.get(k, ()) for c, k in zip(pl_rows["club_id"], ent_rows["entity_key"])
+        ])
+
+        ok = born_ok & (exact | (sim >= PLAYER_MIN_SIMILARITY) | (same_club & (sim >= PLAYER_MIN_SIMILARITY_SAME_CLUB)))
+        score = sim + exact * 1.0 + same_club * 0.5
+
+        cand = pd.DataFrame({
+            "idx_pl": pairs["idx_pl"].to_numpy(),
+            "entity_key": ent_rows["entity_key"].to_numpy(),
+            "score": score,
+        })[ok]
+        best = cand.sort_values("score", ascending=False, kind="mergesort").drop_duplicates("idx_pl")
+        matched.loc[best["idx_pl"].to_numpy()] = best["entity_key"].to_numpy()
+
+    # 매칭 안 된 PL 선수는 PL 이름 + 추정 출생연도로 새 엔티티
+    born_p = pd.to_numeric(pl["Born"], errors="coerce")
+    own_key = pl["name_key"] + "|" + born_p.map(lambda x: "" if pd.isna(x) else str(int(x)))
+    pl["entity_key"] = matched.fillna(own_key).astype(str)
+
+    existing = _load_index(existing_index_path, "entity_key", "player_id")
+    ids = _assign_stable_ids(pd.concat([big5["entity_key"], pl["entity_key"]]), existing)
+
+    pl_ids = pl["entity_key"].map(ids).astype("int32")
+    big5_ids = big5["entity_key"].map(ids).astype("int32")
+
+    # 선수 인덱스: 표시 이름은 Big5 우선, 없으면 PL 이름
+    index = pd.concat([
+        big5[["entity_key", "Player Name", "name_key", "Born"]],
+        pl[["entity_key", "Player Name", "name_key", "Born"]],
+    ]).drop_duplicates("entity_key")
+    index["player_id"] = index["entity_key"].map(ids).astype("int32")
+    index = index.sort_values("player_id")[["player_id", "Player Name", "name_key", "Born", "entity_key"]]
+
+    return pl_ids, big5_ids, index.reset_index(drop=True)
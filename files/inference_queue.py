@@ -0,0 +1,191 @@
+# inference_queue.py
+"""
+마이크로 배치 추론 큐 (프로세스 내부)
+- 동시에 들어온 단건 예측 요청을 최대 max_wait_ms 동안 / 최대 max_batch개까지 모아서
+  PlayerGoalPredictor.predict_goals_batch 한 번으로 예측
+- 호출자는 concurrent.futures.Future(submit) 또는 asyncio awaitable(apredict)로 결과를 받음
+- 요청이 몰릴수록 배치가 커져 처리량이 늘어남 (행마다 predict 오버헤드를 내지 않음)
+"""
+import argparse
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+MAX_BATCH = 64
+MAX_WAIT_MS = 2.0
+
+
+class BatchingPredictor:
+    """
+    PlayerGoalPredictor를 감싸는 마이크로 배치 서비스 (백그라운드 스레드 1개)
+    - submit(input_data) → Future[float] (예측 실패 행은 ValueError)
+    - await apredict(input_data) → float
+    - predict_goals(input_data) → int (기존 predict_goals와 같은 형식, 실패 시 -1)
+    """
+
+    def __init__(self, predictor, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        if predictor.model is None or predictor.features is None:
+            raise ValueError("모델(과 피처 목록)이 로드된 예측기가 필요합니다.")
+        self.predictor = predictor
+        self.features = list(predictor.features)
+        self.max_batch = int(max_batch)
+        self.max_wait_s = float(max_wait_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        # submit의 종료 확인 + put과 close()를 묶음 (종료 신호 뒤에 요청이 들어가지 않도록)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "max_batch_seen": 0}
+        self._thread = threading.Thread(target=self._run, name="batching-predictor", daemon=True)
+        self._thread.start()
+
+    # --------------------------------------------------
+    # 요청 (어느 스레드에서든 호출 가능)
+    # --------------------------------------------------
+    def submit(self, input_data) -> Future:
+        """
+        input_data: {피처 이름: 값} dict 또는 features 순서의 1차원 값 목록
+        잘못된 입력(숫자가 아님 / 길이 불일치)은 여기서 해당 Future만 실패시킴 (배치 전체에 영향 없음)
+        """
+        future = Future()
+        try:
+            if isinstance(input_data, dict):
+                # 별칭('xG' 등)까지 피처 위치로 변환 (숫자가 아니면 ValueError)
+                row = self.predictor.adapter.fill(input_data, np.empty(len(self.features)))
+            else:
+                row = np.asarray(input_data, dtype=np.float64)
+                if row.shape != (len(self.features),):
+                    raise ValueError(
+                        f"입력 길이가 피처 수와 다릅니다: {row.shape} (필요: {len(self.features)}개)"
+                    )
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("종료된 예측 서비스입니다.")
+            self._queue.put((row, future))
+        return future
+
+    async def apredict(self, input_data) -> float:
+        return await asyncio.wrap_future(self.submit(input_data))
+
+    def predict_goals(self, input_data) -> int:
+        try:
+            return int(round(self.submit(input_data).result()))
+        except Exception:
+            return -1
+
+    # --------------------------------------------------
+    # 배치 수집 → 한 번에 예측 (백그라운드 스레드)
+    # --------------------------------------------------
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # 종료 신호는 현재 배치를 처리한 뒤 반영
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            futures = [f for _, f in batch]
+            try:
+                X = np.array([row for row, _ in batch], dtype=np.float64)
+                preds, errors = self.predictor.predict_goals_batch(X)
+            except Exception as e:
+                for f in futures:
+                    f.set_exception(e)
+                continue
+
+            for f, pred, err in zip(futures, preds.tolist(), errors.tolist()):
+                if err:
+                    f.set_exception(ValueError("예측 실패 (입력 피처 확인 필요)"))
+                else:
+                    f.set_result(pred)
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        # 혹시 남은 요청은 결과 없이 끝나지 않도록 실패 처리
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("종료된 예측 서비스입니다."))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def batch_stats(self):
+        s = dict(self.stats)
+        s["avg_batch"] = s["requests"] / s["batches"] if s["batches"] else 0.0
+        return s
+
+
+if __name__ == "__main__":
+    from prediction_model import PlayerGoalPredictor, PLAYER_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="마이크로 배치 추론 벤치마크 (동시 단건 요청)")
+    parser.add_argument("--model", default=str(PLAYER_MODEL_PATH), help="모델 파일")
+    parser.add_argument("--clients", type=int, default=32, help="동시 요청 스레드 수")
+    parser.add_argument("--requests", type=int, default=2000, help="총 요청 수")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    predictor = PlayerGoalPredictor(model_path=args.model)
+    if predictor.model is None:
+        raise SystemExit(f"모델이 없습니다: {args.model} (model_trainer.py 실행 필요)")
+
+    rng = np.random.default_rng(0)
+    rows = [dict(zip(predictor.features, r)) for r in rng.random((args.requests, len(predictor.features))) * 50]
+
+    def bench(fn):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            out = list(pool.map(fn, rows))
+        return time.perf_counter() - start, out
+
+    direct_s, direct = bench(predictor.predict_goals)
+    with BatchingPredictor(predictor, args.max_batch, args.max_wait_ms) as service:
+        batched_s, batched = bench(service.predict_goals)
+        stats = service.batch_stats()
+
+    print(f"동시 요청 {args.clients}개, 총 {args.requests}건 ({args.model})")
+    print(f"  - 단건 predict_goals : {args.requests / direct_s:,.0f} 건/초")
+    print(f"  - 마이크로 배치      : {args.requests / batched_s:,.0f} 건/초 "
+          f"(배치 {stats['batches']}회, 평균 {stats['avg_batch']:.1f}건, 최대 {stats['max_batch_seen']}건)")
+    print(f"  - 결과 일치: {direct == batched}")
@@ -0,0 +1,148 @@
+# model_cache.py
+"""
+프로세스 전역 모델 캐시
+- 같은 모델 파일은 프로세스당 한 번만 joblib.load (Streamlit rerun / Flask 요청마다 다시 읽지 않음)
+- 키: 파일 경로. 조회 때마다 (mtime, 크기)만 확인하고, 바뀌었으면 내용 해시까지 비교해 달라졌을 때만 다시 로드
+- 로드 시간 / 메모리(로드 전후 RSS 차이) / 조회 횟수를 cache_stats()로 확인
+- mmap_mode="r": 압축 없이 저장된 모델의 NumPy 배열을 읽기 전용 메모리 매핑
+  (여러 워커 프로세스가 같은 물리 페이지를 공유, 모델 메모리가 워커 수만큼 늘지 않음)
+- model_digest(): 로드된 파일의 내용 해시 (예측 결과 메모의 모델 버전 키)
+"""
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import joblib  # pip install joblib
+except ImportError:
+    joblib = None
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _rss_bytes():
+    """
+    현재 프로세스 RSS (Linux /proc 기준, 그 외 OS는 None)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _timed_load(path, loader):
+    """
+    (객체, 로드 시간(초), 로드 전후 RSS 차이(bytes, 측정 불가면 None))
+    """
+    before = _rss_bytes()
+    start = time.perf_counter()
+    obj = loader(path)
+    elapsed = time.perf_counter() - start
+    after = _rss_bytes()
+    memory = max(after - before, 0) if before is not None and after is not None else None
+    return obj, elapsed, memory
+
+
+def load_model(path, loader=None, mmap_mode=None):
+    """
+    path의 모델을 캐시에서 반환합니다. (없거나 파일이 바뀌었으면 로드)
+    loader: path → 객체 (기본 joblib.load). 파일이 없으면 FileNotFoundError
+    mmap_mode: joblib.load의 mmap_mode ("r" 권장, None이면 전부 메모리로 읽음)
+    """
+    path = Path(path).resolve()
+    st = path.stat()
+    signature = (st.st_mtime_ns, st.st_size)
+    key = (path, mmap_mode)
+
+    entry = _CACHE.get(key)
+    if entry is not None and entry["signature"] == signature:
+        entry["hits"] += 1
+        return entry["model"]
+
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry["signature"] == signature:
+            entry["hits"] += 1
+            return entry["model"]
+
+        digest = _file_hash(path)
+        if entry is not None and entry["sha1"] == digest:
+            # 내용은 그대로 (touch/복사): 다시 로드하지 않고 서명만 갱신
+            entry["signature"] = signature
+            entry["hits"] += 1
+            return entry["model"]
+
+        if loader is None:
+            if joblib is None:
+                raise ImportError("모델을 읽으려면 joblib가 필요합니다. (pip install joblib)")
+            def loader(p):
+                return joblib.load(p, mmap_mode=mmap_mode)
+        obj, elapsed, memory = _timed_load(path, loader)
+
+        _CACHE[key] = {
+            "model": obj,
+            "signature": signature,
+            "sha1": digest,
+            "load_time_s": elapsed,
+            "memory_bytes": memory,
+            "file_bytes": st.st_size,
+            "mmap_mode": mmap_mode,
+            "loads": (entry["loads"] + 1) if entry else 1,
+            "hits": 0,
+            "loaded_at": time.time(),
+        }
+        mem = "측정 불가" if memory is None else f"{memory / 1024:.0f} KiB"
+        mapped = ", mmap" if mmap_mode else ""
+        print(f"[모델 캐시] 로드: {path.name} ({elapsed * 1000:.1f}ms, 메모리 {mem}{mapped})")
+        return obj
+
+
+def model_digest(path, mmap_mode=None):
+    """
+    캐시에 로드된 모델 파일의 sha1 (예측 메모의 모델 버전 키). 캐시에 없으면 None
+    """
+    entry = _CACHE.get((Path(path).resolve(), mmap_mode))
+    return None if entry is None else entry["sha1"]
+
+
+def cache_stats():
+    """
+    캐시된 모델별 통계 (경로, 해시, 로드 시간, 메모리, 로드/조회 횟수)
+    """
+    return [
+        {
+            "path": str(path),
+            "mmap_mode": mmap_mode,
+            "sha1": e["sha1"][:12],
+            "mtime_ns": e["signature"][0],
+            "file_bytes": e["file_bytes"],
+            "memory_bytes": e["memory_bytes"],
+            "load_time_s": e["load_time_s"],
+            "loads": e["loads"],
+            "hits": e["hits"],
+            "loaded_at": e["loaded_at"],
+        }
+        for (path, mmap_mode), e in list(_CACHE.items())
+    ]
+
+
+def clear_cache(path=None):
+    with _LOCK:
+        if path is None:
+            _CACHE.clear()
+        else:
+            path = Path(path).resolve()
+            for key in [k for k in _CACHE if k[0] == path]:
+                _CACHE.pop(key, None)
@@ -0,0 +1,346 @@
+# model_registry.py
+"""
+버전별 모델 레지스트리 (manifest + 지연 로드 + A/B 라우팅)
+- 학습이 끝날 때마다 모델 파일을 trained_models/registry/{이름}/{버전}.joblib 으로 복사하고
+  manifest.json에 이름 / 버전 / 피처 목록 / 평가 지표 / 학습 시각을 기록
+- 버전 ID는 예측 테이블과 같은 "v{번들 버전}-{파일 해시 8자리}" (prediction_scoring.model_version)
+- 모델은 처음 쓰일 때만 로드하고, 참조하는 쪽이 없어지면 메모리에서 해제 (WeakValueDictionary)
+- manifest의 routing 가중치로 버전 간 트래픽 분배 (키가 있으면 같은 키는 항상 같은 버전)
+- manifest가 바뀌면(mtime) 다음 조회 때 다시 읽음 → 재시작 없이 새 버전 배포 / 롤백
+- 저장소에는 모델 파일을 두지 않음: 처음에는 레지스트리가 비어 있고,
+  `python model_trainer.py`(선수 득점 v1) / `python model_trainer.py --team`(팀 결과 v1)을 실행하면 첫 버전이 등록됨
+- 선수 득점 모델은 promote/라우팅으로 트래픽을 받게 된 버전을 바로 예측 테이블에 점수화
+  (라우팅된 버전의 결과가 테이블에 없어 최신 버전으로 대체되는 일이 없도록)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import joblib  # pip install joblib
+except ImportError:
+    joblib = None
+
+BASE_DIR = Path(__file__).resolve().parent
+REGISTRY_DIR = BASE_DIR / "trained_models" / "registry"
+MANIFEST_PATH = REGISTRY_DIR / "manifest.json"
+
+# 이름별로 남겨 둘 버전 수 (기본 버전 / 라우팅 대상은 항상 유지, 예측 테이블도 같은 수만큼 보관)
+MAX_REGISTRY_VERSIONS = 5
+
+# 예측 테이블(prediction_scoring)로 서빙하는 모델: 배포 시 점수화 대상
+SCORED_MODELS = ("player_goal",)
+
+
+def model_version(model_path, metadata=None):
+    """
+    "v{번들 버전}-{파일 해시 8자리}" (같은 v1이라도 다시 학습하면 해시로 구분)
+    """
+    h = hashlib.sha1()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"v{(metadata or {}).get('version', 0)}-{h.hexdigest()[:8]}"
+
+
+class RegisteredModel:
+    """
+    레지스트리에서 로드한 모델 한 버전 (이 객체를 참조하는 동안만 메모리에 유지)
+    - obj: 로드된 번들/평탄화 모델, info: manifest 항목
+    """
+
+    def __init__(self, name, version, info, obj):
+        self.name = name
+        self.version = version
+        self.info = info
+        self.obj = obj
+        self._predictor = None
+
+    @property
+    def features(self):
+        return self.info.get("features")
+
+    def predictor(self):
+        """
+        이 버전으로 예측하는 PlayerGoalPredictor (선수 득점 모델 전용)
+        """
+        if self._predictor is None:
+            # 순환 import 방지 (prediction_model → prediction_scoring → model_registry)
+            from prediction_model import PlayerGoalPredictor
+            self._predictor = PlayerGoalPredictor.from_object(self.obj, version=f"{self.name}:{self.version}")
+        return self._predictor
+
+    def __repr__(self):
+        return f"RegisteredModel({self.name!r}, {self.version!r})"
+
+
+class ModelRegistry:
+    """
+    manifest 구조:
+    {"models": {이름: {"default": 버전, "routing": {버전: 가중치}, "versions": {버전: 항목}}}}
+    항목: path(레지스트리 기준 상대 경로), serving_path(있으면 예측에 사용하는 평탄화 모델),
+          features, metrics, trained_at, registered_at, info
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, mmap_mode="r"):
+        self.manifest_path = Path(manifest_path)
+        self.root = self.manifest_path.parent
+        self.mmap_mode = mmap_mode
+        self.manifest = {"models": {}}
+        self._mtime = None
+        self._lock = threading.Lock()
+        # (이름, 버전) → RegisteredModel. 참조가 없어지면 자동으로 빠짐
+        self._live = weakref.WeakValueDictionary()
+        self.loads = 0
+        # 이름 → 라우팅된 버전의 결과가 없어 다른 버전으로 응답한 횟수
+        self.fallbacks = {}
+
+    # --------------------------------------------------
+    # manifest 읽기/쓰기
+    # --------------------------------------------------
+    def _refresh(self):
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.manifest, self._mtime = {"models": {}}, None
+            return
+        if mtime != self._mtime:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            self._mtime = mtime
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._mtime = self.manifest_path.stat().st_mtime_ns
+
+    def _model(self, name):
+        self._refresh()
+        model = self.manifest["models"].get(name)
+        if model is None:
+            raise KeyError(f"등록되지 않은 모델입니다: {name} (등록된 모델: {sorted(self.manifest['models'])})")
+        return model
+
+    # --------------------------------------------------
+    # 등록
+    # --------------------------------------------------
+    def register(self, name, model_path, features=None, metrics=None, trained_at=None,
+                 serving_path=None, metadata=None, promote=True, **info):
+        """
+        학습된 모델 파일을 새 버전으로 등록합니다. (파일은 레지스트리로 복사, 반환: 버전 ID)
+        promote=True면 기본 버전으로 지정하고 라우팅을 새 버전 100%로 초기화
+        """
+        model_path = Path(model_path)
+        with self._lock:
+            self._refresh()
+            model = self.manifest["models"].setdefault(name, {"default": None, "routing": {}, "versions": {}})
+            metadata = dict(metadata or {})
+            metadata.setdefault("version", len(model["versions"]) + 1)
+            version = model_version(model_path, metadata)
+
+            target_dir = self.root / name
+            target_dir.mkdir(parents=True, exist_ok=True)
+            entry = {
+                "path": self._copy(model_path, target_dir / f"{version}{model_path.suffix}"),
+                "serving_path": None,
+                "features": list(features) if features is not None else None,
+                "metrics": metrics or {},
+                "trained_at": trained_at,
+                "registered_at": datetime.now().isoformat(timespec="seconds"),
+                "info": info,
+            }
+            if serving_path is not None and Path(serving_path).exists():
+                serving_path = Path(serving_path)
+                entry["serving_path"] = self._copy(serving_path, target_dir / f"{version}.serving{serving_path.suffix}")
+
+            model["versions"][version] = entry
+            if promote or model["default"] is None:
+                model["default"] = version
+                model["routing"] = {version: 1.0}
+            self._prune(name, model)
+            self._save()
+        print(f"✅ 레지스트리 등록: {name} {version}" + (" (기본 버전)" if model["default"] == version else ""))
+        return version
+
+    def _copy(self, src, dst):
+        tmp_path = dst.with_name(dst.name + ".tmp")
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+        return str(dst.relative_to(self.root))
+
+    def _prune(self, name, model):
+        keep = {model["default"], *model["routing"]}
+        old = [v for v in sorted(model["versions"], key=lambda v: model["versions"][v]["registered_at"])
+               if v not in keep]
+        for version in old[:max(len(model["versions"]) - MAX_REGISTRY_VERSIONS, 0)]:
+            entry = model["versions"].pop(version)
+            for key in ("path", "serving_path"):
+                if entry.get(key):
+                    (self.root / entry[key]).unlink(missing_ok=True)
+
+    # --------------------------------------------------
+    # 배포: 기본 버전 / 라우팅 가중치
+    # --------------------------------------------------
+    def promote(self, name, version):
+        """
+        version을 기본 버전으로 지정하고 트래픽 100%를 보냄 (롤백도 같은 방법)
+        """
+        self.set_routing(name, {version: 1.0}, default=version)
+
+    def set_routing(self, name, weights, default=None):
+        """
+        weights: {버전: 가중치} (합으로 정규화). 예) {"v3-...": 0.9, "v4-...": 0.1}
+        """
+        with self._lock:
+            model = self._model(name)
+            unknown = [v for v in weights if v not in model["versions"]]
+            if unknown:
+                raise KeyError(f"{name}에 없는 버전입니다: {unknown}")
+            total = float(sum(weights.values()))
+            if total <= 0:
+                raise ValueError("라우팅 가중치의 합은 0보다 커야 합니다.")
+            model["routing"] = {v: float(w) / total for v, w in weights.items() if w > 0}
+            if default is not None:
+                if default not in model["versions"]:
+                    raise KeyError(f"{name}에 없는 버전입니다: {default}")
+                model["default"] = default
+            self._save()
+            deployed = [(v, model["versions"][v]) for v in model["routing"]]
+        self._score(name, deployed)
+
+    def _score(self, name, deployed):
+        """
+        트래픽을 받게 된 버전 중 예측 테이블에 아직 없는 버전을 점수화 (SCORED_MODELS만)
+        """
+        if name not in SCORED_MODELS:
+            return
+        # 순환 import 방지 (prediction_scoring → model_registry)
+        from prediction_scoring import PredictionTable, score_players
+        scored = set(PredictionTable().versions())
+        for version, entry in deployed:
+            if version in scored:
+                continue
+            try:
+                score_players(self.root / entry["path"])
+            except Exception as e:
+                print(f"경고: {name} {version} 예측 테이블 갱신 실패: {e}")
+
+    def route(self, name, key=None):
+        """
+        요청을 보낼 버전 ID. key(선수 이름 / 사용자 ID 등)가 있으면 같은 key는 항상 같은 버전
+        """
+        model = self._model(name)
+        routing = model.get("routing") or {model["default"]: 1.0}
+        if len(routing) == 1:
+            return next(iter(routing))
+        if key is None:
+            u = random.random()
+        else:
+            u = int(hashlib.sha1(f"{name}:{key}".encode("utf-8")).hexdigest()[:8], 16) / 0x100000000
+        acc = 0.0
+        for version, weight in sorted(routing.items()):
+            acc += weight
+            if u < acc:
+                return version
+        return version
+
+    def record_fallback(self, name):
+        """
+        라우팅된 버전으로 응답하지 못하고 다른 버전으로 대체했을 때 호출 (stats()의 fallbacks)
+        """
+        with self._lock:
+            self.fallbacks[name] = self.fallbacks.get(name, 0) + 1
+
+    # --------------------------------------------------
+    # 조회 (지연 로드)
+    # --------------------------------------------------
+    def versions(self, name):
+        model = self._model(name)
+        return [
+            {"version": v, "default": v == model["default"], "traffic": model["routing"].get(v, 0.0),
+             "loaded": (name, v) in self._live, **e}
+            for v, e in sorted(model["versions"].items(), key=lambda kv: kv[1]["registered_at"])
+        ]
+
+    def get(self, name, version=None, serving=True):
+        """
+        RegisteredModel 반환 (version=None이면 기본 버전). 이미 누가 들고 있으면 같은 객체
+        serving=True면 평탄화 모델(serving_path)이 있을 때 그것을 로드
+        """
+        model = self._model(name)
+        version = version or model["default"]
+        entry = model["versions"].get(version)
+        if entry is None:
+            raise KeyError(f"{name}에 없는 버전입니다: {version}")
+
+        key = (name, version) if serving else (name, version, "full")
+        handle = self._live.get(key)
+        if handle is not None:
+            return handle
+        with self._lock:
+            handle = self._live.get(key)
+            if handle is None:
+                if joblib is None:
+                    raise ImportError("모델을 읽으려면 joblib가 필요합니다. (pip install joblib)")
+                rel = (entry.get("serving_path") if serving else None) or entry["path"]
+                obj = joblib.load(self.root / rel, mmap_mode=self.mmap_mode)
+                handle = RegisteredModel(name, version, entry, obj)
+                self._live[key] = handle
+                self.loads += 1
+        return handle
+
+    def stats(self):
+        self._refresh()
+        return {
+            "models": {
+                name: {"default": m["default"], "routing": m["routing"], "versions": len(m["versions"])}
+                for name, m in self.manifest["models"].items()
+            },
+            "loaded": sorted(f"{k[0]}:{k[1]}" for k in self._live.keys()),
+            "loads": self.loads,
+            "fallbacks": dict(self.fallbacks),
+        }
+
+
+# 프로세스 기본 레지스트리 (trained_models/registry/manifest.json)
+REGISTRY = ModelRegistry()
+
+
+def register_model(name, model_path, **kwargs):
+    return REGISTRY.register(name, model_path, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모델 레지스트리 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="등록된 모델/버전 목록")
+    p_list.add_argument("name", nargs="?")
+    p_promote = sub.add_parser("promote", help="기본 버전 지정 (트래픽 100%%)")
+    p_promote.add_argument("name")
+    p_promote.add_argument("version")
+    p_route = sub.add_parser("route", help="버전별 트래픽 가중치 지정 (예: v3-ab12cd34=0.9 v4-ef56aa78=0.1)")
+    p_route.add_argument("name")
+    p_route.add_argument("weights", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "promote":
+        REGISTRY.promote(args.name, args.version)
+    elif args.command == "route":
+        REGISTRY.set_routing(args.name, {v: float(w) for v, w in (x.split("=", 1) for x in args.weights)})
+
+    REGISTRY._refresh()
+    for name in ([args.name] if getattr(args, "name", None) else sorted(REGISTRY.manifest["models"])):
+        print(f"[{name}]")
+        for v in REGISTRY.versions(name):
+            mark = "*" if v["default"] else " "
+            print(f" {mark} {v['version']}  트래픽 {v['traffic']:.0%}  학습 {v['trained_at']}  지표 {v['metrics']}")
@@ -1,20 +1,58 @@
 # files/model_trainer.py
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+
 import pandas as pd
 import numpy as np
 import joblib
 
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, KFold, ParameterSampler
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor, HistGradientBoostingClassifier
+from sklearn.metrics import mean_absolute_error, r2_score, accuracy_score, log_loss
+
+from prediction_model import FlatForest, FLAT_FORMAT
+from season_analyzer import SeasonAnalyzer, compute_data_version
+from team_features import build_match_features, FORM_WINDOW, TEAM_FEATURES
+from prediction_scoring import score_players
+from model_registry import register_model, REGISTRY
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_PATH = BASE_DIR / "processed_data" / "player_data.csv"
 MODEL_DIR = BASE_DIR / "trained_models"
 MODEL_PATH = MODEL_DIR / "player_goal_model.pkl"
+LEADERBOARD_PATH = MODEL_DIR / "search_leaderboard.csv"
+FLAT_MODEL_PATH = MODEL_DIR / "player_goal_model.flat.joblib"
+
+MULTI_MODEL_PATH = MODEL_DIR / "player_multi_model.pkl"
+TEAM_DATA_PATH = BASE_DIR / "processed_data" / "team_data.csv"
+TEAM_MODEL_PATH = MODEL_DIR / "team_outcome_model.pkl"
+FEATURE_CACHE_DIR = BASE_DIR / "processed_data" / "feature_cache"
+
+# 다중 타깃 학습: 타깃 이름 → (계산 방법, 학습에서 제외할 피처)
+#  - Assists 예측 시 입력의 Assists는 정답 누수이므로 제외
+MULTI_TARGETS = {
+    "Goals": (lambda df: df["Goals"], []),
+    "Assists": (lambda df: df["Assists"], ["Assists"]),
+    "xG_Overperformance": (lambda df: df["Goals"] - df["Expected Goals (xG)"], []),
+}
+
+# 증분 학습: 한 번에 추가할 트리 수 / 최대 트리 수(넘으면 오래된 트리부터 제거)
+ADD_TREES = 30
+MAX_TREES = 600
+# 증분 학습 트리를 맞출 최근 행 최소 개수 (새 행이 적으면 워터마크 이전 최근 경기까지 포함)
+MIN_GROW_ROWS = 500
+# 드리프트 기준: 새 행의 피처 평균 이동(학습 표준편차 단위), 새 행 MAE / 학습 당시 테스트 MAE
+FEATURE_SHIFT_THRESHOLD = 0.5
+MAE_RATIO_THRESHOLD = 1.5
 
 # ✅ 예측에 사용할 피처(입력 폼과 맞춰야 함)
 FEATURES = [
@@ -29,15 +67,47 @@ FEATURES = [
 ]
 TARGET = "Goals"
 
+# 하이퍼파라미터 탐색 공간 (모델 이름 → {파라미터: 후보 리스트})
+SEARCH_SPACE = {
+    "rf": {
+        "n_estimators": [100, 200, 300, 500],
+        "max_depth": [None, 6, 10, 16],
+        "min_samples_leaf": [1, 2, 5, 10],
+        "max_features": [1.0, 0.7, 0.5, "sqrt"],
+    },
+    "hgb": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_iter": [100, 200, 400],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [5, 10, 20, 40],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+}
 
-def main():
-    print("=== Model Trainer 시작 ===")
-    print("데이터 경로:", DATA_PATH)
 
-    if not DATA_PATH.exists():
-        raise FileNotFoundError(f"player_data.csv가 없습니다: {DATA_PATH}")
+def load_training_data(data_path=DATA_PATH, with_dates=False, until=None):
+    """
+    player_data.csv를 읽어 학습용 X(피처), y(타깃)를 반환합니다.
+    - with_dates=True : 경기 날짜(워터마크 계산용)도 함께 반환
+    - until="YYYY-MM-DD": 해당 날짜까지의 경기만 사용 (증분 학습 점검/백테스트용)
+    """
+    df, dates = load_training_frame(data_path, until=until)
+
+    if with_dates:
+        return df[FEATURES], df[TARGET], dates
+    return df[FEATURES], df[TARGET]
+
+
+def load_training_frame(data_path=DATA_PATH, until=None):
+    """
+    player_data.csv를 읽어 피처/타깃 컬럼을 숫자로 변환한 DataFrame과 경기 날짜를 반환합니다.
+    """
+    print("데이터 경로:", data_path)
+
+    if not Path(data_path).exists():
+        raise FileNotFoundError(f"player_data.csv가 없습니다: {data_path}")
 
-    df = pd.read_csv(DATA_PATH)
+    df = pd.read_csv(data_path)
 
     # 필요한 컬럼 체크
     missing = [c for c in FEATURES + [TARGET] if c not in df.columns]
@@ -53,29 +123,529 @@ def main():
 
     # NaN 너무 많은 행 제거(최소 안전장치)
     df = df.dropna(subset=[TARGET])
+
+    dates = pd.to_datetime(df["Date"], errors="coerce") if "Date" in df.columns else pd.Series(pd.NaT, index=df.index)
+    if until is not None:
+        keep = dates <= pd.Timestamp(until)
+        df, dates = df[keep], dates[keep]
+
     if len(df) < 200:
         print("경고: 학습 데이터가 너무 적을 수 있어요. (행 수:", len(df), ")")
 
-    X = df[FEATURES]
-    y = df[TARGET]
+    return df, dates
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
 
-    # 파이프라인: 결측치 채우기 → 스케일링 → 랜덤포레스트 회귀
-    model = Pipeline(
+# ==================================================
+# 집계 단위 학습 데이터 (시즌 합계 / 최근 N경기 합계, 선택적으로 90분당)
+#  - 피처 행렬은 데이터 버전 + 설정 키로 .npy에 캐시하고 mmap으로 재사용
+# ==================================================
+def to_per90(X, minutes):
+    """
+    Minutes를 제외한 누적 피처를 90분당 값으로 바꿉니다. (Minutes <= 0인 행은 0)
+    """
+    X = np.array(X, dtype=np.float64, ndmin=2)
+    minutes = np.asarray(minutes, dtype=np.float64)
+    factor = np.divide(90.0, minutes, out=np.zeros_like(minutes), where=minutes > 0)
+    rate_cols = [i for i, c in enumerate(FEATURES) if c != "Minutes"]
+    X[:, rate_cols] *= factor[:, None]
+    return X
+
+
+def load_aggregate_matrix(aggregate="season", window=5, per90=False):
+    """
+    analyzer 집계로 (X, y, 정보)를 만듭니다. 같은 데이터 버전/설정이면 캐시된 .npy를 mmap으로 읽어
+    pandas 집계를 건너뜁니다.
+    """
+    data_version = compute_data_version([DATA_PATH])
+    spec = {
+        "data_version": data_version,
+        "aggregate": aggregate,
+        "window": int(window) if aggregate == "rolling" else None,
+        "basis": "per90" if per90 else "total",
+        "features": FEATURES,
+        "target": TARGET,
+    }
+    key = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+    x_path = FEATURE_CACHE_DIR / f"{key}.X.npy"
+    y_path = FEATURE_CACHE_DIR / f"{key}.y.npy"
+    info_path = FEATURE_CACHE_DIR / f"{key}.json"
+
+    if x_path.exists() and y_path.exists() and info_path.exists():
+        X = np.load(x_path, mmap_mode="r")
+        y = np.load(y_path, mmap_mode="r")
+        info = json.loads(info_path.read_text(encoding="utf-8"))
+        print(f"[피처 캐시] 사용: {x_path.name} {X.shape}")
+        return X, y, info
+
+    t0 = time.perf_counter()
+    analyzer = SeasonAnalyzer(player_data_path=DATA_PATH)
+    agg = analyzer.get_player_aggregates(FEATURES + [TARGET], mode=aggregate, window=window)
+    if isinstance(agg, dict):
+        raise ValueError(agg["error"])
+
+    if per90:
+        agg = agg[agg["Minutes"] > 0]
+        X = to_per90(agg[FEATURES], agg["Minutes"])
+        y = agg[TARGET].to_numpy(np.float64) * 90.0 / agg["Minutes"].to_numpy(np.float64)
+    else:
+        X = agg[FEATURES].to_numpy(np.float64)
+        y = agg[TARGET].to_numpy(np.float64)
+
+    info = {**spec, "rows": int(len(X)), "watermark": str(pd.to_datetime(agg["Date"]).max().date())}
+
+    FEATURE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    np.save(x_path, np.ascontiguousarray(X, dtype=np.float32))
+    np.save(y_path, np.ascontiguousarray(y, dtype=np.float64))
+    info_path.write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[피처 캐시] 생성: {x_path.name} {X.shape} ({time.perf_counter() - t0:.2f}s)")
+
+    return np.load(x_path, mmap_mode="r"), np.load(y_path, mmap_mode="r"), info
+
+
+def make_pipeline(model_name="rf", params=None, n_jobs=-1):
+    """
+    결측치 채우기 → 스케일링 → 회귀 모델 파이프라인을 만듭니다.
+    """
+    params = dict(params or {})
+    if model_name == "rf":
+        params.setdefault("n_estimators", 300)
+        estimator = RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    elif model_name == "hgb":
+        estimator = HistGradientBoostingRegressor(random_state=42, **params)
+    else:
+        raise ValueError(f"지원하지 않는 모델입니다: {model_name} (가능: {list(SEARCH_SPACE)})")
+
+    return Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="median")),
             ("scaler", StandardScaler()),
-            ("rf", RandomForestRegressor(
-                n_estimators=300,
-                random_state=42,
-                n_jobs=-1
-            )),
+            (model_name, estimator),
         ]
     )
 
+
+# ==================================================
+# 하이퍼파라미터 탐색 (successive halving + 프로세스 풀 K-fold CV)
+# ==================================================
+# 워커 프로세스마다 한 번만 받아두는 학습 데이터 (작업마다 피클링하지 않도록)
+_WORKER_DATA = {}
+
+
+def _init_worker(X, y):
+    _WORKER_DATA["X"] = X
+    _WORKER_DATA["y"] = y
+
+
+def _eval_fold(model_name, params, train_idx, valid_idx):
+    """
+    (워커) 후보 1개 × fold 1개 학습/평가 → (MAE, R2, 학습 시간, 예측 시간)
+    """
+    X, y = _WORKER_DATA["X"], _WORKER_DATA["y"]
+    model = make_pipeline(model_name, params, n_jobs=1)
+
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    t1 = time.perf_counter()
+    preds = model.predict(X[valid_idx])
+    t2 = time.perf_counter()
+
+    return (
+        mean_absolute_error(y[valid_idx], preds),
+        r2_score(y[valid_idx], preds),
+        t1 - t0,
+        (t2 - t1) / len(valid_idx) * 1e6,
+    )
+
+
+def sample_candidates(n_candidates, random_state=42):
+    """
+    모델별 탐색 공간에서 후보 (모델 이름, 파라미터)를 고르게 샘플링합니다.
+    """
+    per_model = max(1, n_candidates // len(SEARCH_SPACE))
+    candidates = []
+    for model_name, space in SEARCH_SPACE.items():
+        for params in ParameterSampler(space, n_iter=per_model, random_state=random_state):
+            candidates.append((model_name, params))
+    return candidates
+
+
+def search(X, y, n_candidates=24, cv=5, eta=3, budget_s=300, min_delta=1e-3,
+           n_workers=None, random_state=42):
+    """
+    successive halving: 적은 표본으로 모든 후보를 평가하고, 상위 1/eta만 남겨 표본을 eta배로 늘려 반복합니다.
+    - 각 라운드의 (후보 × fold) 학습은 프로세스 풀에서 병렬 실행
+    - 남은 예산이 fold 평균 학습 시간보다 작아지면 새 학습을 시작하지 않고 그때까지의 결과로 종료
+      (실행 중인 학습은 중단할 수 없으므로 초과 시간은 워커당 학습 1회의 편차 정도로 제한됨)
+    - 남은 상위 후보들의 CV MAE 차이가 min_delta 미만이면 더 큰 표본으로 구분할 필요가 없으므로 조기 종료
+    반환: 리더보드 DataFrame (cv_mae 오름차순)
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    rng = np.random.RandomState(random_state)
+    deadline = time.perf_counter() + budget_s
+
+    candidates = sample_candidates(n_candidates, random_state)
+    n_rounds = max(1, int(np.ceil(np.log(len(candidates)) / np.log(eta))))
+    n_workers = n_workers or os.cpu_count() or 1
+
+    print(f"[탐색] 후보 {len(candidates)}개, 라운드 {n_rounds + 1}개, {cv}-fold, 워커 {n_workers}개, 예산 {budget_s}s")
+
+    results = []
+    # fold 1개 학습 시간 추정 (직전 라운드 평균을 표본 수 비율로 늘려 씀, 첫 라운드는 0)
+    est_fit_s, prev_samples = 0.0, 1
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        for r in range(n_rounds + 1):
+            n_samples = min(len(X), int(len(X) / eta ** (n_rounds - r)))
+            n_samples = max(n_samples, cv * 20)
+            rows = np.sort(rng.choice(len(X), size=n_samples, replace=False)) if n_samples < len(X) else np.arange(len(X))
+            folds = [(rows[tr], rows[va]) for tr, va in KFold(cv, shuffle=True, random_state=random_state).split(rows)]
+
+            # 워커 수만큼만 제출: 남은 예산이 fold 평균 학습 시간보다 작으면 새 학습을 시작하지 않음
+            # (이미 실행 중인 학습은 취소할 수 없어 풀 종료 시 끝까지 기다리므로)
+            tasks = [(i, tr, va) for i in range(len(candidates)) for tr, va in folds]
+            tasks.reverse()
+            scores = {i: [] for i in range(len(candidates))}
+            round_fit_times = []
+            in_flight = {}
+            timed_out = False
+            while tasks or in_flight:
+                fit_estimate = np.mean(round_fit_times) if round_fit_times else est_fit_s * n_samples / prev_samples
+                while tasks and len(in_flight) < n_workers:
+                    if deadline - time.perf_counter() < fit_estimate:
+                        tasks.clear()
+                        timed_out = True
+                        break
+                    i, tr, va = tasks.pop()
+                    name, params = candidates[i]
+                    in_flight[pool.submit(_eval_fold, name, params, tr, va)] = i
+                if not in_flight:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                for f in done:
+                    result = f.result()
+                    scores[in_flight.pop(f)].append(result)
+                    round_fit_times.append(result[2])
+            if round_fit_times:
+                est_fit_s, prev_samples = float(np.mean(round_fit_times)), n_samples
+
+            # 모든 fold가 끝난 후보만 이번 라운드 결과로 기록
+            round_rows = []
+            for i, fold_scores in scores.items():
+                if len(fold_scores) < cv:
+                    continue
+                s = np.array(fold_scores)
+                name, params = candidates[i]
+                round_rows.append({
+                    "model": name,
+                    "params": json.dumps(params, sort_keys=True),
+                    "round": r,
+                    "n_samples": n_samples,
+                    "cv_mae": s[:, 0].mean(),
+                    "cv_mae_std": s[:, 0].std(),
+                    "cv_r2": s[:, 1].mean(),
+                    "fit_time_s": s[:, 2].mean(),
+                    "predict_us_per_row": s[:, 3].mean(),
+                })
+            results.extend(round_rows)
+
+            if not round_rows:
+                print(f"[탐색] 라운드 {r}: 예산 안에 끝난 후보가 없습니다.")
+                break
+
+            round_df = pd.DataFrame(round_rows).sort_values("cv_mae")
+            round_best = round_df["cv_mae"].iloc[0]
+            print(f"[탐색] 라운드 {r}: 표본 {n_samples}, 후보 {len(round_rows)}개, 최고 MAE={round_best:.4f}")
+
+            if timed_out:
+                print("[탐색] 시간 예산 초과 → 탐색 종료")
+                break
+
+            keep = max(1, len(round_rows) // eta)
+            top = round_df.head(keep)
+            if keep == 1:
+                break
+            if top["cv_mae"].iloc[-1] - round_best < min_delta:
+                print(f"[탐색] 상위 {keep}개 후보 차이 < {min_delta} → 조기 종료")
+                break
+            candidates = [(m, json.loads(p)) for m, p in zip(top["model"], top["params"])]
+
+    board = pd.DataFrame(results)
+    if board.empty:
+        return board
+
+    # 후보별로 가장 많은 표본에서 평가된 결과만 남겨 순위 매김
+    board = (
+        board.sort_values(["n_samples", "cv_mae"], ascending=[False, True])
+             .drop_duplicates(["model", "params"])
+             .reset_index(drop=True)
+    )
+    board.insert(0, "rank", np.arange(1, len(board) + 1))
+    return board
+
+
+# ==================================================
+# 모델 파일 저장
+#  - 압축 없이 저장: 예측기가 joblib mmap_mode="r"로 배열을 메모리 매핑 (워커 간 물리 메모리 공유)
+#  - 임시 파일에 쓴 뒤 교체: 매핑 중인 기존 파일을 덮어쓰지 않음 (읽던 프로세스는 옛 파일을 계속 사용)
+# ==================================================
+def dump_model(obj, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# ==================================================
+# 추론용 평탄화(flat) 모델 내보내기
+#  - imputer 중앙값, scaler 평균/표준편차, 트리 노드를 NumPy 배열로 변환
+#  - prediction_model.FlatForest가 sklearn 없이 벡터화 평가
+# ==================================================
+def flatten_model(model, features=FEATURES, target=TARGET):
+    """
+    Pipeline(imputer → scaler → RF/HGB) 또는 단독 RF/HGB를 평탄화 배열 dict로 변환합니다.
+    노드는 깊이 우선 순서라 왼쪽 자식 = 노드 번호 + 1 이므로 오른쪽 자식만 저장합니다.
+    """
+    if isinstance(model, Pipeline):
+        steps = dict(model.steps[:-1])
+        estimator = model.steps[-1][1]
+    else:
+        steps, estimator = {}, model
+    imputer, scaler = steps.get("imputer"), steps.get("scaler")
+
+    trees = []  # (feature, threshold, right, value), 잎 노드의 feature = -1
+    if isinstance(estimator, RandomForestRegressor):
+        for t in estimator.estimators_:
+            tr = t.tree_
+            internal = tr.children_left != -1
+            trees.append((np.where(internal, tr.feature, -1), tr.threshold, tr.children_right, tr.value[:, 0, 0]))
+        aggregate, base, x_dtype = "mean", 0.0, "float32"  # sklearn 트리는 float32 입력으로 비교
+        left_ok = all(np.array_equal(t.tree_.children_left[f >= 0], np.flatnonzero(f >= 0) + 1)
+                      for t, (f, *_) in zip(estimator.estimators_, trees))
+    elif isinstance(estimator, HistGradientBoostingRegressor):
+        for (pred,) in estimator._predictors:
+            n = pred.nodes
+            internal = n["is_leaf"] == 0
+            trees.append((np.where(internal, n["feature_idx"], -1), n["num_threshold"], n["right"], n["value"]))
+        aggregate, base, x_dtype = "sum", float(np.ravel(estimator._baseline_prediction)[0]), "float64"
+        left_ok = all(np.array_equal(pred.nodes["left"][f >= 0], np.flatnonzero(f >= 0) + 1)
+                      for (pred,), (f, *_) in zip(estimator._predictors, trees))
+    else:
+        raise ValueError(f"평탄화를 지원하지 않는 모델입니다: {type(estimator).__name__}")
+    if not left_ok:
+        raise ValueError("트리 노드가 깊이 우선 순서가 아닙니다.")
+
+    sizes = np.array([len(f) for f, *_ in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    feature = np.concatenate([f for f, *_ in trees])
+    right = np.concatenate([np.where(f >= 0, r + off, -1) for (f, _, r, _), off in zip(trees, roots)])
+
+    # 가장 깊은 잎까지의 이동 횟수 (평가 루프 상한)
+    depth = np.zeros(len(feature), dtype=np.int32)
+    for i in np.flatnonzero(feature >= 0):
+        depth[i + 1] = depth[i] + 1
+        depth[right[i]] = depth[i] + 1
+
+    return {
+        "format": FLAT_FORMAT,
+        "features": list(features),
+        "target": target,
+        "impute": None if imputer is None else imputer.statistics_.astype(np.float64),
+        "mean": None if scaler is None else scaler.mean_.astype(np.float64),
+        "scale": None if scaler is None else scaler.scale_.astype(np.float64),
+        "feature": feature.astype(np.int16),
+        "threshold": np.concatenate([t for _, t, _, _ in trees]).astype(np.float64),
+        "right": right.astype(np.int32),
+        "value": np.concatenate([v for *_, v in trees]).astype(np.float64),
+        "roots": roots.astype(np.int32),
+        "max_depth": int(depth.max()),
+        "aggregate": aggregate,
+        "base": base,
+        "x_dtype": x_dtype,
+    }
+
+
+def check_flat_model(model, flat, X, atol=1e-9):
+    """
+    평탄화 모델과 sklearn 모델의 예측이 같은지 확인합니다. (다르면 ValueError)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict(pd.DataFrame(X, columns=flat["features"]) if hasattr(model, "feature_names_in_") else X)
+    got = FlatForest(flat).predict(X)
+    diff = float(np.max(np.abs(expected - got))) if len(X) else 0.0
+    if diff > atol:
+        raise ValueError(f"평탄화 모델 예측이 sklearn과 다릅니다. (최대 오차 {diff:.3g})")
+    return diff
+
+
+def holdout_matrix(metadata=None):
+    """
+    번들 학습 때와 같은 분할(test_size=0.2, random_state=42)의 테스트 행 + 컬럼마다 다른 행에 NaN 주입
+    (metadata의 aggregate/window/basis로 학습 행 단위를 맞춤)
+    """
+    metadata = metadata or {}
+    aggregate = metadata.get("aggregate", "match")
+    if aggregate == "match":
+        X, _ = load_training_data()
+    else:
+        X, _, _ = load_aggregate_matrix(aggregate, metadata.get("window") or 5, per90=metadata.get("basis") == "per90")
+        X = pd.DataFrame(np.asarray(X, dtype=np.float64), columns=FEATURES)
+    _, X_test = train_test_split(X, test_size=0.2, random_state=42)
+
+    X = X_test.to_numpy(np.float64).copy()
+    for j in range(X.shape[1]):
+        X[j::X.shape[1] + 1, j] = np.nan
+    return X
+
+
+def verify_flat_models():
+    """
+    저장된 번들(pkl)과 평탄화 모델(.flat.joblib)을 다시 학습하지 않고 비교합니다. (모두 일치하면 True)
+    - 기본 경로 + 레지스트리에 등록된 버전들
+    - 저장된 모델에 없는 종류(RF/HGB)는 작은 모델을 즉석에서 학습해 평탄화 경로를 확인 (파일은 쓰지 않음)
+    """
+    pairs = [(MODEL_PATH, FLAT_MODEL_PATH)]
+    try:
+        pairs += [
+            (REGISTRY.root / v["path"], REGISTRY.root / v["serving_path"])
+            for v in REGISTRY.versions("player_goal") if v.get("serving_path")
+        ]
+    except KeyError:
+        pass
+
+    ok, kinds = True, set()
+    for bundle_path, flat_path in pairs:
+        if not (Path(bundle_path).exists() and Path(flat_path).exists()):
+            continue
+        bundle, flat = joblib.load(bundle_path), joblib.load(flat_path)
+        model = bundle["model"]
+        kind = type(model.steps[-1][1] if isinstance(model, Pipeline) else model).__name__
+        kinds.add(kind)
+        X = holdout_matrix(bundle.get("metadata"))
+        try:
+            diff = check_flat_model(model, flat, X)
+            print(f"✅ {Path(bundle_path).name} ↔ {Path(flat_path).name} ({kind}): 테스트 {len(X)}행 최대 오차 {diff:.1e}")
+        except ValueError as e:
+            ok = False
+            print(f"❌ {Path(bundle_path).name} ↔ {Path(flat_path).name} ({kind}): {e}")
+
+    reference = {
+        "RandomForestRegressor": ("rf", {"n_estimators": 50}),
+        "HistGradientBoostingRegressor": ("hgb", {"max_iter": 50}),
+    }
+    missing = [k for k in reference if k not in kinds]
+    if missing:
+        X, y = load_training_data()
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_check = holdout_matrix()
+        for kind in missing:
+            name, params = reference[kind]
+            model = make_pipeline(name, params, n_jobs=1).fit(X_train, y_train)
+            try:
+                diff = check_flat_model(model, flatten_model(model), X_check)
+                print(f"✅ 즉석 {kind} (저장된 모델 없음): 테스트 {len(X_check)}행 최대 오차 {diff:.1e}")
+            except ValueError as e:
+                ok = False
+                print(f"❌ 즉석 {kind}: {e}")
+    return ok
+
+
+def export_flat_model(model, X_check, path=FLAT_MODEL_PATH, basis="total"):
+    flat = flatten_model(model)
+    flat["basis"] = basis  # "per90"이면 예측기가 입력/출력을 90분당 ↔ 합계로 변환
+    diff = check_flat_model(model, flat, X_check)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    dump_model(flat, path)
+    print(f"✅ 평탄화 모델 저장 완료: {path} (노드 {len(flat['feature'])}개, "
+          f"{Path(path).stat().st_size / 1024:.0f} KiB, sklearn 대비 최대 오차 {diff:.1e})")
+    return flat
+
+
+# ==================================================
+# 모델 번들 저장 + 메타데이터(버전/워터마크/계보)
+# ==================================================
+def build_metadata(model, X, y, dates, test_mae, mode="full", parent=None, **extra):
+    """
+    번들에 함께 저장할 메타데이터를 만듭니다.
+    - watermark: 학습에 반영된 마지막 경기 날짜 (이후 날짜의 행 = 새 데이터)
+    - feature_mean/std, test_mae: 증분 학습 시 드리프트 비교 기준
+    - lineage: 최초 전체 학습부터 이어지는 학습 이력
+    """
+    estimator = model.steps[-1][1]
+    entry = {
+        "version": (parent["version"] + 1) if parent else 1,
+        "mode": mode,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data_rows": int(len(X)),
+        "watermark": str(dates.max().date()) if dates.notna().any() else None,
+        "n_trees": len(getattr(estimator, "estimators_", getattr(estimator, "_predictors", []))),
+        **extra,
+    }
+    lineage = (parent.get("lineage", []) if parent else []) + [entry]
+    return {
+        **entry,
+        "test_mae": float(test_mae),
+        "feature_mean": X.mean().tolist(),
+        "feature_std": X.std().tolist(),
+        "lineage": lineage,
+    }
+
+
+def save_bundle(model, X_check, params, metadata):
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    dump_model(
+        {
+            "model": model,
+            "features": FEATURES,
+            "target": TARGET,
+            "params": params,
+            "metadata": metadata,
+        },
+        MODEL_PATH,
+    )
+
+    print(f"✅ 모델 저장 완료: {MODEL_PATH} (v{metadata['version']}, {metadata['mode']}, 워터마크 {metadata['watermark']})")
+
+    # 추론용 평탄화 모델 (결측치 포함 행으로도 동등성 확인)
+    X_check = np.asarray(X_check, dtype=np.float64).copy()
+    X_check[::7, 0] = np.nan
+    export_flat_model(model, X_check, basis=metadata.get("basis", "total"))
+
+    # 버전별 보관 + 기본 버전 교체 (서비스 재시작 없이 반영)
+    try:
+        register_model(
+            "player_goal", MODEL_PATH, serving_path=FLAT_MODEL_PATH, features=FEATURES,
+            metrics={"test_mae": metadata["test_mae"]}, trained_at=metadata["trained_at"], metadata=metadata,
+            mode=metadata["mode"], aggregate=metadata.get("aggregate", "match"), basis=metadata.get("basis", "total"),
+        )
+    except Exception as e:
+        print(f"경고: 모델 레지스트리 등록 실패: {e}")
+
+    # 새 모델로 리그 전체 예측 테이블 갱신 (API/Streamlit은 이 테이블만 조회)
+    try:
+        score_players(MODEL_PATH)
+    except Exception as e:
+        print(f"경고: 예측 테이블 갱신 실패: {e}")
+
+
+def train_full(X, y, dates, params=None, parent=None, mode="full", **extra):
+    """
+    전체 재학습: train/test 분할 → 학습 → 평가 → 번들/평탄화 모델 저장
+    params: {"model": "rf"|"hgb", ...하이퍼파라미터}
+    """
+    params = dict(params or {"model": "rf", "n_estimators": 300})
+    model_params = {k: v for k, v in params.items() if k != "model"}
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    model = make_pipeline(params.get("model", "rf"), model_params)
     model.fit(X_train, y_train)
 
     preds = model.predict(X_test)
@@ -84,19 +654,373 @@ def main():
 
     print(f"✅ 평가 결과: MAE={mae:.3f}, R2={r2:.3f}")
 
+    metadata = build_metadata(model, X, y, dates, mae, mode=mode, parent=parent, **extra)
+    save_bundle(model, X_test, params, metadata)
+    return model
+
+
+# ==================================================
+# 증분 학습 (새 경기일 데이터 → 트리 추가 / 드리프트 시 전체 재학습)
+# ==================================================
+def measure_drift(model, metadata, X_new, y_new):
+    """
+    새 행이 학습 당시 분포에서 얼마나 벗어났는지 측정합니다.
+    - max_feature_shift: 피처 평균 이동의 최댓값 (학습 표준편차 단위)
+    - mae_ratio: 현재 모델의 새 행 MAE / 학습 당시 테스트 MAE
+    """
+    mean = np.asarray(metadata["feature_mean"], dtype=np.float64)
+    std = np.asarray(metadata["feature_std"], dtype=np.float64)
+    std[~(std > 0)] = 1.0
+
+    shift = np.abs(np.nanmean(X_new.to_numpy(np.float64), axis=0) - mean) / std
+    forward_mae = mean_absolute_error(y_new, model.predict(X_new))
+    return {
+        "n_new_rows": int(len(X_new)),
+        "max_feature_shift": float(np.nanmax(shift)),
+        "shift_feature": FEATURES[int(np.nanargmax(shift))],
+        "forward_mae": float(forward_mae),
+        "mae_ratio": float(forward_mae / metadata["test_mae"]) if metadata["test_mae"] > 0 else 0.0,
+    }
+
+
+def recent_rows(dates, new, min_rows=MIN_GROW_ROWS):
+    """
+    증분 학습에 쓸 행 위치: 새 행 전부 + (부족하면) 날짜가 최근인 행으로 min_rows까지 채움
+    날짜 없는 행은 가장 오래된 것으로 취급
+    """
+    d = pd.to_datetime(dates).to_numpy("datetime64[ns]")
+    d = np.where(np.isnat(d), np.datetime64("1900-01-01", "ns"), d)
+    order = np.argsort(d, kind="mergesort")
+    n = max(int(np.sum(new)), min(min_rows, len(order)))
+    return np.sort(order[len(order) - n:])
+
+
+def grow_model(model, X, y, add_trees=ADD_TREES, max_trees=MAX_TREES):
+    """
+    기존 imputer/scaler는 그대로 두고(기존 트리와 같은 입력 공간 유지) 트리만 warm_start로 추가합니다.
+    X, y는 최근 행(recent_rows)만 넘김: 추가 트리는 최근 데이터만 보고 학습
+    RF는 max_trees를 넘으면 가장 오래된 트리(과거 데이터로 학습된 트리)부터 제거해 최근 데이터 비중을 유지합니다.
+    """
+    Xt = model[:-1].transform(X)
+    estimator = model.steps[-1][1]
+
+    if isinstance(estimator, RandomForestRegressor):
+        estimator.set_params(warm_start=True, n_estimators=len(estimator.estimators_) + add_trees)
+        estimator.fit(Xt, y)
+        if len(estimator.estimators_) > max_trees:
+            estimator.estimators_ = estimator.estimators_[-max_trees:]
+        estimator.set_params(warm_start=False, n_estimators=len(estimator.estimators_))
+    elif isinstance(estimator, HistGradientBoostingRegressor):
+        estimator.set_params(warm_start=True, max_iter=estimator.n_iter_ + add_trees)
+        estimator.fit(Xt, y)
+        estimator.set_params(warm_start=False)
+    else:
+        raise ValueError(f"증분 학습을 지원하지 않는 모델입니다: {type(estimator).__name__}")
+    return model
+
+
+def train_incremental(add_trees=ADD_TREES, until=None):
+    """
+    워터마크 이후의 새 행만 골라 드리프트를 확인하고,
+    - 기준 이하: 최근 행(새 행 + 최소 MIN_GROW_ROWS까지 최근 경기)으로 학습한 트리를 기존 모델에 추가 (수 초)
+    - 기준 초과: 같은 설정으로 전체 재학습
+    """
+    X, y, dates = load_training_data(with_dates=True, until=until)
+
+    bundle = joblib.load(MODEL_PATH) if MODEL_PATH.exists() else None
+    metadata = (bundle or {}).get("metadata")
+    if metadata is None or metadata.get("watermark") is None:
+        print("기존 모델(메타데이터 포함)이 없어 전체 학습을 진행합니다.")
+        return train_full(X, y, dates)
+
+    if metadata.get("aggregate", "match") != "match":
+        print(f"집계({metadata['aggregate']}) 모델은 증분 학습을 지원하지 않습니다. --aggregate로 다시 학습하세요.")
+        return bundle["model"]
+
+    model, params = bundle["model"], bundle.get("params")
+    new = (dates > pd.Timestamp(metadata["watermark"])).to_numpy()
+    if not new.any():
+        print(f"워터마크({metadata['watermark']}) 이후 새 데이터가 없습니다. 모델을 그대로 둡니다.")
+        return model
+
+    drift = measure_drift(model, metadata, X[new], y[new])
+    print(f"[증분] 새 행 {drift['n_new_rows']}개, 피처 이동 최대 {drift['max_feature_shift']:.2f}"
+          f"({drift['shift_feature']}), 새 행 MAE {drift['forward_mae']:.3f} (x{drift['mae_ratio']:.2f})")
+
+    if drift["max_feature_shift"] > FEATURE_SHIFT_THRESHOLD or drift["mae_ratio"] > MAE_RATIO_THRESHOLD:
+        print("[증분] 드리프트 기준 초과 → 전체 재학습")
+        return train_full(X, y, dates, params=params, parent=metadata, mode="full (drift)", drift=drift)
+
+    t0 = time.perf_counter()
+    rows = recent_rows(dates, new)
+    grow_model(model, X.iloc[rows], y.iloc[rows], add_trees=add_trees)
+    print(f"[증분] 최근 {len(rows)}행(새 행 {int(new.sum())}개)으로 트리 {add_trees}개 추가 완료 ({time.perf_counter() - t0:.1f}s)")
+
+    # 평가 기준(test_mae)은 직전 값을 유지, 새 행에 대한 사전(forward) MAE는 drift에 기록
+    new_meta = build_metadata(model, X, y, dates, metadata["test_mae"], mode="incremental",
+                              parent=metadata, drift=drift)
+    save_bundle(model, X[new], params, new_meta)
+    return model
+
+
+# ==================================================
+# 다중 타깃 학습 (피처 행렬 1회 생성 → 타깃별 모델 병렬 학습)
+# ==================================================
+def _fit_target(name, cols, params, train_idx, test_idx):
+    """
+    (워커) 공유 피처 행렬에서 타깃 1개 모델 학습/평가
+    """
+    X, Y = _WORKER_DATA["X"], _WORKER_DATA["y"]
+    y = Y[name]
+    X = X if len(cols) == X.shape[1] else X[:, cols]
+
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_s = time.perf_counter() - t0
+
+    preds = model.predict(X[test_idx])
+    return name, model, {
+        "test_mae": float(mean_absolute_error(y[test_idx], preds)),
+        "test_r2": float(r2_score(y[test_idx], preds)),
+        "fit_time_s": fit_s,
+    }
+
+
+def train_multi_target(params=None, n_workers=None, until=None):
+    """
+    Goals / Assists / xG 오버퍼포먼스 모델을 한 번에 학습해 하나의 번들로 저장합니다.
+    - CSV 읽기, 숫자 변환, imputer/scaler 학습은 한 번만 수행
+    - 전처리된 피처 행렬은 C-연속 float32 (트리가 내부적으로 쓰는 형식이라 학습 시 추가 변환 없음)
+    - 타깃별 학습은 프로세스 풀에서 병렬 실행
+    """
+    params = dict(params or {"n_estimators": 300})
+    df, dates = load_training_frame(until=until)
+    df = df.dropna(subset=["Assists", "Expected Goals (xG)"])
+    dates = dates[df.index]
+
+    t0 = time.perf_counter()
+    preprocess = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+    ])
+    X = np.ascontiguousarray(preprocess.fit_transform(df[FEATURES]), dtype=np.float32)
+    Y = {name: np.asarray(fn(df), dtype=np.float64) for name, (fn, _) in MULTI_TARGETS.items()}
+    print(f"[다중 타깃] 피처 행렬 {X.shape} float32 생성 ({time.perf_counter() - t0:.2f}s)")
+
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    columns = {
+        name: [i for i, c in enumerate(FEATURES) if c not in drop]
+        for name, (_, drop) in MULTI_TARGETS.items()
+    }
+
+    n_workers = min(len(MULTI_TARGETS), n_workers or os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    targets = {}
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(X, Y)) as pool:
+        futures = [pool.submit(_fit_target, name, cols, params, train_idx, test_idx) for name, cols in columns.items()]
+        for f in futures:
+            name, model, scores = f.result()
+            targets[name] = {
+                "model": model,
+                "columns": columns[name],
+                "features": [FEATURES[i] for i in columns[name]],
+                **scores,
+            }
+            print(f"  - {name}: MAE={scores['test_mae']:.3f}, R2={scores['test_r2']:.3f} (학습 {scores['fit_time_s']:.1f}s)")
+    total_s = time.perf_counter() - t0
+    print(f"[다중 타깃] {len(targets)}개 타깃 학습 완료 ({total_s:.1f}s, 워커 {n_workers}개)")
+
+    previous = joblib.load(MULTI_MODEL_PATH) if MULTI_MODEL_PATH.exists() else None
+    version = (previous["metadata"]["version"] + 1) if previous and "metadata" in previous else 1
+
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(
+    dump_model(
         {
-            "model": model,
             "features": FEATURES,
-            "target": TARGET,
+            "preprocess": preprocess,
+            "targets": targets,
+            "params": {"model": "rf", **params},
+            "metadata": {
+                "version": version,
+                "mode": "multi_target",
+                "trained_at": datetime.now().isoformat(timespec="seconds"),
+                "data_rows": int(len(X)),
+                "watermark": str(dates.max().date()) if dates.notna().any() else None,
+                "train_time_s": round(total_s, 2),
+            },
         },
-        MODEL_PATH,
+        MULTI_MODEL_PATH,
+    )
+    print(f"✅ 다중 타깃 번들 저장 완료: {MULTI_MODEL_PATH} (v{version})")
+    try:
+        register_model(
+            "player_multi", MULTI_MODEL_PATH, features=FEATURES,
+            metrics={name: {k: v for k, v in t.items() if k.startswith("test_")} for name, t in targets.items()},
+            trained_at=datetime.now().isoformat(timespec="seconds"), metadata={"version": version},
+        )
+    except Exception as e:
+        print(f"경고: 모델 레지스트리 등록 실패: {e}")
+    return targets
+
+
+def train_aggregate(aggregate="season", window=5, per90=False, params=None):
+    """
+    시즌/최근 N경기 집계 행으로 학습합니다. (Streamlit 입력 폼의 시즌 합계와 같은 단위)
+    """
+    X, y, info = load_aggregate_matrix(aggregate, window, per90)
+    X = pd.DataFrame(np.asarray(X, dtype=np.float64), columns=FEATURES)
+    y = pd.Series(np.asarray(y), name=TARGET)
+    dates = pd.Series([pd.Timestamp(info["watermark"])])
+    return train_full(X, y, dates, params=params, mode=f"full ({aggregate})",
+                      aggregate=aggregate, window=info["window"], basis=info["basis"],
+                      data_version=info["data_version"])
+
+
+# ==================================================
+# 팀 경기 결과(H/D/A) 모델
+# ==================================================
+def train_team_outcome(window=FORM_WINDOW, test_size=0.2):
+    """
+    PL + Championship 전체 경기의 직전 N경기 폼 피처로 경기 결과 분류기를 학습합니다.
+    평가는 시간순 마지막 test_size 구간 (미래 경기 예측과 같은 조건).
+    """
+    if not TEAM_DATA_PATH.exists():
+        raise FileNotFoundError(f"team_data.csv가 없습니다: {TEAM_DATA_PATH}")
+
+    team_df = pd.read_csv(TEAM_DATA_PATH)
+    t0 = time.perf_counter()
+    X, y, dates = build_match_features(team_df, window)
+    print(f"[팀 모델] 경기 {len(X)}개, 피처 {X.shape[1]}개 생성 ({time.perf_counter() - t0:.2f}s)")
+
+    order = np.argsort(dates.to_numpy(), kind="mergesort")
+    cut = int(len(order) * (1 - test_size))
+    train_idx, test_idx = order[:cut], order[cut:]
+
+    model = HistGradientBoostingClassifier(
+        learning_rate=0.05, max_iter=300, max_leaf_nodes=15, min_samples_leaf=40,
+        l2_regularization=1.0, early_stopping=True, random_state=42,
     )
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+
+    proba = model.predict_proba(X.iloc[test_idx])
+    acc = accuracy_score(y.iloc[test_idx], model.classes_[proba.argmax(1)])
+    ll = log_loss(y.iloc[test_idx], proba, labels=model.classes_)
+    base = (y.iloc[test_idx] == "H").mean()
+    print(f"✅ 평가 결과(시간순 마지막 {test_size:.0%}): 정확도={acc:.3f} (항상 홈승={base:.3f}), log loss={ll:.3f}")
+
+    # 평가 후 전체 경기로 다시 학습해 저장
+    model.fit(X, y)
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    dump_model(
+        {
+            "model": model,
+            "features": TEAM_FEATURES,
+            "classes": list(model.classes_),
+            "window": window,
+            "metadata": {
+                "trained_at": datetime.now().isoformat(timespec="seconds"),
+                "data_rows": int(len(X)),
+                "watermark": str(dates.max().date()),
+                "test_accuracy": float(acc),
+                "test_log_loss": float(ll),
+            },
+        },
+        TEAM_MODEL_PATH,
+    )
+    print("✅ 팀 모델 저장 완료:", TEAM_MODEL_PATH)
+    try:
+        register_model(
+            "team_outcome", TEAM_MODEL_PATH, features=TEAM_FEATURES,
+            metrics={"test_accuracy": float(acc), "test_log_loss": float(ll)},
+            trained_at=datetime.now().isoformat(timespec="seconds"), window=window,
+        )
+    except Exception as e:
+        print(f"경고: 모델 레지스트리 등록 실패: {e}")
+    return model
+
+
+def main(mode="fixed", budget_s=300, cv=5, n_candidates=24, n_workers=None, add_trees=ADD_TREES, until=None,
+         aggregate="match", window=5, per90=False):
+    print("=== Model Trainer 시작 ===")
+
+    if aggregate != "match":
+        train_aggregate(aggregate, window, per90)
+        print("=== Model Trainer 종료 ===")
+        return
+
+    if mode == "incremental":
+        train_incremental(add_trees=add_trees, until=until)
+        print("=== Model Trainer 종료 ===")
+        return
+
+    if mode == "team":
+        train_team_outcome()
+        print("=== Model Trainer 종료 ===")
+        return
+
+    if mode == "multi":
+        train_multi_target(n_workers=n_workers, until=until)
+        print("=== Model Trainer 종료 ===")
+        return
+
+    X, y, dates = load_training_data(with_dates=True, until=until)
+
+    if mode == "search":
+        # 테스트셋은 탐색에 쓰지 않고 최종 평가에만 사용
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+        board = search(X_train, y_train, n_candidates=n_candidates, cv=cv, budget_s=budget_s, n_workers=n_workers)
+        if board.empty:
+            raise RuntimeError("탐색 결과가 없습니다. budget을 늘려보세요.")
+
+        MODEL_DIR.mkdir(parents=True, exist_ok=True)
+        board.to_csv(LEADERBOARD_PATH, index=False)
+        print("✅ 리더보드 저장 완료:", LEADERBOARD_PATH)
+        print(board.head(10).to_string(index=False))
+
+        best = board.iloc[0]
+        train_full(X, y, dates, params={"model": best["model"], **json.loads(best["params"])}, mode="full (search)")
+    else:
+        # 파이프라인: 결측치 채우기 → 스케일링 → 랜덤포레스트 회귀
+        train_full(X, y, dates)
 
-    print("✅ 모델 저장 완료:", MODEL_PATH)
     print("=== Model Trainer 종료 ===")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="선수 득점 예측 모델 학습")
+    parser.add_argument("--search", action="store_true", help="RF/HGB 하이퍼파라미터 탐색 후 최적 모델 저장")
+    parser.add_argument("--budget", type=float, default=300, help="탐색 시간 예산(초)")
+    parser.add_argument("--cv", type=int, default=5, help="K-fold 수")
+    parser.add_argument("--candidates", type=int, default=24, help="초기 후보 수")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--incremental", action="store_true", help="워터마크 이후 새 데이터로 트리 추가 (드리프트 시 전체 재학습)")
+    parser.add_argument("--add-trees", type=int, default=ADD_TREES, help="증분 학습 시 추가할 트리 수")
+    parser.add_argument("--multi", action="store_true", help="Goals/Assists/xG 오버퍼포먼스 모델을 한 번에 학습")
+    parser.add_argument("--aggregate", choices=["match", "season", "rolling"], default="match",
+                        help="학습 행 단위: 경기 / 선수 시즌 합계 / 최근 N경기 합계")
+    parser.add_argument("--window", type=int, default=5, help="--aggregate rolling의 경기 수")
+    parser.add_argument("--per90", action="store_true", help="집계 피처/타깃을 90분당 값으로 학습")
+    parser.add_argument("--team", action="store_true", help="팀 경기 결과(H/D/A) 모델 학습")
+    parser.add_argument("--until", default=None, help="YYYY-MM-DD까지의 경기만 사용")
+    parser.add_argument("--check-flat", action="store_true", help="저장된 모델과 평탄화 모델의 예측 일치 확인 (학습 없음)")
+    args = parser.parse_args()
+
+    if args.check_flat:
+        raise SystemExit(0 if verify_flat_models() else 1)
+
+    main(
+        mode=("incremental" if args.incremental else
+              "multi" if args.multi else
+              "team" if args.team else
+              "search" if args.search else "fixed"),
+        budget_s=args.budget,
+        cv=args.cv,
+        n_candidates=args.candidates,
+        n_workers=args.workers,
+        add_trees=args.add_trees,
+        until=args.until,
+        aggregate=args.aggregate,
+        window=args.window,
+        per90=args.per90,
+    )
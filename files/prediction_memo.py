@@ -0,0 +1,84 @@
+# prediction_memo.py
+"""
+예측 결과 메모이제이션 (크기 제한 LRU)
+- 같은 입력(Streamlit 기본값, 인기 선수, 대시보드 새로고침)을 다시 예측하지 않도록 결과를 보관
+- 키: (모델 버전, 정규화한 입력). 재학습으로 모델 해시가 바뀌면 이전 결과는 자연히 조회되지 않고 LRU로 밀려남
+- 조회/적중/추가/제거 횟수와 적중률을 stats()로 확인
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# 선수 예측 메모 기본 크기 (입력 1개당 수백 바이트)
+MEMO_SIZE = 4096
+# 부동소수 오차로 키가 갈리지 않도록 반올림할 소수 자릿수
+KEY_DECIMALS = 9
+
+
+def feature_keys(X: np.ndarray):
+    """
+    features 순서의 float 행렬 → 행별 해시 가능한 키 (bytes)
+    - 반올림 + (-0.0 → 0.0) 정규화, NaN(결측)은 같은 비트 패턴으로 맞춤
+    """
+    X = np.round(np.asarray(X, dtype=np.float64), KEY_DECIMALS) + 0.0
+    X[np.isnan(X)] = np.nan
+    return [row.tobytes() for row in np.ascontiguousarray(X)]
+
+
+class PredictionMemo:
+    """
+    스레드 안전 LRU (OrderedDict: 조회 시 맨 뒤로, 넘치면 맨 앞부터 제거)
+    - maxsize=0이면 저장하지 않음 (메모 끔)
+    """
+
+    def __init__(self, maxsize=MEMO_SIZE):
+        self.maxsize = int(maxsize)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# 프로세스 전역 선수 예측 메모 (PlayerGoalPredictor를 매번 새로 만들어도 공유, 키에 모델 버전 포함)
+PLAYER_PREDICTION_MEMO = PredictionMemo()
@@ -1,10 +1,14 @@
 # prediction_model.py
 from __future__ import annotations
 
+import re
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 try:
@@ -12,29 +16,271 @@ try:
 except ImportError:
     joblib = None
 
+from team_features import latest_team_form, fixture_features, find_club, FORM_WINDOW
+from score_model import DixonColesModel
+from model_cache import load_model, model_digest
+from prediction_memo import PredictionMemo, PLAYER_PREDICTION_MEMO, feature_keys
+from model_registry import REGISTRY
+
+BASE_DIR = Path(__file__).resolve().parent
+TEAM_MODEL_PATH = BASE_DIR / "trained_models" / "team_outcome_model.pkl"
+PLAYER_MODEL_PATH = BASE_DIR / "trained_models" / "player_goal_model.pkl"
+PLAYER_FLAT_MODEL_PATH = BASE_DIR / "trained_models" / "player_goal_model.flat.joblib"
+TEAM_DATA_PATH = BASE_DIR / "processed_data" / "team_data.csv"
+CLUB_INDEX_PATH = BASE_DIR / "processed_data" / "club_index.csv"
+
+# 모델 배열을 읽기 전용 메모리 매핑 (Flask 워커 여러 개가 같은 물리 메모리 공유, None이면 일반 로드)
+MODEL_MMAP_MODE = "r"
+
+
+# model_trainer.flatten_model이 저장하는 평탄화 모델 형식 이름
+FLAT_FORMAT = "flat_forest"
+
+# 화면/API 입력 키 → 학습 피처 이름 (대소문자/공백/밑줄/괄호 차이는 정규화로 흡수)
+FEATURE_ALIASES = {
+    "xG": "Expected Goals (xG)",
+    "xA": "Expected Assists (xAG)",
+    "xAG": "Expected Assists (xAG)",
+    "SoT": "Shots On Target",
+    "Mins": "Minutes",
+}
+# 처음 보는 입력 키의 해석 결과를 기억할 최대 개수 (임의 키로 메모리가 늘지 않도록)
+MAX_RESOLVED_KEYS = 1024
+
+
+def _norm_key(name) -> str:
+    return re.sub(r"[^0-9a-z]", "", str(name).lower())
+
+
+class InputAdapter:
+    """
+    모델 features 목록으로 한 번 만들어 두는 단건 입력 변환기
+    - 입력 키 → 컬럼 위치를 미리 계산 (정확한 이름 / 정규화 이름 / 별칭: "xG" → "Expected Goals (xG)")
+    - dict를 스레드별로 미리 할당한 (1, 피처 수) float 행에 채움 (DataFrame 생성 없음)
+    - 없는 피처는 NaN (모델의 imputer가 처리), 숫자로 바꿀 수 없는 값은 ValueError
+    """
+
+    def __init__(self, features: List[str]):
+        self.features = list(features)
+        pos = {_norm_key(c): i for i, c in enumerate(self.features)}
+        for alias, target in FEATURE_ALIASES.items():
+            if _norm_key(target) in pos:
+                pos.setdefault(_norm_key(alias), pos[_norm_key(target)])
+        self._by_norm = pos
+        self._index = {c: i for i, c in enumerate(self.features)}  # 원래 입력 키 → 위치 (-1: 모르는 키)
+        self._local = threading.local()
+
+    def position(self, key) -> int:
+        i = self._index.get(key)
+        if i is None:
+            i = self._by_norm.get(_norm_key(key), -1)
+            if len(self._index) < MAX_RESOLVED_KEYS:
+                self._index[key] = i
+        return i
+
+    def canonical(self, key) -> Optional[str]:
+        i = self.position(key)
+        return None if i < 0 else self.features[i]
+
+    def fill(self, input_data: Dict[str, Any], out: np.ndarray) -> np.ndarray:
+        out.fill(np.nan)
+        for key, value in input_data.items():
+            i = self.position(key)
+            if i >= 0 and value is not None:
+                out[i] = float(value)
+        return out
+
+    def row(self, input_data: Dict[str, Any]) -> np.ndarray:
+        """
+        (1, 피처 수) 행 (스레드별 버퍼 재사용: 다음 호출 전까지만 유효)
+        """
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, len(self.features)))
+        self.fill(input_data, buf[0])
+        return buf
+
+
+class ArrayPipeline:
+    """
+    Pipeline(imputer → scaler → 트리 모델)을 NumPy 배열 그대로 예측
+    - 이름 있는 DataFrame으로 학습된 파이프라인도 DataFrame을 만들지 않고 전처리 후 최종 모델에 배열 전달
+    - 전처리 연산 순서는 SimpleImputer/StandardScaler와 같음
+    """
+
+    def __init__(self, impute, mean, scale, estimator):
+        self.impute = impute
+        self.mean = mean
+        self.scale = scale
+        self.estimator = estimator
+
+    @classmethod
+    def from_pipeline(cls, model) -> Optional["ArrayPipeline"]:
+        """
+        지원하는 구성이 아니면 None (DataFrame 경로 유지)
+        """
+        steps = getattr(model, "steps", None)
+        if not steps or hasattr(steps[-1][1], "feature_names_in_"):
+            return None
+        impute = mean = scale = None
+        for _, step in steps[:-1]:
+            kind = type(step).__name__
+            if kind == "SimpleImputer" and impute is None and mean is None and not step.add_indicator:
+                impute = np.asarray(step.statistics_, dtype=np.float64)
+            elif kind == "StandardScaler" and mean is None:
+                mean = np.asarray(step.mean_, dtype=np.float64) if step.with_mean else 0.0
+                scale = np.asarray(step.scale_, dtype=np.float64) if step.with_std else 1.0
+            else:
+                return None
+        return cls(impute, mean, scale, steps[-1][1])
+
+    def predict(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.impute is not None:
+            X = np.where(np.isnan(X), self.impute, X)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return self.estimator.predict(X)
+
+
+class FlatForest:
+    """
+    평탄화된 트리 앙상블(RF/HGB) 평가기 (sklearn 없이 NumPy만 사용)
+    - imputer(중앙값) → scaler(평균/표준편차) → 트리 순회를 sklearn과 같은 연산 순서로 계산
+    - 모든 행 × 모든 트리를 깊이 단위로 한 번에 이동 (행/트리 루프 없음)
+    - 깊이마다 아직 잎에 닿지 않은 (행, 트리)만 남겨 이동 (대량 배치에서 얕은 트리 낭비 제거)
+    """
+
+    def __init__(self, flat: Dict[str, Any]):
+        if flat.get("format") != FLAT_FORMAT:
+            raise ValueError(f"평탄화 모델 형식이 아닙니다: {flat.get('format')}")
+        self.features: List[str] = list(flat["features"])
+        self.impute = flat["impute"]
+        self.mean = flat["mean"]
+        self.scale = flat["scale"]
+        self.feature = flat["feature"]
+        self.threshold = flat["threshold"]
+        self.right = flat["right"]
+        self.value = flat["value"]
+        self.roots = flat["roots"]
+        self.max_depth = int(flat["max_depth"])
+        self.aggregate = flat["aggregate"]
+        self.base = float(flat["base"])
+        self.x_dtype = np.dtype(flat["x_dtype"])
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.impute is not None:
+            X = np.where(np.isnan(X), self.impute, X)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X.astype(self.x_dtype, copy=False)
+
+    def predict(self, X) -> np.ndarray:
+        X = self.transform(X)
+        n_rows, n_trees = len(X), len(self.roots)
+        n_cols = X.shape[1]
+        X_flat = X.ravel()
+
+        # (행, 트리) 쌍을 1차원으로: 위치 k = 행 * n_trees + 트리
+        node = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows) * n_cols, n_trees)
+        active = np.arange(len(node))
+
+        for _ in range(self.max_depth):
+            cur = node[active]
+            f = self.feature[cur]
+            internal = f >= 0
+            active, cur, f = active[internal], cur[internal], f[internal]
+            if len(active) == 0:
+                break
+            go_left = X_flat[row_offset[active] + f] <= self.threshold[cur]
+            node[active] = np.where(go_left, cur + 1, self.right[cur])
+
+        node = node.reshape(n_rows, n_trees)
+        leaf = self.value[node]
+        # sklearn과 같은 순서로 트리별 값을 차례로 누적 (부동소수 합 순서까지 일치)
+        if self.aggregate == "mean":
+            return np.cumsum(leaf, axis=1)[:, -1] / leaf.shape[1]
+        return np.cumsum(np.column_stack([np.full(len(X), self.base), leaf]), axis=1)[:, -1]
+
 
 @dataclass
 class PlayerGoalPredictor:
     """
     Streamlit 앱에서 쓰는 '선수 득점 예측기'
     - model_trainer.py가 학습 후 저장한 pkl을 로드해서 예측
+    - 평탄화 모델(*.flat.joblib)이면 FlatForest로 평가 (Pipeline/DataFrame 오버헤드 없음)
+    - 파일은 model_cache로 프로세스당 한 번만 로드 (예측기를 매번 새로 만들어도 비용 없음)
+    - 예측 때마다 파일 변경을 확인해 바뀌었으면 새 모델로 교체
+    - mmap_mode="r"(기본): 트리 배열을 메모리 매핑 (읽기 전용, 프로세스 간 공유)
+    - 예측 결과는 (모델 해시, 입력) 키의 LRU 메모에 보관 (memo=None이면 프로세스 전역 메모 공유)
+    - model_path=None + from_object(): 이미 로드한 객체로 예측 (model_registry의 버전별 모델)
     """
-    model_path: str = "models/player_goal_model.pkl"
+    model_path: Optional[str] = str(PLAYER_MODEL_PATH)
+    mmap_mode: Optional[str] = MODEL_MMAP_MODE
+    memo: Optional[PredictionMemo] = None
 
     def __post_init__(self):
         self.model = None
+        self.features: Optional[List[str]] = None
+        self.basis = "total"  # "per90": 90분당 단위로 학습된 모델
+        self.version: Optional[str] = None  # 모델 파일 sha1 (메모 키)
+        self.adapter: Optional[InputAdapter] = None  # 단건 dict 입력 변환기 (features 기준)
+        self._array_model = None  # 배열을 바로 받는 예측 경로 (FlatForest / ArrayPipeline)
+        self._loaded = None     # 캐시에서 받은 원본 객체 (변경 감지용)
+        if self.memo is None:
+            self.memo = PLAYER_PREDICTION_MEMO
         self._load_model()
 
+    @classmethod
+    def from_object(cls, obj: Any, version: str, memo: Optional[PredictionMemo] = None) -> "PlayerGoalPredictor":
+        """
+        파일 대신 로드된 번들/평탄화 모델로 만드는 예측기 (파일 변경 감지 없음, version은 메모 키)
+        """
+        predictor = cls(model_path=None, memo=memo)
+        predictor._use_model(obj)
+        predictor.version = version
+        return predictor
+
     def _load_model(self) -> None:
-        p = Path(self.model_path)
-        if joblib is None:
-            self.model = None
+        if self.model_path is None or joblib is None:
             return
+        p = Path(self.model_path)
         if p.exists():
             try:
-                self.model = joblib.load(p)
+                obj = load_model(p, mmap_mode=self.mmap_mode)
             except Exception:
-                self.model = None
+                # 쓰는 중인 파일 등: 이미 로드한 모델이 있으면 그대로 사용
+                if self._loaded is None:
+                    self.model = None
+                return
+            if obj is self._loaded:
+                return
+            self._use_model(obj)
+            self.version = model_digest(p, self.mmap_mode)
+
+    def _use_model(self, obj: Any) -> None:
+        self._loaded = obj
+        if isinstance(obj, dict) and obj.get("format") == FLAT_FORMAT:
+            self.model = FlatForest(obj)
+            self.features = self.model.features
+            self.basis = obj.get("basis", "total")
+        elif isinstance(obj, dict) and "model" in obj:
+            # model_trainer 번들: {"model": Pipeline, "features": [...], "target": ...}
+            self.model = obj["model"]
+            self.features = obj.get("features")
+            self.basis = (obj.get("metadata") or {}).get("basis", "total")
+        else:
+            self.model = obj
+            names = getattr(obj, "feature_names_in_", None)
+            self.features = list(names) if names is not None else None
+
+        if isinstance(self.model, FlatForest):
+            self._array_model = self.model
+        else:
+            self._array_model = ArrayPipeline.from_pipeline(self.model)
+        self.adapter = InputAdapter(self.features) if self.features is not None else None
 
     def predict_goals(self, input_data: Dict[str, Any]) -> int:
         """
@@ -43,59 +289,467 @@ class PlayerGoalPredictor:
           'Minutes': 2000, 'Shots': 50, 'Shots On Target': 20, 'Assists': 5,
           'Passes_Attempted': 1000, 'Passes_Completed': 800, 'xG': 7.5, 'xA': 5.0
         }
+        키 이름은 InputAdapter가 학습 피처 이름으로 맞춤 ('xG' → 'Expected Goals (xG)')
         """
         if self.model is None:
             return -1
 
         try:
-            df = pd.DataFrame([input_data])
-            pred = float(self.model.predict(df)[0])
-            return int(round(pred))
+            X = pd.DataFrame([input_data]) if self.adapter is None else self.adapter.row(input_data)
+            preds, errors = self.predict_goals_batch(X)
+            return -1 if errors[0] else int(round(preds[0]))
         except Exception:
             return -1
 
+    def _batch_matrix(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        입력(DataFrame 또는 2차원 배열) → (features 순서의 float 행렬, 행별 입력 오류 플래그)
+        - DataFrame: 별칭 컬럼('xG' 등)을 피처 이름으로 바꾼 뒤 한 번에 재정렬 (없는 컬럼은 NaN → 모델의 imputer가 처리)
+        - 배열: 이미 features 순서라고 보고 컬럼 수만 검사
+        """
+        if isinstance(data, pd.DataFrame):
+            if self.adapter is not None:
+                data = data.rename(columns=lambda c: self.adapter.canonical(c) or c)
+            cols = data if self.features is None else data.reindex(columns=self.features)
+            X = cols.apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+            # 숫자로 바꿀 수 없는 값이 있던 행
+            bad = (np.isnan(X) & cols.notna().to_numpy()).any(axis=1)
+            return X, bad
+
+        X = np.array(data, dtype=np.float64, ndmin=2)
+        if X.ndim != 2:
+            raise ValueError(f"2차원 입력이 필요합니다. (받은 shape: {X.shape})")
+        if self.features is not None and X.shape[1] != len(self.features):
+            raise ValueError(f"컬럼 수가 다릅니다: {X.shape[1]}개 (필요: {len(self.features)}개 {self.features})")
+        return X, np.zeros(len(X), dtype=bool)
+
+    def predict_goals_batch(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 선수를 한 번의 predict 호출로 예측합니다. (메모에 있는 행은 모델을 거치지 않음)
+        반환: (예측 득점 float 배열, 행별 오류 플래그 bool 배열). 오류 행의 예측값은 NaN
+        """
+        n = len(data)
+        self._load_model()
+        if self.model is None or n == 0:
+            return np.full(n, np.nan), np.ones(n, dtype=bool)
+
+        X, errors = self._batch_matrix(data)
+        preds = np.full(len(X), np.nan)
+        todo = ~errors
+
+        # 메모보다 큰 배치(리그 전체 스코어링 등)는 메모를 밀어내기만 하므로 건너뜀
+        use_memo = self.version is not None and self.features is not None and 0 < len(X) <= self.memo.maxsize
+        if use_memo:
+            keys = feature_keys(X)
+            for i in np.flatnonzero(todo):
+                hit = self.memo.get((self.version, keys[i]))
+                if hit is not None:
+                    preds[i] = hit
+                    todo[i] = False
+
+        if todo.any():
+            rows = np.flatnonzero(todo)
+            preds[rows] = self._predict_matrix(X[rows])
+            if use_memo:
+                for i in rows[np.isfinite(preds[rows])]:
+                    self.memo.put((self.version, keys[i]), float(preds[i]))
+
+        errors = errors | ~np.isfinite(preds)
+        preds[errors] = np.nan
+        return preds, errors
+
+    def _predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        features 순서 행렬 → 예측 득점 (실패 시 전부 NaN)
+        """
+        try:
+            # 90분당 모델: 합계 입력 → 90분당으로 변환해 예측 후 다시 출전 시간만큼 곱함
+            scale = np.ones(len(X))
+            no_minutes = np.zeros(len(X), dtype=bool)
+            if self.basis == "per90" and self.features is not None:
+                X = X.copy()
+                minutes = X[:, self.features.index("Minutes")]
+                no_minutes = ~(minutes > 0)
+                rate = np.array([c != "Minutes" for c in self.features])
+                factor = np.where(no_minutes, 0.0, 90.0 / np.where(no_minutes, 1.0, minutes))
+                X[:, rate] *= factor[:, None]
+                scale = np.where(no_minutes, 0.0, minutes / 90.0)
+
+            if self._array_model is not None:
+                raw = self._array_model.predict(X)
+            elif self.features is None:
+                raw = self.model.predict(X)
+            else:
+                raw = self.model.predict(pd.DataFrame(X, columns=self.features))
+            preds = np.asarray(raw, dtype=np.float64) * scale
+        except Exception:
+            return np.full(len(X), np.nan)
+
+        # 출전 시간 0인 90분당 입력은 기존 단건 예측과 같이 0골
+        preds[no_minutes] = 0.0
+        return preds
+
+    def sensitivity_grid(self, base_input: Dict[str, Any], vary: Dict[str, Any]) -> pd.DataFrame:
+        """
+        What-if 민감도: 기준 입력에서 피처 1~2개만 바꾼 모든 조합을 한 번의 predict로 예측
+        - vary: {피처(별칭 가능): 값 목록}  예) {"Shots": np.linspace(0, 100, 50), "xG": np.linspace(0, 20, 50)}
+        - 피처 1개: [피처, Pred_Goals] 곡선 / 2개: index=첫 피처 값, columns=둘째 피처 값인 예측 행렬
+        - 격자 예측은 메모에 넣지 않음 (탐색용 입력이 자주 쓰는 예측을 밀어내지 않도록)
+        """
+        self._load_model()
+        if self.model is None or self.adapter is None:
+            raise ValueError("피처 목록이 있는 모델이 필요합니다.")
+        if not 1 <= len(vary) <= 2:
+            raise ValueError("바꿀 피처는 1개 또는 2개여야 합니다.")
+
+        names, axes = [], []
+        for key, values in vary.items():
+            name = self.adapter.canonical(key)
+            if name is None:
+                raise ValueError(f"모델 피처가 아닙니다: {key} (피처: {self.features})")
+            names.append(name)
+            axes.append(np.asarray(values, dtype=np.float64))
+
+        # 기준 행을 격자 크기만큼 복제하고 바꿀 컬럼만 격자 값으로 채움
+        mesh = np.meshgrid(*axes, indexing="ij")
+        base = self.adapter.fill(base_input, np.empty(len(self.features)))
+        X = np.repeat(base[None, :], mesh[0].size, axis=0)
+        for name, grid in zip(names, mesh):
+            X[:, self.features.index(name)] = grid.ravel()
+        preds = self._predict_matrix(X)
+
+        if len(names) == 1:
+            return pd.DataFrame({names[0]: axes[0], "Pred_Goals": preds})
+        out = pd.DataFrame(preds.reshape(mesh[0].shape), index=axes[0], columns=axes[1])
+        out.index.name, out.columns.name = names
+        return out
+
+    def memo_stats(self) -> Dict[str, Any]:
+        return {"model_version": self.version, **self.memo.stats()}
+
+
+def serving_player_predictor(handles: Dict[str, Any]) -> PlayerGoalPredictor:
+    """
+    레지스트리 기본 버전의 선수 득점 예측기 (promote/롤백이 재시작 없이 다음 호출부터 반영)
+    handles: 로드된 버전을 붙잡아 둘 dict (참조가 없어지면 레지스트리가 모델을 메모리에서 해제)
+    등록된 모델이 없으면 평탄화 모델 파일로 대체
+    """
+    try:
+        handle = REGISTRY.get("player_goal")
+    except (KeyError, OSError):
+        return PlayerGoalPredictor(model_path=str(PLAYER_FLAT_MODEL_PATH))
+    handles["player_goal"] = handle
+    return handle.predictor()
+
 
 class PredictionModel:
     """
     Flask API(app.py)에서 쓰는 예측용 클래스
     - 지금 app.py가 기대하는 메서드 이름을 그대로 제공
-    - (TODO) 팀/선수 예측 모델을 실제로 연결하고 싶으면 이 클래스에서 구현
+    - 팀: model_trainer.py --team 으로 학습한 경기 결과(H/D/A) 모델 + 팀별 최근 폼
+      (레지스트리에 등록돼 있으면 기본 버전을 요청마다 확인 → promote/롤백이 재시작 없이 반영)
+      + 경기 데이터로 바로 학습하는 Dixon-Coles 스코어 모델 (기대 득점/스코어 확률, 결과 모델이 없으면 대체)
+    - 선수: prediction_scoring이 미리 계산해 둔 예측 테이블 조회 (요청 시 추론 없음)
+      피처를 직접 넣는 predict_player_performance만 레지스트리 기본 버전으로 즉시 추론
+    - 팀 예측 결과는 (모델 버전, 입력) 키의 LRU 메모에 보관 (같은 경기/피처 재요청 시 모델 호출 없음)
     """
     def __init__(
         self,
-        team_model_path: Optional[str] = None,
+        team_model_path: Optional[str] = str(TEAM_MODEL_PATH),
         player_model_path: Optional[str] = None,
+        team_data_path: Optional[str] = str(TEAM_DATA_PATH),
+        memo_size: int = 1024,
+        team_registry_name: Optional[str] = "team_outcome",
     ):
         self.team_model = None
         self.player_model = None
+        self.team_form = None
+        self.score_model = None
+        self.memo = PredictionMemo(memo_size)
+        # 레지스트리에서 받은 모델 핸들 (붙잡고 있는 동안만 메모리에 유지)
+        self._handles: Dict[str, Any] = {}
 
-        if joblib is not None:
-            if team_model_path and Path(team_model_path).exists():
-                try:
-                    self.team_model = joblib.load(team_model_path)
-                except Exception:
-                    self.team_model = None
+        self.team_model_path = team_model_path
+        self.team_registry_name = team_registry_name
+        self._refresh_team_model()
+
+        if team_data_path and Path(team_data_path).exists():
+            try:
+                team_df = pd.read_csv(team_data_path)
+                club_names = None
+                if CLUB_INDEX_PATH.exists():
+                    idx = pd.read_csv(CLUB_INDEX_PATH)
+                    club_names = dict(zip(idx["club_id"], idx["Club"]))
+                window = self.team_model.get("window", FORM_WINDOW) if self.team_model else FORM_WINDOW
+                self.team_form = latest_team_form(team_df, window, club_names)
+                # 학습 0.2초 내외라 저장 없이 매번 경기 데이터로 학습
+                self.score_model = DixonColesModel().fit(team_df)
+            except Exception:
+                self.team_form = None
+                self.score_model = None
 
+        # 순환 import 방지 (prediction_scoring → prediction_model)
+        from prediction_scoring import PredictionTable
+        self.player_predictions = PredictionTable()
+
+        if joblib is not None:
             if player_model_path and Path(player_model_path).exists():
                 try:
-                    self.player_model = joblib.load(player_model_path)
+                    self.player_model = load_model(player_model_path, mmap_mode=MODEL_MMAP_MODE)
                 except Exception:
                     self.player_model = None
 
     def predict_team_performance(self, features_df: pd.DataFrame) -> Dict[str, Any]:
-        # TODO: 실제 팀 예측 모델을 붙이면 여기서 self.team_model.predict(...)
+        """
+        경기 피처(team_features.TEAM_FEATURES) → 홈 기준 H/D/A 확률과 양 팀 기대 승점
+        """
+        self._refresh_team_model()
+        if self.team_model is None:
+            return {"ok": False, "kind": "team", "error": "팀 모델이 없습니다. 'model_trainer.py --team'으로 학습하세요."}
+
+        try:
+            key = (self._team_version(), "features", tuple(feature_keys(features_df[self.team_model["features"]])))
+            cached = self.memo.get(key)
+            if cached is not None:
+                return cached
+
+            proba = self._team_proba(features_df)
+            result = {
+                "ok": True,
+                "kind": "team",
+                "predictions": [
+                    {
+                        "home_win": float(p["H"]), "draw": float(p["D"]), "away_win": float(p["A"]),
+                        "home_expected_points": float(3 * p["H"] + p["D"]),
+                        "away_expected_points": float(3 * p["A"] + p["D"]),
+                    }
+                    for p in proba.to_dict("records")
+                ],
+            }
+            self.memo.put(key, result)
+            return result
+        except Exception as e:
+            return {"ok": False, "kind": "team", "error": f"팀 예측 중 오류: {e}"}
+
+    def _refresh_team_model(self) -> None:
+        # 레지스트리 기본 버전 (manifest가 바뀌었을 때만 다시 읽음), 등록된 모델이 없으면 파일 캐시
+        # (재학습으로 파일이 바뀌었으면 캐시가 새 번들을 돌려줌, 안 바뀌었으면 stat 1회)
+        if self.team_registry_name:
+            try:
+                handle = REGISTRY.get(self.team_registry_name)
+                self._handles["team"], self.team_model = handle, handle.obj
+                return
+            except (KeyError, OSError):
+                self._handles.pop("team", None)
+        if joblib is not None and self.team_model_path and Path(self.team_model_path).exists():
+            try:
+                self.team_model = load_model(self.team_model_path, mmap_mode=MODEL_MMAP_MODE)
+            except Exception:
+                pass
+
+    def _team_version(self) -> str:
+        # 결과 모델이 있으면 레지스트리 버전 또는 파일 해시, 없으면 인스턴스 생성 때 학습한 Dixon-Coles (인스턴스 안에서 고정)
+        handle = self._handles.get("team")
+        if handle is not None:
+            return f"{handle.name}:{handle.version}"
+        if self.team_model is not None:
+            return model_digest(self.team_model_path, MODEL_MMAP_MODE) or "team"
+        return "dixon-coles"
+
+    def memo_stats(self) -> Dict[str, Any]:
+        return self.memo.stats()
+
+    def _team_proba(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        self._refresh_team_model()
+        bundle = self.team_model
+        proba = bundle["model"].predict_proba(features_df[bundle["features"]])
+        return pd.DataFrame(proba, columns=bundle["classes"])
+
+    def _fixture_proba(self, home_ids, away_ids) -> pd.DataFrame:
+        """
+        (홈, 원정) 경기들의 H/D/A 확률: 결과 모델이 있으면 결과 모델, 없으면 Dixon-Coles
+        """
+        if self.team_model is not None:
+            return self._team_proba(fixture_features(self.team_form, home_ids, away_ids))
+        p = self.score_model.outcome_probabilities(home_ids, away_ids)
+        return pd.DataFrame(p, columns=["H", "D", "A"])
+
+    def _score_summary(self, home, away, team_is_home, top_k=5) -> Dict[str, Any]:
+        """
+        Dixon-Coles 기대 득점과 가능성 높은 스코어 (팀 관점 '득점-실점')
+        """
+        m = self.score_model.score_matrix([home], [away])[0]
+        lam, mu = self.score_model.expected_goals([home], [away])
+        if not team_is_home:
+            m, lam, mu = m.T, mu, lam
+        flat = np.argsort(m, axis=None)[::-1][:top_k]
+        scores = [
+            {"score": f"{i}-{j}", "probability": float(m[i, j])}
+            for i, j in zip(*np.unravel_index(flat, m.shape))
+        ]
         return {
-            "ok": True,
-            "kind": "team",
-            "note": "TODO: connect real model",
-            "input": features_df.to_dict(orient="records"),
+            "expected_goals_for": float(lam[0]),
+            "expected_goals_against": float(mu[0]),
+            "most_likely_score": scores[0]["score"],
+            "top_scores": scores,
         }
 
+    def predict_team(self, team_name: str, opponent: Optional[str] = None, venue: str = "home") -> Dict[str, Any]:
+        """
+        - opponent 지정: 해당 경기(venue = home/away) 승/무/패 확률과 기대 승점
+        - 미지정: 같은 리그·시즌 모든 팀과 홈/원정 한 번씩 붙였을 때 경기당 기대 승점과 그 순위
+        """
+        self._refresh_team_model()
+        if self.team_form is None or (self.team_model is None and self.score_model is None):
+            return {"ok": False, "kind": "team", "error": "팀 경기 데이터가 없습니다. data_preprocessor.py를 먼저 실행하세요."}
+
+        form = self.team_form
+        team_id = find_club(form, team_name)
+        if team_id is None:
+            return {"ok": False, "kind": "team", "error": f"'{team_name}' 팀을 찾을 수 없습니다."}
+
+        opp_id = None
+        if opponent:
+            opp_id = find_club(form, opponent)
+            if opp_id is None:
+                return {"ok": False, "kind": "team", "error": f"'{opponent}' 팀을 찾을 수 없습니다."}
+        key = (self._team_version(), "team", team_id, opp_id, "away" if venue == "away" else "home")
+        cached = self.memo.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._predict_team(team_id, opp_id, venue)
+        if result.get("ok"):
+            self.memo.put(key, result)
+        return result
+
+    def _predict_team(self, team_id, opp_id, venue: str) -> Dict[str, Any]:
+        form = self.team_form
+        team = form.loc[team_id]
+        try:
+            if opp_id is not None:
+                home, away = (team_id, opp_id) if venue != "away" else (opp_id, team_id)
+                p = self._fixture_proba([home], [away]).iloc[0]
+                win, loss = (p["H"], p["A"]) if venue != "away" else (p["A"], p["H"])
+                out = {
+                    "ok": True,
+                    "kind": "team",
+                    "team": team["Club"],
+                    "opponent": form.loc[opp_id, "Club"],
+                    "venue": "away" if venue == "away" else "home",
+                    "win": float(win), "draw": float(p["D"]), "loss": float(loss),
+                    "expected_points": float(3 * win + p["D"]),
+                }
+                if self.score_model is not None:
+                    out.update(self._score_summary(home, away, team_is_home=venue != "away"))
+                return out
+
+            # 같은 리그·시즌 팀끼리 모든 (홈, 원정) 조합을 한 번에 예측
+            league = form[(form["League"] == team["League"]) & (form["Season"] == team["Season"])]
+            ids = league.index.to_numpy()
+            home_ids, away_ids = np.meshgrid(ids, ids, indexing="ij")
+            off_diag = home_ids != away_ids
+            home_ids, away_ids = home_ids[off_diag], away_ids[off_diag]
+            p = self._fixture_proba(home_ids, away_ids)
+
+            ep = pd.concat([
+                pd.Series(3 * p["H"].to_numpy() + p["D"].to_numpy(), index=home_ids),
+                pd.Series(3 * p["A"].to_numpy() + p["D"].to_numpy(), index=away_ids),
+            ]).groupby(level=0).mean()
+            rank = ep.rank(ascending=False, method="min")
+
+            return {
+                "ok": True,
+                "kind": "team",
+                "team": team["Club"],
+                "league": team["League"],
+                "season": team["Season"],
+                "predicted_points_per_match": float(ep[team_id]),
+                "predicted_rank": int(rank[team_id]),
+                "teams_in_league": int(len(ids)),
+                "elo": float(team["elo"]),
+                "form": {k: float(team[k]) for k in team.index if k.startswith("form_")},
+            }
+        except Exception as e:
+            return {"ok": False, "kind": "team", "error": f"팀 예측 중 오류: {e}"}
+
+    def predict_player(self, player_name: str, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        예측 테이블(player_predictions.csv)에서 선수 예측 조회
+        - version 미지정: 레지스트리 라우팅(선수 이름 기준 고정 배정)으로 버전 선택, 테이블에 없으면 최신 버전
+          (응답의 served_version이 실제 버전, 대체했으면 fallback=True + 레지스트리 fallbacks 집계)
+        """
+        routed = version is None
+        if routed:
+            version = self._route_player_version(player_name)
+        row = self.player_predictions.lookup(player_name, version)
+        fallback = False
+        if row is None and routed and version is not None:
+            row = self.player_predictions.lookup(player_name)
+            fallback = row is not None
+            if fallback:
+                REGISTRY.record_fallback("player_goal")
+        if row is None:
+            if self.player_predictions.latest_version is None:
+                return {"ok": False, "kind": "player", "error": "예측 테이블이 없습니다. 'model_trainer.py' 또는 'prediction_scoring.py'를 실행하세요."}
+            return {"ok": False, "kind": "player", "error": f"'{player_name}' 선수의 예측이 없습니다."}
+        out = {"ok": True, "kind": "player", **row, "served_version": row["model_version"], "fallback": fallback}
+        if fallback:
+            out["routed_version"] = version
+        return out
+
+    def _route_player_version(self, player_name: str) -> Optional[str]:
+        try:
+            return REGISTRY.route("player_goal", key=str(player_name).strip().lower())
+        except KeyError:
+            return None
+
     def predict_player_performance(self, features_df: pd.DataFrame) -> Dict[str, Any]:
-        # TODO: 실제 선수 예측 모델을 붙이면 여기서 self.player_model.predict(...)
+        """
+        선수 피처 행들 → 예상 득점 (레지스트리 기본 버전으로 즉시 추론, 실패한 행은 None)
+        """
+        predictor = serving_player_predictor(self._handles)
+        if predictor.model is None:
+            return {"ok": False, "kind": "player", "error": "선수 모델이 없습니다. 'model_trainer.py'로 학습하세요."}
+        try:
+            preds, errors = predictor.predict_goals_batch(features_df)
+        except Exception as e:
+            return {"ok": False, "kind": "player", "error": f"선수 예측 중 오류: {e}"}
         return {
             "ok": True,
             "kind": "player",
-            "note": "TODO: connect real model",
-            "input": features_df.to_dict(orient="records"),
+            "model_version": predictor.version,
+            "predictions": [None if err else float(p) for p, err in zip(preds.tolist(), errors.tolist())],
         }
+
+
+if __name__ == "__main__":
+    # 단건 예측 지연 시간 (p50/p99): predict_goals 전체 vs 모델 predict만 → 차이가 입력 처리 비용
+    for path in (PLAYER_MODEL_PATH, PLAYER_FLAT_MODEL_PATH):
+        predictor = PlayerGoalPredictor(model_path=str(path), memo=PredictionMemo(0))
+        if predictor.model is None:
+            print(f"모델이 없습니다: {path} (model_trainer.py 실행 필요)")
+            continue
+
+        rng = np.random.default_rng(0)
+        inputs = [
+            {"Minutes": 2000, "Shots": int(s), "Shots On Target": 20, "Assists": 5,
+             "Passes Attempted": 1000, "Passes Completed": 800, "xG": 7.5, "xA": 5.0}
+            for s in rng.integers(0, 100, 300)
+        ]
+        total, model_only = [], []
+        for d in inputs:
+            start = time.perf_counter()
+            predictor.predict_goals(d)
+            total.append(time.perf_counter() - start)
+
+            X = predictor.adapter.row(d)
+            start = time.perf_counter()
+            (predictor._array_model or predictor.model).predict(X)
+            model_only.append(time.perf_counter() - start)
+
+        total, model_only = np.array(total) * 1000, np.array(model_only) * 1000
+        print(f"{path.name}")
+        print(f"  - predict_goals : p50 {np.percentile(total, 50):.3f}ms, p99 {np.percentile(total, 99):.3f}ms")
+        print(f"  - 모델 predict  : p50 {np.percentile(model_only, 50):.3f}ms, p99 {np.percentile(model_only, 99):.3f}ms")
+        print(f"  - 입력 처리 비용: p50 {np.percentile(total - model_only, 50):.3f}ms")
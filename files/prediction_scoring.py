@@ -0,0 +1,195 @@
+# prediction_scoring.py
+"""
+리그 전체 선수 득점 예측 (오프라인 배치 스코어링) + 조회용 예측 테이블
+- 학습(model_trainer.py) / 전처리(data_preprocessor.py) 직후 실행: 모든 선수의 현재 시즌 집계 피처를
+  학습된 모델로 한 번에 예측 → processed_data/player_predictions.csv
+- 테이블 키: (player_id, model_version). 최근 MAX_VERSIONS개 모델 버전의 결과를 함께 보관
+  (레지스트리가 보관하는 버전 수와 같음 → 라우팅 가능한 버전은 테이블에도 남아 있음)
+- API/Streamlit은 PredictionTable로 조회만 (요청 시점 추론 없음, 딕셔너리 O(1) 조회)
+"""
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from identity_resolution import normalize_name
+from model_cache import load_model
+from model_registry import MAX_REGISTRY_VERSIONS, model_version
+from prediction_model import PlayerGoalPredictor, MODEL_MMAP_MODE, PLAYER_MODEL_PATH
+from season_analyzer import SeasonAnalyzer, compute_data_version
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_PATH = BASE_DIR / "processed_data" / "player_data.csv"
+MODEL_PATH = PLAYER_MODEL_PATH
+PREDICTION_TABLE_PATH = BASE_DIR / "processed_data" / "player_predictions.csv"
+
+# 테이블에 남겨 둘 모델 버전 수 (이전 버전과 비교 / A/B 라우팅용, 레지스트리 보관 수와 맞춤)
+MAX_VERSIONS = MAX_REGISTRY_VERSIONS
+
+
+def _player_inputs(analyzer, features, metadata):
+    """
+    모델 학습 단위에 맞춘 선수별 입력 행렬과 '경기당 예측'으로 바꾸는 분모
+    - match  : 시즌 합계 / 경기 수 (경기당 평균) → 예측 = 경기당 득점
+    - season : 시즌 합계 → 예측 / 경기 수
+    - rolling: 최근 window경기 합계 → 예측 / window
+    """
+    target = metadata.get("target", "Goals")
+    aggregate = metadata.get("aggregate", "match")
+    season = analyzer.get_player_aggregates(features + [target], mode="season")
+    if isinstance(season, dict):
+        raise ValueError(season["error"])
+
+    # 시즌 중 이적한 선수는 한 행으로 (클럽은 마지막 경기 기준)
+    season = season.sort_values("Date", kind="mergesort")
+    g = season.groupby("player_id", sort=False)
+    players = g[features + [target, "Matches"]].sum()
+    players = players.join(g[["Player Name", "Club", "club_id", "Date"]].last())
+
+    if aggregate == "rolling":
+        window = int(metadata.get("window") or 5)
+        recent = analyzer.get_player_aggregates(features, mode="rolling", window=window)
+        if isinstance(recent, dict):
+            raise ValueError(recent["error"])
+        recent = recent.sort_values("Date", kind="mergesort").groupby("player_id").last()
+        X = recent[features].reindex(players.index)
+        per_match_divisor = pd.Series(float(window), index=players.index)
+    elif aggregate == "season":
+        X = players[features]
+        per_match_divisor = players["Matches"].astype(np.float64)
+    else:
+        X = players[features].div(players["Matches"], axis=0)
+        per_match_divisor = pd.Series(1.0, index=players.index)
+    return players, X, per_match_divisor
+
+
+def score_players(model_path=MODEL_PATH, data_path=DATA_PATH, table_path=PREDICTION_TABLE_PATH):
+    """
+    모든 선수를 한 번의 배치 예측으로 점수화해 예측 테이블에 기록합니다. (기록한 DataFrame 반환)
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        print(f"[스코어링] 모델이 없습니다: {model_path} (model_trainer.py 실행 필요)")
+        return None
+
+    bundle = load_model(model_path, mmap_mode=MODEL_MMAP_MODE)
+    metadata = dict((bundle.get("metadata") or {}) if isinstance(bundle, dict) else {})
+    if isinstance(bundle, dict):
+        metadata.setdefault("target", bundle.get("target", "Goals"))
+    version = model_version(model_path, metadata)
+
+    predictor = PlayerGoalPredictor(model_path=str(model_path))
+    if predictor.model is None or predictor.features is None:
+        print(f"[스코어링] 모델을 불러오지 못했습니다: {model_path}")
+        return None
+
+    analyzer = SeasonAnalyzer(player_data_path=data_path)
+    players, X, divisor = _player_inputs(analyzer, predictor.features, metadata)
+    preds, errors = predictor.predict_goals_batch(X)
+
+    per_match = preds / divisor.to_numpy()
+    table = pd.DataFrame({
+        "player_id": players.index.astype(np.int64),
+        "model_version": version,
+        "Player Name": players["Player Name"].to_numpy(),
+        "Club": players["Club"].to_numpy(),
+        "club_id": players["club_id"].to_numpy(),
+        "Matches": players["Matches"].to_numpy(),
+        "Minutes": players["Minutes"].to_numpy() if "Minutes" in players else np.nan,
+        "Goals": players[metadata["target"]].to_numpy(),
+        "Pred_Goals_per_Match": per_match,
+        "Pred_Goals": per_match * players["Matches"].to_numpy(),
+        "Error": errors,
+        "model_basis": metadata.get("basis", "total"),
+        "model_aggregate": metadata.get("aggregate", "match"),
+        "data_version": compute_data_version([data_path]),
+        "last_match": pd.to_datetime(players["Date"]).dt.date.astype(str).to_numpy(),
+        "scored_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    # 같은 버전은 교체, 다른 버전은 최근 MAX_VERSIONS개까지 유지
+    table_path = Path(table_path)
+    if table_path.exists():
+        old = pd.read_csv(table_path)
+        old = old[old["model_version"] != version]
+        keep = old.drop_duplicates("model_version", keep="last").sort_values("scored_at")["model_version"]
+        keep = keep.tail(MAX_VERSIONS - 1).tolist()
+        table = pd.concat([old[old["model_version"].isin(keep)], table], ignore_index=True)
+
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = table_path.with_suffix(".csv.tmp")
+    table.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, table_path)
+
+    print(f"✅ 예측 테이블 저장 완료: {table_path} (선수 {len(players)}명, 모델 {version}, 오류 {int(errors.sum())}행)")
+    return table
+
+
+class PredictionTable:
+    """
+    예측 테이블 조회기 (요청 경로에서는 딕셔너리 조회만)
+    - 파일이 바뀌면(mtime) 다음 조회 때 다시 읽음
+    """
+
+    def __init__(self, path=PREDICTION_TABLE_PATH):
+        self.path = Path(path)
+        self._mtime = None
+        self.rows = {}          # (player_id, model_version) → 행 dict
+        self.by_name = {}       # 정규화 이름 → player_id
+        self.latest_version = None
+
+    def _refresh(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.rows, self.by_name, self.latest_version, self._mtime = {}, {}, None, None
+            return
+        if mtime == self._mtime:
+            return
+
+        df = pd.read_csv(self.path)
+        df = df.astype(object).where(df.notna(), None)
+        self.rows = {(int(r["player_id"]), r["model_version"]): r for r in df.to_dict("records")}
+        self.by_name = dict(zip(normalize_name(df["Player Name"].astype(str)), df["player_id"].astype(int)))
+        self.latest_version = df.sort_values("scored_at")["model_version"].iloc[-1] if len(df) else None
+        self._mtime = mtime
+
+    def versions(self):
+        self._refresh()
+        return sorted({v for _, v in self.rows}, key=lambda v: v == self.latest_version)
+
+    def get(self, player_id, version=None):
+        """
+        player_id (+ 모델 버전, 기본 최신) → 예측 행 dict 또는 None
+        """
+        self._refresh()
+        return self.rows.get((int(player_id), version or self.latest_version))
+
+    def lookup(self, player_name, version=None):
+        """
+        선수 이름(대소문자/악센트 무관) → 예측 행. 정확히 일치하는 이름이 없으면 부분 일치 첫 선수
+        """
+        self._refresh()
+        # 대부분 입력은 소문자 변환만으로 키가 됨 (Series 정규화 비용 회피)
+        player_id = self.by_name.get(str(player_name).strip().lower())
+        if player_id is not None:
+            return self.get(player_id, version)
+        key = normalize_name(pd.Series([str(player_name)])).iloc[0]
+        player_id = self.by_name.get(key)
+        if player_id is None and key:
+            player_id = next((pid for name, pid in self.by_name.items() if key in name), None)
+        return None if player_id is None else self.get(player_id, version)
+
+    def top(self, n=20, version=None) -> pd.DataFrame:
+        self._refresh()
+        version = version or self.latest_version
+        rows = [r for (_, v), r in self.rows.items() if v == version]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values("Pred_Goals", ascending=False).head(n).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    score_players()
@@ -0,0 +1,94 @@
+import threading
+
+import pandas as pd
+
+try:
+    import duckdb  # pip install duckdb (애드혹 SQL 조회용, 없으면 query() 비활성)
+except ImportError:
+    duckdb = None
+
+# ==================================================
+# DuckDB 애드혹 쿼리 엔진 (분석가용 읽기 전용 SQL)
+#  - SeasonAnalyzer가 가진 DataFrame을 복사 없이 뷰로 등록
+#  - 파일/네트워크 접근 차단, SELECT 한 문장만 허용
+# ==================================================
+
+# 결과 행 수 상한 / 쿼리 시간 제한(초)
+MAX_ROWS = 10000
+QUERY_TIMEOUT_S = 10
+
+
+class QueryEngine:
+    """
+    SeasonAnalyzer(pandas backend)의 테이블을 DuckDB에 등록해 읽기 전용 SQL을 실행합니다.
+    """
+
+    def __init__(self, analyzer, threads=None):
+        if duckdb is None:
+            raise ImportError("SQL 쿼리 기능을 사용하려면 duckdb가 필요합니다. (pip install duckdb)")
+
+        config = {"enable_external_access": False}
+        if threads:
+            config["threads"] = int(threads)
+        self.conn = duckdb.connect(":memory:", config=config)
+        # 이후 SET 등으로 설정(외부 접근 등)을 바꾸지 못하게 고정
+        self.conn.execute("SET lock_configuration = true")
+        self._lock = threading.Lock()
+
+        # 테이블 이름은 analytics_store(SQLite)와 동일하게 맞춤
+        tables = {
+            "player_match": analyzer.player_data,
+            "team_match": analyzer.team_data,
+            "player_season": analyzer._aggregate_season_by_player_club(),
+            "big5_player": analyzer.big5_data,
+            "clubs": pd.DataFrame({
+                "club_id": list(analyzer.club_names),
+                "Club": list(analyzer.club_names.values()),
+            }),
+        }
+        for name, df in tables.items():
+            if df is not None:
+                # pandas DataFrame을 그대로 스캔 (숫자 컬럼은 복사 없음)
+                self.conn.register(name, df)
+
+    # --------------------------------------------------
+    # 읽기 전용 검사: SELECT(EXPLAIN 포함) 한 문장만 허용
+    # --------------------------------------------------
+    def _check_sql(self, sql):
+        if not str(sql or "").strip():
+            return "SQL이 비어있습니다."
+        try:
+            statements = self.conn.extract_statements(str(sql))
+        except Exception as e:
+            return f"SQL 구문 오류: {e}"
+        if len(statements) != 1:
+            return "한 번에 하나의 SELECT 문만 실행할 수 있습니다."
+        if statements[0].type not in (duckdb.StatementType.SELECT, duckdb.StatementType.EXPLAIN):
+            return f"읽기 전용 쿼리(SELECT)만 허용됩니다. (요청: {statements[0].type.name})"
+        return None
+
+    # --------------------------------------------------
+    # SQL 실행 → DataFrame (또는 format="arrow"일 때 pyarrow.Table)
+    # --------------------------------------------------
+    def run(self, sql, max_rows=MAX_ROWS, arrow=False):
+        err = self._check_sql(sql)
+        if err:
+            return {"error": err}
+
+        try:
+            max_rows = min(max(int(max_rows or MAX_ROWS), 1), MAX_ROWS)
+        except (TypeError, ValueError):
+            return {"error": f"max_rows는 정수여야 합니다. (받은 값: {max_rows})"}
+        timer = threading.Timer(QUERY_TIMEOUT_S, self.conn.interrupt)
+        with self._lock:
+            timer.start()
+            try:
+                rel = self.conn.sql(str(sql)).limit(max_rows + 1)
+                out = rel.fetch_arrow_table() if arrow else rel.df()
+            finally:
+                timer.cancel()
+
+        if len(out) > max_rows:
+            print(f"[쿼리] 결과가 {max_rows}행을 넘어 잘렸습니다.")
+            out = out.slice(0, max_rows) if arrow else out.head(max_rows)
+        return out
@@ -0,0 +1,95 @@
+# response_cache.py
+"""
+Flask 응답 캐시 (서버 메모리, 크기 제한 LRU)
+- 키: (라우트 경로, 정렬한 쿼리 인자, 데이터 버전). 데이터가 다시 로드되면 버전이 바뀌어 이전 응답은 조회되지 않음
+- 항목 수(max_entries)와 응답 본문 바이트(max_bytes) 둘 다 넘지 않도록 오래 안 쓴 응답부터 제거
+- 200 응답만 저장. 조회/적중/제거 횟수와 사용 바이트를 stats()로 확인
+"""
+import functools
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    app.route 아래에 @cache.cached(version_fn)로 붙여 사용
+    version_fn: 응답을 결정하는 데이터/모델 버전을 돌려주는 함수 (키에 포함)
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._data = OrderedDict()  # 키 → (본문 bytes, 상태 코드, mimetype)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, status, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self._data[key] = (body, status, mimetype)
+            self.bytes += len(body)
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                _, (old_body, _, _) = self._data.popitem(last=False)
+                self.bytes -= len(old_body)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def cached(self, version_fn):
+        """
+        라우트 데코레이터: 같은 경로/인자/버전이면 저장된 응답 본문을 그대로 반환
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (request.path, tuple(sorted(request.args.items(multi=True))), version_fn())
+                entry = self.get(key)
+                if entry is not None:
+                    body, status, mimetype = entry
+                    return Response(body, status=status, mimetype=mimetype, headers={"X-Cache": "HIT"})
+
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    self.put(key, response.get_data(), response.status_code, response.mimetype)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,231 @@
+# score_model.py
+"""
+경기 스코어 모델: Dixon-Coles (포아송 + 저득점 보정)
+- 홈 기대 득점 λ = exp(home + attack[홈] + defence[원정]), 원정 μ = exp(attack[원정] + defence[홈])
+  (defence는 '실점 성향': 클수록 많이 내줌)
+- 0:0 / 1:0 / 0:1 / 1:1 확률을 rho로 보정 (Dixon & Coles, 1997)
+- 전 경기에 대한 로그우도와 그래디언트를 벡터 연산으로 계산 → L-BFGS로 최대우도 추정
+- 시간 가중치 exp(-xi × 경과일)로 최근 경기를 더 크게 반영 (xi=0이면 가중치 없음)
+- 파라미터는 club_id로 바로 인덱싱하는 dense 배열
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import gammaln
+from scipy.stats import poisson
+
+BASE_DIR = Path(__file__).resolve().parent
+TEAM_DATA_PATH = BASE_DIR / "processed_data" / "team_data.csv"
+
+# 시간 감쇠(1/일): 0.0019 ≈ 반감기 1년
+TIME_DECAY_XI = 0.0019
+# 팀 파라미터 L2 정규화 (경기 수가 적은 팀 안정화) / 스코어 행렬 최대 득점
+RIDGE = 1e-3
+MAX_GOALS = 10
+# 가중치가 이보다 작은 오래된 경기는 학습에서 제외 (xi=0.0019 기준 약 6.6년 전)
+MIN_WEIGHT = 0.01
+
+
+class DixonColesModel:
+    """
+    Dixon-Coles 스코어 모델
+    - fit(team_df): 경기 데이터로 attack/defence/home/rho 추정
+    - score_matrix(home_ids, away_ids): (경기 수, G+1, G+1) 스코어 확률을 한 번에 계산
+    """
+
+    def __init__(self, xi=TIME_DECAY_XI, ridge=RIDGE, max_goals=MAX_GOALS, min_weight=MIN_WEIGHT):
+        self.xi = float(xi)
+        self.min_weight = float(min_weight)
+        self.ridge = float(ridge)
+        self.max_goals = int(max_goals)
+        self.attack = None
+        self.defence = None
+        self.home = 0.0
+        self.rho = 0.0
+        self.fit_info = {}
+
+    # --------------------------------------------------
+    # 학습 데이터: (홈 ID, 원정 ID, 홈 득점, 원정 득점, 시간 가중치)
+    # --------------------------------------------------
+    def _match_arrays(self, team_df: pd.DataFrame, as_of=None):
+        hg = pd.to_numeric(team_df["FTH Goals"], errors="coerce").to_numpy(np.float64)
+        ag = pd.to_numeric(team_df["FTA Goals"], errors="coerce").to_numpy(np.float64)
+        h = pd.to_numeric(team_df["home_club_id"], errors="coerce").to_numpy(np.float64)
+        a = pd.to_numeric(team_df["away_club_id"], errors="coerce").to_numpy(np.float64)
+        dates = pd.to_datetime(team_df["Date"], dayfirst=True, errors="coerce")
+
+        ok = ~(np.isnan(hg) | np.isnan(ag) | np.isnan(h) | np.isnan(a)) & dates.notna().to_numpy()
+        as_of = dates[ok].max() if as_of is None else pd.Timestamp(as_of)
+        # as_of 이후 경기는 제외 (과거 시점 재현용)
+        ok &= (dates <= as_of).to_numpy()
+
+        days_ago = (as_of - dates[ok]).dt.days.to_numpy(np.float64)
+        weights = np.exp(-self.xi * days_ago)
+        keep = weights >= self.min_weight
+        h, a, hg, ag = h[ok][keep], a[ok][keep], hg[ok][keep], ag[ok][keep]
+        return h.astype(np.int64), a.astype(np.int64), hg, ag, weights[keep], as_of
+
+    # --------------------------------------------------
+    # 음의 (가중) 로그우도와 그래디언트 (벡터화)
+    # --------------------------------------------------
+    @staticmethod
+    def _unpack(theta, n_teams):
+        return theta[:n_teams], theta[n_teams:2 * n_teams], theta[-2], theta[-1]
+
+    @staticmethod
+    def _low_score_index(x, y):
+        """
+        τ 보정 대상 경기 인덱스 (0:0, 0:1, 1:0, 1:1) - 학습 중 반복 계산하지 않도록 미리 구함
+        """
+        return tuple(np.flatnonzero((x == i) & (y == j)) for i, j in ((0, 0), (0, 1), (1, 0), (1, 1)))
+
+    def _nll_and_grad(self, theta, h, a, x, y, w, n_teams, const, low):
+        attack, defence, home, rho = self._unpack(theta, n_teams)
+        lam = np.exp(home + attack[h] + defence[a])
+        mu = np.exp(attack[a] + defence[h])
+
+        # 포아송 부분: x log λ - λ (log x! 항은 상수로 미리 계산)
+        ll = x * np.log(lam) - lam + y * np.log(mu) - mu - const
+        d_eta_h = x - lam
+        d_eta_a = y - mu
+        d_rho = np.zeros_like(lam)
+
+        # Dixon-Coles 저득점 보정 τ(x, y)
+        s00, s01, s10, s11 = low
+        tau = np.ones_like(lam)
+        tau[s00] = 1 - lam[s00] * mu[s00] * rho
+        tau[s01] = 1 + lam[s01] * rho
+        tau[s10] = 1 + mu[s10] * rho
+        tau[s11] = 1 - rho
+        if np.any(tau <= 0):
+            return np.inf, np.zeros_like(theta)
+        ll += np.log(tau)
+
+        # d log τ / d η = λ × d log τ / d λ (log link)
+        d_eta_h[s00] -= lam[s00] * mu[s00] * rho / tau[s00]
+        d_eta_a[s00] -= lam[s00] * mu[s00] * rho / tau[s00]
+        d_rho[s00] = -lam[s00] * mu[s00] / tau[s00]
+        d_eta_h[s01] += lam[s01] * rho / tau[s01]
+        d_rho[s01] = lam[s01] / tau[s01]
+        d_eta_a[s10] += mu[s10] * rho / tau[s10]
+        d_rho[s10] = mu[s10] / tau[s10]
+        d_rho[s11] = -1 / tau[s11]
+
+        wsum = w.sum()
+        gh = w * d_eta_h / wsum
+        ga = w * d_eta_a / wsum
+        g_attack = np.bincount(h, gh, n_teams) + np.bincount(a, ga, n_teams)
+        g_defence = np.bincount(a, gh, n_teams) + np.bincount(h, ga, n_teams)
+        g_home = gh.sum()
+        g_rho = (w * d_rho).sum() / wsum
+
+        # 식별성: sum(attack) = 0 페널티 + 팀 파라미터 L2
+        nll = -(w * ll).sum() / wsum
+        nll += 0.5 * attack.sum() ** 2 + 0.5 * self.ridge * (attack @ attack + defence @ defence)
+        grad = -np.concatenate([g_attack, g_defence, [g_home, g_rho]])
+        grad[:n_teams] += attack.sum() + self.ridge * attack
+        grad[n_teams:2 * n_teams] += self.ridge * defence
+        return nll, grad
+
+    def fit(self, team_df: pd.DataFrame, as_of=None):
+        """
+        경기 데이터로 최대우도 추정 (as_of: 이 날짜까지의 경기만 사용, 가중치 기준일)
+        """
+        start = time.perf_counter()
+        h, a, x, y, w, as_of = self._match_arrays(team_df, as_of)
+        # 최근 경기가 없는 팀도 인덱싱 가능하도록 전체 club_id 범위로 잡음 (파라미터 0 = 리그 평균)
+        n_teams = int(pd.to_numeric(team_df[["home_club_id", "away_club_id"]].stack(), errors="coerce").max()) + 1
+        const = gammaln(x + 1) + gammaln(y + 1)
+        low = self._low_score_index(x, y)
+
+        theta0 = np.zeros(2 * n_teams + 2)
+        theta0[-2] = 0.25
+        bounds = [(None, None)] * (2 * n_teams + 1) + [(-0.2, 0.2)]
+        res = minimize(
+            self._nll_and_grad, theta0, args=(h, a, x, y, w, n_teams, const, low),
+            jac=True, method="L-BFGS-B", bounds=bounds,
+        )
+
+        self.attack, self.defence, self.home, self.rho = self._unpack(res.x, n_teams)
+        self.home, self.rho = float(self.home), float(self.rho)
+        self.fit_info = {
+            "matches": int(len(x)),
+            "as_of": str(as_of.date()),
+            "xi": self.xi,
+            "nll": float(res.fun),
+            "iterations": int(res.nit),
+            "converged": bool(res.success),
+            "fit_time_s": time.perf_counter() - start,
+        }
+        return self
+
+    # --------------------------------------------------
+    # 예측: 기대 득점 / 스코어 확률 행렬 / 승무패 확률
+    # --------------------------------------------------
+    def expected_goals(self, home_ids, away_ids):
+        h = np.asarray(home_ids, dtype=np.int64)
+        a = np.asarray(away_ids, dtype=np.int64)
+        lam = np.exp(self.home + self.attack[h] + self.defence[a])
+        mu = np.exp(self.attack[a] + self.defence[h])
+        return lam, mu
+
+    def score_matrix(self, home_ids, away_ids):
+        """
+        (경기 수, G+1, G+1) 배열. [k, i, j] = k번째 경기가 홈 i : 원정 j로 끝날 확률
+        """
+        lam, mu = self.expected_goals(home_ids, away_ids)
+        goals = np.arange(self.max_goals + 1)
+        ph = poisson.pmf(goals[None, :], lam[:, None])
+        pa = poisson.pmf(goals[None, :], mu[:, None])
+        m = ph[:, :, None] * pa[:, None, :]
+
+        rho = self.rho
+        m[:, 0, 0] *= 1 - lam * mu * rho
+        m[:, 0, 1] *= 1 + lam * rho
+        m[:, 1, 0] *= 1 + mu * rho
+        m[:, 1, 1] *= 1 - rho
+        return m
+
+    def outcome_probabilities(self, home_ids, away_ids):
+        """
+        (경기 수, 3) 배열: 홈승 / 무 / 원정승 (max_goals 초과분은 정규화로 흡수)
+        """
+        m = self.score_matrix(home_ids, away_ids)
+        home_win = np.tril(np.ones(m.shape[1:]), -1)
+        away_win = home_win.T
+        draw = np.eye(m.shape[1])
+        p = np.stack([(m * home_win).sum((1, 2)), (m * draw).sum((1, 2)), (m * away_win).sum((1, 2))], axis=1)
+        return p / p.sum(axis=1, keepdims=True)
+
+    def team_table(self, team_ids=None, club_names=None) -> pd.DataFrame:
+        """
+        팀별 공격/수비 지표 (리그 평균 대비 배수)
+        """
+        if team_ids is None:
+            team_ids = np.flatnonzero((self.attack != 0) | (self.defence != 0))
+        ids = np.asarray(team_ids, dtype=np.int64)
+        out = pd.DataFrame({
+            "club_id": ids,
+            "Attack": np.exp(self.attack[ids]),
+            "Defence": np.exp(self.defence[ids]),
+        })
+        if club_names:
+            out.insert(1, "Club", out["club_id"].map(club_names).fillna(out["club_id"].astype(str)))
+        return out.sort_values("Attack", ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    team_df = pd.read_csv(TEAM_DATA_PATH)
+    model = DixonColesModel().fit(team_df)
+    info = model.fit_info
+    print(f"Dixon-Coles 학습: {info['matches']}경기, {info['iterations']}회 반복, "
+          f"{info['fit_time_s']:.2f}초 (home={model.home:.3f}, rho={model.rho:.3f})")
+
+    start = time.perf_counter()
+    ids = np.unique(np.concatenate([team_df["home_club_id"], team_df["away_club_id"]]))
+    home_ids, away_ids = np.meshgrid(ids, ids, indexing="ij")
+    p = model.outcome_probabilities(home_ids.ravel(), away_ids.ravel())
+    print(f"전체 팀 조합 {len(p)}경기 스코어 행렬: {time.perf_counter() - start:.3f}초")
@@ -1,7 +1,19 @@
+import hashlib
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from team_features import find_club
+from team_ratings import EloRatings
+from season_simulator import simulate_season, N_SIMS
+from identity_resolution import normalize_club
+
+try:
+    import pyarrow as pa  # pip install pyarrow (format="arrow"일 때만 필요)
+except ImportError:
+    pa = None
+
 # ==================================================
 # 이 파일(season_analyzer.py)이 있는 폴더 = files
 # ==================================================
@@ -10,20 +22,139 @@ PROCESSED_DATA_DIR = BASE_DIR / "processed_data"
 
 TEAM_DATA_PATH = PROCESSED_DATA_DIR / "team_data.csv"
 PLAYER_DATA_PATH = PROCESSED_DATA_DIR / "player_data.csv"
+BIG5_DATA_PATH = PROCESSED_DATA_DIR / "big5_player_data.csv"
+MATCH_INDEX_PATH = PROCESSED_DATA_DIR / "player_match_index.csv"
+CLUB_INDEX_PATH = PROCESSED_DATA_DIR / "club_index.csv"
+
+# league 인자로 Big5 전체를 뜻하는 값
+ALL_LEAGUES = ("all", "big5")
+
+# Big5 테이블 컴팩트 타입
+BIG5_CATEGORY_COLS = ["Club", "Position", "Nation", "Comp"]
+BIG5_INT_COLS = [
+    "Appearances", "Starts", "Minutes", "Goals", "Assists", "Shots", "Shots On Target",
+    "Passes Completed", "Passes Attempted", "Progressive Passes", "Progressive Carries",
+    "Touches", "Tackles", "Blocks", "Yellow Cards", "Red Cards", "Fouls", "Total_Cards",
+]
+
+# 결과 반환 형식
+# - records  : [{col: val}, ...] (기존 기본값)
+# - columns  : {col: [val, ...]} (컬럼 지향, API용 JSON)
+# - split    : {"columns": [...], "data": [[...], ...]}
+# - dataframe: pandas DataFrame 그대로 (Streamlit용, 변환 없음)
+# - arrow    : pyarrow.Table
+RESULT_FORMATS = ("records", "columns", "split", "dataframe", "arrow")
+
+
+def format_result(df: pd.DataFrame, format="records"):
+    """
+    분석 결과 DataFrame을 요청한 형식으로 변환합니다.
+    """
+    if format == "records":
+        return df.to_dict("records")
+    if format == "dataframe":
+        return df.reset_index(drop=True)
+    if format == "columns":
+        return {c: df[c].tolist() for c in df.columns}
+    if format == "split":
+        return df.to_dict("split", index=False)
+    if format == "arrow":
+        if pa is None:
+            raise ImportError("format='arrow'를 사용하려면 pyarrow가 필요합니다.")
+        return pa.Table.from_pandas(df, preserve_index=False)
+    raise ValueError(f"지원하지 않는 결과 형식입니다: {format} (가능: {RESULT_FORMATS})")
+
+
+def compute_data_version(paths=(PLAYER_DATA_PATH, TEAM_DATA_PATH, BIG5_DATA_PATH, MATCH_INDEX_PATH)):
+    """
+    전처리 결과 파일 내용의 해시 (캐시 키용). 파일이 바뀌면 값이 바뀝니다.
+    """
+    h = hashlib.sha1()
+    for path in paths:
+        path = Path(path)
+        h.update(path.name.encode())
+        if path.exists():
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def normalize_season(season):
+    """
+    시즌 표기 통일: "2024-2025" / "2024-25" / "2024/25" / 2024 → "2024/25" (알 수 없으면 None)
+    """
+    s = str(season or "").strip()
+    if not s[:4].isdigit():
+        return None
+    start = int(s[:4])
+    return f"{start}/{str(start + 1)[2:]}"
+
+
+def resolve_league(league, comps):
+    """
+    league 인자를 Big5 리그(Comp) 이름으로 변환합니다. ("La Liga" / "la liga" / "es La Liga" 모두 허용)
+    """
+    key = str(league).strip().lower()
+    for comp in comps:
+        if key == comp.lower() or key.endswith(" " + comp.lower()):
+            return comp
+    return None
 
 
 class SeasonAnalyzer:
     """
     전처리된 데이터를 로드하여 팀/선수 성과를 분석하는 클래스 (실데이터 기반)
     - 로드시 컬럼 표준화(Player Name, Club, Shots, xG, xA, Date 등) 수행
+    - backend="sqlite": DataFrame을 올리지 않고 analytics_store의 SQLite 파일에서 SQL로 랭킹 조회
     """
 
-    def __init__(self, team_data_path=TEAM_DATA_PATH, player_data_path=PLAYER_DATA_PATH):
+    def __init__(self, team_data_path=TEAM_DATA_PATH, player_data_path=PLAYER_DATA_PATH,
+                 big5_data_path=BIG5_DATA_PATH, match_index_path=MATCH_INDEX_PATH,
+                 club_index_path=CLUB_INDEX_PATH, backend="pandas", store_path=None):
         print("SeasonAnalyzer 초기화 중...")
 
+        self.backend = backend
+        self.store = None
+        self.team_data = None
+        self.player_data = None
+        self.big5_data = None
+        self.big5_partitions = {}
+        self._season_agg = None
+        self.club_names = {}
+        self.player_match_season = None
+        self._query_engine = None
+        self._team_matches = None
+        self._ratings = None
+        self._club_keys = None
+        if backend == "sqlite":
+            from analytics_store import AnalyticsStore, STORE_PATH
+            self.store = AnalyticsStore(store_path or STORE_PATH)
+            # 저장소는 한 번에 다시 만들어지므로 생성 시각이 곧 데이터 버전
+            # 원본 CSV도 감시: 저장소 재생성 없이 전처리만 다시 했으면 다시 로드 시 경고가 보임
+            self.data_paths = [self.store.db_path, *self.store.source_paths]
+            self.data_version = f"sqlite-{self.store.meta.get('built_at')}"
+            print(f"SQLite 분석 저장소 연결 완료 ({self.store.db_path}, 리그: {self.store.leagues})")
+            return
+        if backend != "pandas":
+            raise ValueError(f"지원하지 않는 backend입니다: {backend} (가능: pandas, sqlite)")
+
+        # 응답 캐시 등의 키: 로드한 파일 내용 해시 (파일이 바뀌어 다시 로드하면 값이 바뀜)
+        self.data_paths = [Path(p) for p in (team_data_path, player_data_path, big5_data_path,
+                                              match_index_path, club_index_path)]
+        self.data_version = compute_data_version(self.data_paths)
+
         self.team_data = self._load_csv(team_data_path)
         self.player_data_raw = self._load_csv(player_data_path)
-        self.player_data = None
+
+        # Europe Big5 시즌 테이블 (리그 간 비교용, 없으면 PL 데이터만 사용)
+        big5_raw = self._load_csv(big5_data_path)
+        if big5_raw is not None:
+            self.big5_data = self._standardize_big5_data(big5_raw)
+            self.big5_partitions = {
+                str(comp): g for comp, g in self.big5_data.groupby("Comp", observed=True)
+            }
+            print(f"Big5 선수 데이터 로드 완료 (행: {len(self.big5_data)}, 리그: {list(self.big5_partitions)})")
 
         if self.player_data_raw is None:
             print(f"오류: '{player_data_path}'에서 선수 데이터를 로드하지 못했습니다.")
@@ -31,6 +162,12 @@ class SeasonAnalyzer:
 
         self.player_data = self._standardize_player_data(self.player_data_raw)
 
+        # 선수 경기 ↔ 팀 경기 조인 인덱스 (상대팀/홈·원정/결과/팀 득점)
+        club_index = self._load_csv(club_index_path)
+        if club_index is not None:
+            self.club_names = dict(zip(club_index["club_id"], club_index["Club"]))
+        self._attach_match_index(self._load_csv(match_index_path))
+
         if self.player_data is not None and len(self.player_data) > 0:
             print("선수 데이터 로드/표준화 완료. 분석기 준비 완료.")
         else:
@@ -117,14 +254,143 @@ class SeasonAnalyzer:
         df["Goals_per90"] = np.where(df["Minutes"] > 0, (df["Goals"] / minutes_nz) * 90, 0)
         df["Assists_per90"] = np.where(df["Minutes"] > 0, (df["Assists"] / minutes_nz) * 90, 0)
 
+        # 전처리에서 통합된 정수 ID (있으면 집계 키로 사용)
+        for c in ["player_id", "club_id"]:
+            if c in df.columns:
+                df[c] = self._to_num(df[c]).astype("int32")
+        keys = self._player_keys(df)
+
         if df["Date"].notna().any():
-            df["Appearances"] = df.groupby(["Player Name", "Club"])["Date"].transform("nunique")
+            df["Appearances"] = df.groupby(keys)["Date"].transform("nunique")
         else:
-            df["Appearances"] = df.groupby(["Player Name", "Club"])["Goals"].transform("count")
+            df["Appearances"] = df.groupby(keys)["Goals"].transform("count")
 
         df = df.replace([np.inf, -np.inf], np.nan).fillna(0)
         return df
 
+    # --------------------------------------------------
+    # 조인 인덱스를 player_data 컬럼으로 붙이기 (행 순서가 같아야 함)
+    # --------------------------------------------------
+    def _attach_match_index(self, index):
+        if index is None or self.player_data is None or self.team_data is None:
+            return
+        if len(index) != len(self.player_data) or "club_id" not in self.player_data.columns:
+            print("경고: 조인 인덱스가 player_data와 맞지 않습니다. data_preprocessor.py를 다시 실행하세요.")
+            return
+
+        index = index.sort_values("player_row")
+        df = self.player_data
+        df["Match_Row"] = index["match_row"].to_numpy(np.int32)
+        df["Home"] = index["is_home"].to_numpy(np.int8)
+        df["Opponent_ID"] = index["opponent_club_id"].to_numpy(np.int32)
+        df["Opponent"] = df["Opponent_ID"].map(self.club_names).fillna("")
+        df["Team_Goals"] = index["team_goals"].to_numpy(np.int16)
+        df["Opp_Goals"] = index["opp_goals"].to_numpy(np.int16)
+        df["Result"] = index["result"].fillna("").astype(str).to_numpy()
+
+        # 선수 데이터가 속한 리그/시즌 (상대팀 순위 계산용)
+        matched = df.loc[df["Match_Row"] >= 0, "Match_Row"]
+        if len(matched):
+            ls = self.team_data.iloc[matched.to_numpy()][["League", "Season"]].value_counts().idxmax()
+            self.player_match_season = (ls[0], ls[1])
+
+    # --------------------------------------------------
+    # 리그 순위표 (team_data에서 벡터화 집계)
+    # --------------------------------------------------
+    def _league_table(self, league="PL", season=None):
+        t = self.team_data
+        if t is None or "home_club_id" not in t.columns:
+            return None
+        if league:
+            t = t[t["League"] == league]
+        if season is None:
+            season = t["Season"].max()
+        t = t[t["Season"] == season]
+        if t.empty:
+            return None
+
+        hg = self._to_num(t["FTH Goals"]).to_numpy()
+        ag = self._to_num(t["FTA Goals"]).to_numpy()
+        sides = pd.DataFrame({
+            "club_id": np.concatenate([t["home_club_id"].to_numpy(), t["away_club_id"].to_numpy()]),
+            "GF": np.concatenate([hg, ag]),
+            "GA": np.concatenate([ag, hg]),
+        })
+        sides["Pts"] = np.select([sides["GF"] > sides["GA"], sides["GF"] == sides["GA"]], [3, 1], 0)
+
+        table = sides.groupby("club_id").agg(
+            Played=("Pts", "size"), GF=("GF", "sum"), GA=("GA", "sum"), Pts=("Pts", "sum")
+        ).reset_index()
+        table["GD"] = table["GF"] - table["GA"]
+        table["Club"] = table["club_id"].map(self.club_names).fillna(table["club_id"].astype(str))
+        table = table.sort_values(["Pts", "GD", "GF"], ascending=False).reset_index(drop=True)
+        table.insert(0, "Rank", np.arange(1, len(table) + 1))
+        return table
+
+    # --------------------------------------------------
+    # 내부 유틸: 경기 단위 분석(PL 전용) 공통 체크
+    # --------------------------------------------------
+    def _match_level_check(self, league=None, need_index=False):
+        if league is not None:
+            return {"error": "이 분석은 경기 단위 데이터(PL)만 지원합니다. (Big5는 시즌 누적 데이터)"}
+        if self.store is not None:
+            return None
+        if self.player_data is None:
+            return {"error": "선수 데이터가 로드되지 않았습니다."}
+        if need_index and "Match_Row" not in self.player_data.columns:
+            return {"error": "선수-팀 경기 조인 인덱스가 없습니다. data_preprocessor.py를 다시 실행하세요."}
+        return None
+
+    # --------------------------------------------------
+    # 내부 유틸: SQLite 저장소(backend="sqlite") 결과 → 요청 형식
+    # --------------------------------------------------
+    def _from_store(self, method, format="records", **kwargs):
+        out = getattr(self.store, method)(**kwargs)
+        if isinstance(out, dict):
+            return out
+        return format_result(out, format)
+
+    # --------------------------------------------------
+    # 내부 유틸: 선수-클럽 집계 키 (정수 ID 우선, 없으면 이름 문자열)
+    # --------------------------------------------------
+    @staticmethod
+    def _player_keys(df):
+        if "player_id" in df.columns and "club_id" in df.columns:
+            return ["player_id", "club_id"]
+        return ["Player Name", "Club"]
+
+    # --------------------------------------------------
+    # Big5 시즌 테이블 표준화 (컴팩트 타입 + 랭킹용 파생 컬럼)
+    # --------------------------------------------------
+    def _standardize_big5_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        df.columns = df.columns.astype(str).str.strip()
+
+        for c in ["Player Name"] + BIG5_CATEGORY_COLS:
+            if c not in df.columns:
+                df[c] = ""
+            df[c] = df[c].fillna("").astype(str)
+
+        for c in BIG5_INT_COLS + ["player_id", "club_id"]:
+            df[c] = self._to_num(df[c]).astype("int32") if c in df.columns else np.int32(0)
+
+        for c in ["xG", "xA", "Conversion_Rate", "Goals_per90", "Assists_per90", "Shots_Accuracy"]:
+            df[c] = self._to_num(df[c]) if c in df.columns else 0.0
+
+        df["OverUnder_xG"] = df["Goals"] - df["xG"]
+        df["League"] = df["Comp"]
+
+        for c in BIG5_CATEGORY_COLS + ["League"]:
+            df[c] = df[c].astype("category")
+
+        return df
+
+    # --------------------------------------------------
+    # 내부 유틸: league 인자 → Big5 파티션 키
+    # --------------------------------------------------
+    def _resolve_league(self, league):
+        return resolve_league(league, self.big5_partitions)
+
     # ==================================================
     # 공통: 시즌 누적(중복 제거) 집계 테이블 만들기
     # ==================================================
@@ -132,12 +398,19 @@ class SeasonAnalyzer:
         if self.player_data is None:
             return None
 
-        df = self.player_data.copy()
+        # player_data는 로드 후 바뀌지 않으므로 한 번만 집계
+        if self._season_agg is not None:
+            return self._season_agg
+
+        df = self.player_data
+        keys = self._player_keys(df)
+        names = {c: (c, "first") for c in ["Player Name", "Club"] if c not in keys}
 
         agg = (
-            df.groupby(["Player Name", "Club"], as_index=False)
+            df.groupby(keys, as_index=False)
               .agg(
-                  Position=("Position", lambda x: x.iloc[0] if len(x) else ""),
+                  **names,
+                  Position=("Position", "first"),
                   Goals=("Goals", "sum"),
                   Assists=("Assists", "sum"),
                   Shots=("Shots", "sum"),
@@ -152,26 +425,61 @@ class SeasonAnalyzer:
         agg["Conversion_Rate"] = np.where(agg["Shots"] > 0, (agg["Goals"] / agg["Shots"]) * 100, 0)
         agg["OverUnder_xG"] = agg["Goals"] - agg["xG"]
 
+        self._season_agg = agg
         return agg
 
     # ==================================================
-    # 1) Top Scorers
+    # 공통: 랭킹용 시즌 테이블 (리그 필터)
+    #  - league=None       : PL 경기 단위 데이터 집계 (기존 동작)
+    #  - league="all"      : Big5 전체
+    #  - league="La Liga"  : Big5의 해당 리그(Comp) 파티션
     # ==================================================
-    def get_top_scorers(self, top_n=20):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
+    def _season_table(self, league=None):
+        if league is None:
+            if self.player_data is None:
+                return {"error": "선수 데이터가 로드되지 않았습니다."}
+            agg = self._aggregate_season_by_player_club()
+        else:
+            if self.big5_data is None:
+                return {"error": "Big5 선수 데이터가 로드되지 않았습니다. data_preprocessor.py를 먼저 실행하세요."}
+            if str(league).strip().lower() in ALL_LEAGUES:
+                agg = self.big5_data
+            else:
+                comp = self._resolve_league(league)
+                if comp is None:
+                    return {"error": f"알 수 없는 리그입니다: {league} (가능: {list(self.big5_partitions)})"}
+                agg = self.big5_partitions[comp]
+
+        if agg is None or agg.empty:
+            return {"error": "집계 데이터가 비어있습니다."}
+        return agg
 
+    @staticmethod
+    def _with_league(cols, agg):
+        # Big5 결과에는 Club 뒤에 League 컬럼을 함께 표시
+        if "League" in agg.columns and "League" not in cols:
+            i = cols.index("Club") + 1 if "Club" in cols else 0
+            cols = cols[:i] + ["League"] + cols[i:]
+        return cols
+
+    # ==================================================
+    # 1) Top Scorers
+    # ==================================================
+    def get_top_scorers(self, top_n=20, format="records", league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
+            if self.store is not None:
+                return self._from_store("top_scorers", format, top_n=top_n, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
 
-            agg = agg.sort_values("Goals", ascending=False)
             if top_n is not None:
-                agg = agg.head(int(top_n))
+                agg = agg.nlargest(int(top_n), "Goals")
+            else:
+                agg = agg.sort_values("Goals", ascending=False, kind="mergesort")
 
-            cols = ["Player Name", "Club", "Goals", "Appearances"]
-            return agg[cols].to_dict("records")
+            cols = self._with_league(["Player Name", "Club", "Goals", "Appearances"], agg)
+            return format_result(agg[cols], format)
 
         except Exception as e:
             print(f"Top 득점자 분석 중 오류 발생: {e}")
@@ -180,25 +488,24 @@ class SeasonAnalyzer:
     # ==================================================
     # 2) 슈팅 대비 득점 효율
     # ==================================================
-    def get_efficient_finishers(self, min_shots=0, top_n=None):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
+    def get_efficient_finishers(self, min_shots=0, top_n=None, format="records", league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
+            if self.store is not None:
+                return self._from_store("efficient_finishers", format, min_shots=min_shots, top_n=top_n, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
 
             min_shots = int(min_shots) if min_shots is not None else 0
             agg = agg[agg["Shots"] >= min_shots]
 
-            agg = agg.sort_values("Conversion_Rate", ascending=False)
+            agg = agg.sort_values("Conversion_Rate", ascending=False, kind="mergesort")
 
             if top_n is not None:
                 agg = agg.head(int(top_n))
 
-            cols = ["Player Name", "Club", "Shots", "Goals", "Conversion_Rate"]
-            return agg[cols].to_dict("records")
+            cols = self._with_league(["Player Name", "Club", "Shots", "Goals", "Conversion_Rate"], agg)
+            return format_result(agg[cols], format)
 
         except Exception as e:
             print(f"슈팅 효율 분석 중 오류 발생: {e}")
@@ -206,51 +513,49 @@ class SeasonAnalyzer:
 
     # ==================================================
     # 3) 최근 폼 랭킹 (최근 N경기)
+    #  - 경기 단위 데이터가 필요하므로 PL(league=None)만 지원
     # ==================================================
-    def get_recent_form_ranking(self, last_n=5, metric="Goals", top_n=20):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
-        df = self.player_data.copy()
-        has_date = df["Date"].notna().any()
+    def get_recent_form_ranking(self, last_n=5, metric="Goals", top_n=20, format="records", league=None):
+        err = self._match_level_check(league)
+        if err:
+            return err
 
         try:
-            rows = []
-            for (p, c), g in df.groupby(["Player Name", "Club"]):
-                g = g.copy()
-                if has_date:
-                    g = g.sort_values("Date")
-                g_last = g.tail(int(last_n))
-
-                goals = g_last["Goals"].sum()
-                assists = g_last["Assists"].sum()
-                shots = g_last["Shots"].sum()
-                xg = g_last["xG"].sum()
-                conv = (goals / shots) * 100 if shots > 0 else 0
-
-                rows.append({
-                    "Player Name": p,
-                    "Club": c,
-                    "Goals": goals,
-                    "Assists": assists,
-                    "Shots": shots,
-                    "xG": xg,
-                    "Conversion_Rate": conv,
-                    "Matches(Recent)": len(g_last),
-                })
-
-            out = pd.DataFrame(rows)
+            if self.store is not None:
+                return self._from_store("recent_form", format, last_n=last_n, metric=metric, top_n=top_n)
+
+            df = self.player_data
+            has_date = df["Date"].notna().any()
+
+            # 날짜순 정렬 후 선수-클럽별 마지막 N경기만 남겨 한 번에 집계 (선수 루프 없음)
+            keys = self._player_keys(df)
+            if has_date:
+                df = df.sort_values("Date", kind="mergesort")
+            g_last = df.groupby(keys, sort=False).tail(int(last_n))
+
+            names = {c: (c, "first") for c in ["Player Name", "Club"] if c not in keys}
+            out = g_last.groupby(keys, as_index=False).agg(
+                **names,
+                Goals=("Goals", "sum"),
+                Assists=("Assists", "sum"),
+                Shots=("Shots", "sum"),
+                xG=("xG", "sum"),
+                **{"Matches(Recent)": ("Goals", "size")},
+            )
+            out["Conversion_Rate"] = np.where(out["Shots"] > 0, (out["Goals"] / out["Shots"]) * 100, 0)
+            out = out[["Player Name", "Club", "Goals", "Assists", "Shots", "xG", "Conversion_Rate", "Matches(Recent)"]]
+
             if out.empty:
                 return {"error": "최근 폼 집계 결과가 비어있습니다."}
 
             if metric not in out.columns:
                 metric = "Goals"
-            out = out.sort_values(metric, ascending=False)
+            out = out.sort_values(metric, ascending=False, kind="mergesort")
 
             if top_n is not None:
                 out = out.head(int(top_n))
 
-            return out.to_dict("records")
+            return format_result(out, format)
 
         except Exception as e:
             print(f"최근 폼 분석 중 오류 발생: {e}")
@@ -259,14 +564,14 @@ class SeasonAnalyzer:
     # ==================================================
     # 4) 포지션별 랭킹
     # ==================================================
-    def get_position_ranking(self, position_keyword="FW", metric="Goals", top_n=20):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
+    def get_position_ranking(self, position_keyword="FW", metric="Goals", top_n=20, format="records", league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
+            if self.store is not None:
+                return self._from_store("position_ranking", format, position_keyword=position_keyword, metric=metric,
+                                        top_n=top_n, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
 
             if position_keyword:
                 mask = agg["Position"].astype(str).str.upper().str.contains(str(position_keyword).upper(), na=False)
@@ -278,13 +583,13 @@ class SeasonAnalyzer:
             if metric not in agg.columns:
                 metric = "Goals"
 
-            agg = agg.sort_values(metric, ascending=False)
+            agg = agg.sort_values(metric, ascending=False, kind="mergesort")
             if top_n is not None:
                 agg = agg.head(int(top_n))
 
             cols = ["Player Name", "Club", "Position", metric, "Goals", "Assists", "Shots", "xG", "Conversion_Rate"]
-            cols = [c for c in cols if c in agg.columns]
-            return agg[cols].to_dict("records")
+            cols = self._with_league(list(dict.fromkeys(c for c in cols if c in agg.columns)), agg)
+            return format_result(agg[cols], format)
 
         except Exception as e:
             print(f"포지션 랭킹 분석 중 오류 발생: {e}")
@@ -293,25 +598,24 @@ class SeasonAnalyzer:
     # ==================================================
     # 5) xG 오버/언더 퍼포머
     # ==================================================
-    def get_xg_over_under(self, top_n=20, mode="over"):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
+    def get_xg_over_under(self, top_n=20, mode="over", format="records", league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
+            if self.store is not None:
+                return self._from_store("xg_over_under", format, top_n=top_n, mode=mode, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
 
             if mode == "under":
-                agg = agg.sort_values("OverUnder_xG", ascending=True)
+                agg = agg.sort_values("OverUnder_xG", ascending=True, kind="mergesort")
             else:
-                agg = agg.sort_values("OverUnder_xG", ascending=False)
+                agg = agg.sort_values("OverUnder_xG", ascending=False, kind="mergesort")
 
             if top_n is not None:
                 agg = agg.head(int(top_n))
 
-            cols = ["Player Name", "Club", "Goals", "xG", "OverUnder_xG", "Shots", "Conversion_Rate"]
-            return agg[cols].to_dict("records")
+            cols = self._with_league(["Player Name", "Club", "Goals", "xG", "OverUnder_xG", "Shots", "Conversion_Rate"], agg)
+            return format_result(agg[cols], format)
 
         except Exception as e:
             print(f"xG 오버/언더 분석 중 오류 발생: {e}")
@@ -320,47 +624,44 @@ class SeasonAnalyzer:
     # ==================================================
     # 6) 팀 의존도 (Top1/Top3 득점 비중)
     # ==================================================
-    def get_team_dependency(self, top_n_teams=20, top_n=None):
-        if self.player_data is None:
-            top_n_teams = top_n
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
+    def get_team_dependency(self, top_n_teams=20, top_n=None, format="records", league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
-
-            teams = []
-            for club, g in agg.groupby("Club"):
-                team_goals = g["Goals"].sum()
-                if team_goals <= 0:
-                    continue
-
-                g_sorted = g.sort_values("Goals", ascending=False)
-                top1 = g_sorted.iloc[0]
-                top3 = g_sorted.head(3)
-
-                top1_share = (top1["Goals"] / team_goals) * 100
-                top3_share = (top3["Goals"].sum() / team_goals) * 100
-
-                teams.append({
-                    "Club": club,
-                    "Team_Goals": team_goals,
-                    "Top1_Player": top1["Player Name"],
-                    "Top1_Goals": top1["Goals"],
-                    "Top1_Share(%)": top1_share,
-                    "Top3_Share(%)": top3_share,
-                })
-
-            out = pd.DataFrame(teams)
+            if self.store is not None:
+                return self._from_store("team_dependency", format, top_n_teams=top_n_teams, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
+
+            keys = ["League", "Club"] if "League" in agg.columns else ["Club"]
+
+            # 팀별 득점 내림차순 정렬 후 팀 내 순위(0, 1, 2...)로 Top1/Top3 계산 (팀 루프 없음)
+            g = agg[keys + ["Player Name", "Goals"]].sort_values(
+                keys + ["Goals"], ascending=[True] * len(keys) + [False], kind="mergesort"
+            )
+            rank = g.groupby(keys, observed=True).cumcount()
+
+            team_goals = g.groupby(keys, observed=True)["Goals"].sum()
+            top3_goals = g[rank < 3].groupby(keys, observed=True)["Goals"].sum()
+            top1 = g[rank == 0].set_index(keys)
+
+            out = pd.DataFrame({
+                "Team_Goals": team_goals,
+                "Top1_Player": top1["Player Name"],
+                "Top1_Goals": top1["Goals"],
+            })
+            out["Top1_Share(%)"] = (out["Top1_Goals"] / out["Team_Goals"]) * 100
+            out["Top3_Share(%)"] = (top3_goals / out["Team_Goals"]) * 100
+            out = out[out["Team_Goals"] > 0].reset_index()
+
             if out.empty:
                 return {"error": "팀 의존도 결과가 비어있습니다."}
 
-            out = out.sort_values("Top1_Share(%)", ascending=False)
+            out = out[keys[::-1] + ["Team_Goals", "Top1_Player", "Top1_Goals", "Top1_Share(%)", "Top3_Share(%)"]]
+            out = out.sort_values("Top1_Share(%)", ascending=False, kind="mergesort")
             if top_n_teams is not None:
                 out = out.head(int(top_n_teams))
 
-            return out.to_dict("records")
+            return format_result(out, format)
 
         except Exception as e:
             print(f"팀 의존도 분석 중 오류 발생: {e}")
@@ -369,14 +670,13 @@ class SeasonAnalyzer:
     # ==================================================
     # 7) 선수 시즌 집계 1행 가져오기 (검색용)
     # ==================================================
-    def get_player_season_summary(self, player_name_keyword: str):
-        if self.player_data is None:
-            return {"error": "선수 데이터가 로드되지 않았습니다."}
-
+    def get_player_season_summary(self, player_name_keyword: str, league=None):
         try:
-            agg = self._aggregate_season_by_player_club()
-            if agg is None or agg.empty:
-                return {"error": "집계 데이터가 비어있습니다."}
+            if self.store is not None:
+                return self.store.player_season_summary(player_name_keyword, league=league)
+            agg = self._season_table(league)
+            if isinstance(agg, dict):
+                return agg
 
             mask = agg["Player Name"].astype(str).str.lower().str.contains(str(player_name_keyword).lower(), na=False)
             results = agg[mask].copy()
@@ -384,17 +684,228 @@ class SeasonAnalyzer:
             if results.empty:
                 return {"error": f"'{player_name_keyword}' 선수를 찾을 수 없습니다."}
 
-            results = results.sort_values("Goals", ascending=False)
+            results = results.sort_values("Goals", ascending=False, kind="mergesort")
             return results.iloc[0].to_dict()
 
         except Exception as e:
             print(f"선수 시즌 요약 검색 중 오류 발생: {e}")
             return {"error": "선수 시즌 요약 검색 중 오류가 발생했습니다."}
 
+    # ==================================================
+    # 9) 강팀(상위 K팀) 상대 득점 랭킹
+    # ==================================================
+    def get_goals_vs_top_opponents(self, top_k=6, top_n=20, format="records", league=None):
+        err = self._match_level_check(league, need_index=True)
+        if err:
+            return err
+
+        try:
+            if self.store is not None:
+                return self._from_store("goals_vs_top_opponents", format, top_k=top_k, top_n=top_n)
+
+            pl_league, season = self.player_match_season or ("PL", None)
+            table = self._league_table(pl_league, season)
+            if table is None:
+                return {"error": "순위표를 만들 팀 데이터가 없습니다."}
+            top_ids = table.head(int(top_k))["club_id"].to_numpy()
+
+            df = self.player_data
+            rows = df[df["Opponent_ID"].isin(top_ids)]
+            if rows.empty:
+                return {"error": f"상위 {top_k}팀 상대 경기 데이터가 없습니다."}
+
+            keys = self._player_keys(df)
+            names = {c: (c, "first") for c in ["Player Name", "Club"] if c not in keys}
+            out = rows.groupby(keys, as_index=False).agg(
+                **names,
+                Goals=("Goals", "sum"),
+                Assists=("Assists", "sum"),
+                xG=("xG", "sum"),
+                Matches=("Match_Row", "nunique"),
+            )
+            out["Goals_per_Match"] = out["Goals"] / out["Matches"]
+            out = out.sort_values(["Goals", "Goals_per_Match"], ascending=False, kind="mergesort")
+            if top_n is not None:
+                out = out.head(int(top_n))
+
+            cols = ["Player Name", "Club", "Goals", "Assists", "xG", "Matches", "Goals_per_Match"]
+            return format_result(out[cols], format)
+
+        except Exception as e:
+            print(f"강팀 상대 득점 분석 중 오류 발생: {e}")
+            return {"error": "강팀 상대 득점 분석 중 오류가 발생했습니다."}
+
+    # ==================================================
+    # 10) 홈/원정 득점 비교
+    # ==================================================
+    def get_home_away_split(self, metric="Goals", top_n=20, format="records", league=None):
+        err = self._match_level_check(league, need_index=True)
+        if err:
+            return err
+
+        try:
+            if self.store is not None:
+                return self._from_store("home_away_split", format, metric=metric, top_n=top_n)
+
+            df = self.player_data
+            if metric not in ("Goals", "Assists", "xG", "Shots"):
+                metric = "Goals"
+
+            df = df[df["Home"] >= 0]
+            keys = self._player_keys(df)
+            names = {c: (c, "first") for c in ["Player Name", "Club"] if c not in keys}
+            is_home = df["Home"] == 1
+            out = df.assign(
+                _home=np.where(is_home, df[metric], 0),
+                _away=np.where(is_home, 0, df[metric]),
+                _home_m=is_home.astype(int),
+                _away_m=(~is_home).astype(int),
+            ).groupby(keys, as_index=False).agg(
+                **names,
+                **{
+                    f"Home_{metric}": ("_home", "sum"),
+                    f"Away_{metric}": ("_away", "sum"),
+                    "Home_Matches": ("_home_m", "sum"),
+                    "Away_Matches": ("_away_m", "sum"),
+                },
+            )
+            out[f"Home_{metric}_per_Match"] = np.where(out["Home_Matches"] > 0, out[f"Home_{metric}"] / out["Home_Matches"].replace(0, np.nan), 0)
+            out[f"Away_{metric}_per_Match"] = np.where(out["Away_Matches"] > 0, out[f"Away_{metric}"] / out["Away_Matches"].replace(0, np.nan), 0)
+            out["Total"] = out[f"Home_{metric}"] + out[f"Away_{metric}"]
+
+            out = out.sort_values("Total", ascending=False, kind="mergesort")
+            if top_n is not None:
+                out = out.head(int(top_n))
+
+            cols = ["Player Name", "Club", f"Home_{metric}", f"Away_{metric}", "Home_Matches", "Away_Matches",
+                    f"Home_{metric}_per_Match", f"Away_{metric}_per_Match"]
+            return format_result(out[cols], format)
+
+        except Exception as e:
+            print(f"홈/원정 분석 중 오류 발생: {e}")
+            return {"error": "홈/원정 분석 중 오류가 발생했습니다."}
+
+    # ==================================================
+    # 11) 팀 득점 중 선수 득점 비중 (출전 경기 기준)
+    # ==================================================
+    def get_team_goal_share(self, min_matches=5, top_n=20, format="records", league=None):
+        err = self._match_level_check(league, need_index=True)
+        if err:
+            return err
+
+        try:
+            if self.store is not None:
+                return self._from_store("team_goal_share", format, min_matches=min_matches, top_n=top_n)
+
+            df = self.player_data
+            df = df[df["Match_Row"] >= 0]
+            keys = self._player_keys(df)
+            names = {c: (c, "first") for c in ["Player Name", "Club"] if c not in keys}
+            out = df.groupby(keys, as_index=False).agg(
+                **names,
+                Goals=("Goals", "sum"),
+                Team_Goals=("Team_Goals", "sum"),
+                Matches=("Match_Row", "nunique"),
+            )
+            out = out[out["Matches"] >= int(min_matches or 0)]
+            out["Team_Goal_Share(%)"] = np.where(out["Team_Goals"] > 0, out["Goals"] / out["Team_Goals"].replace(0, np.nan) * 100, 0)
+
+            if out.empty:
+                return {"error": "팀 득점 비중 결과가 비어있습니다."}
+
+            out = out.sort_values(["Team_Goal_Share(%)", "Goals"], ascending=False, kind="mergesort")
+            if top_n is not None:
+                out = out.head(int(top_n))
+
+            cols = ["Player Name", "Club", "Goals", "Team_Goals", "Matches", "Team_Goal_Share(%)"]
+            return format_result(out[cols], format)
+
+        except Exception as e:
+            print(f"팀 득점 비중 분석 중 오류 발생: {e}")
+            return {"error": "팀 득점 비중 분석 중 오류가 발생했습니다."}
+
+    # ==================================================
+    # 13) 선수별 누적/이동 구간 집계 (모델 학습용)
+    #  - mode="season" : 선수-클럽별 시즌 합계 1행
+    #  - mode="rolling": 선수-클럽별 최근 window경기 합계 (경기마다 1행, 구간이 다 찬 행만)
+    # ==================================================
+    def get_player_aggregates(self, columns, mode="season", window=5):
+        if self.player_data is None:
+            return {"error": "선수 데이터가 로드되지 않았습니다."}
+
+        try:
+            df = self.player_data
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                return {"error": f"player_data에 없는 컬럼입니다: {missing}"}
+
+            keys = self._player_keys(df)
+            names = [c for c in ["Player Name", "Club"] if c not in keys]
+            values = df[list(columns)].apply(pd.to_numeric, errors="coerce").fillna(0)
+
+            if mode == "season":
+                g = values.assign(**{k: df[k] for k in keys}).groupby(keys)
+                out = g.sum()
+                out["Matches"] = g.size()
+                out["Date"] = df.groupby(keys)["Date"].max()
+                out = out.join(df.groupby(keys)[names].first()).reset_index()
+            elif mode == "rolling":
+                # 날짜순 정렬 후 그룹별 누적합 - window경기 전 누적합 = 최근 window경기 합 (선수 루프 없음)
+                window = int(window)
+                df = df.sort_values("Date", kind="mergesort")
+                values = values.loc[df.index]
+                by = [df[k] for k in keys]
+                csum = values.groupby(by, sort=False).cumsum()
+                prev = csum.groupby(by, sort=False).shift(window, fill_value=0)
+                full = (df.groupby(keys, sort=False).cumcount() >= window - 1).to_numpy()
+
+                out = (csum - prev)[full]
+                out["Matches"] = window
+                out = pd.concat([df.loc[full, keys + names + ["Date"]], out], axis=1).reset_index(drop=True)
+            else:
+                return {"error": f"지원하지 않는 집계 모드입니다: {mode} (가능: season, rolling)"}
+
+            return out
+
+        except Exception as e:
+            print(f"선수 집계 중 오류 발생: {e}")
+            return {"error": "선수 집계 중 오류가 발생했습니다."}
+
+    # ==================================================
+    # 12) 애드혹 SQL 조회 (DuckDB, 읽기 전용)
+    #  - 테이블: player_match, team_match, player_season, big5_player, clubs
+    # ==================================================
+    def query(self, sql, format="records", max_rows=None):
+        if self.store is not None or self.player_data is None:
+            return {"error": "SQL 쿼리는 데이터가 로드된 pandas backend에서만 지원합니다."}
+
+        try:
+            if self._query_engine is None:
+                from query_engine import QueryEngine
+                self._query_engine = QueryEngine(self)
+
+            out = self._query_engine.run(sql, max_rows=max_rows, arrow=(format == "arrow"))
+            if isinstance(out, dict) or format == "arrow":
+                return out
+            return format_result(out, format)
+
+        except ImportError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            print(f"SQL 쿼리 실행 중 오류 발생: {e}")
+            return {"error": f"SQL 쿼리 실행 중 오류가 발생했습니다: {e}"}
+
     # ==================================================
     # 8) (원본 row 기반) 선수 검색 - 필요 시 유지
     # ==================================================
     def get_player_stats(self, player_name):
+        if self.store is not None:
+            try:
+                return self.store.player_stats(player_name)
+            except Exception as e:
+                print(f"선수 스탯 검색 중 오류 발생: {e}")
+                return {"error": "선수 스탯 검색 중 오류가 발생했습니다."}
+
         if self.player_data is None:
             return {"error": "선수 데이터가 로드되지 않았습니다."}
 
@@ -414,17 +925,168 @@ class SeasonAnalyzer:
             print(f"선수 스탯 검색 중 오류 발생: {e}")
             return {"error": "선수 스탯 검색 중 오류가 발생했습니다."}
 
-    # --------------------------------------------------
-    # 팀 분석 (더미)
-    # --------------------------------------------------
-    def get_team_stats(self, team_name, season="2024-2025"):
-        if self.team_data is None:
+    # ==================================================
+    # 14) 팀 시즌 성적 + Elo 레이팅 (team_ratings)
+    # ==================================================
+    def _team_match_data(self):
+        if self.team_data is not None:
+            return self.team_data
+        if self._team_matches is None and self.store is not None and "team_match" in self.store.tables:
+            self._team_matches = self.store.read(
+                'SELECT Date, Season, League, HomeTeam, AwayTeam, "FTH Goals", "FTA Goals", '
+                "home_club_id, away_club_id FROM team_match"
+            )
+        return self._team_matches
+
+    def get_team_ratings(self):
+        """
+        전체 경기로 계산한 EloRatings (첫 호출 때 한 번 계산, 이후 재사용)
+        """
+        if self._ratings is None:
+            t = self._team_match_data()
+            if t is None or "home_club_id" not in t.columns:
+                return None
+            self._ratings = EloRatings.from_matches(t)
+        return self._ratings
+
+    def _find_club_id(self, team_name):
+        if self._club_keys is None:
+            t = self._team_match_data()
+            names = dict(zip(
+                np.concatenate([t["home_club_id"], t["away_club_id"]]),
+                np.concatenate([t["HomeTeam"], t["AwayTeam"]]),
+            ))
+            names.update(self.club_names)
+            keys = pd.DataFrame({"Club": pd.Series(names)})
+            keys["club_key"] = normalize_club(keys["Club"]).str.replace(" ", "", regex=False)
+            self._club_keys = keys
+        return find_club(self._club_keys, team_name)
+
+    def get_team_stats(self, team_name, season=None):
+        """
+        팀의 시즌 순위/승점/득실 + Elo 레이팅. season 미지정 시 해당 팀의 마지막 시즌
+        """
+        try:
+            t = self._team_match_data()
+            if t is None or "home_club_id" not in t.columns:
+                return {"error": "팀 데이터가 로드되지 않았습니다."}
+
+            club_id = self._find_club_id(team_name)
+            if club_id is None:
+                return {"error": f"'{team_name}' 팀을 찾을 수 없습니다."}
+
+            games = t[(t["home_club_id"] == club_id) | (t["away_club_id"] == club_id)]
+            season = normalize_season(season) if season else games["Season"].max()
+            games = games[games["Season"] == season]
+            if games.empty:
+                return {"error": f"'{team_name}' 팀의 {season} 시즌 경기가 없습니다."}
+            league = games["League"].mode().iloc[0]
+
+            if self.store is not None:
+                table = self.store.league_table(league, season)
+                table.insert(0, "Rank", np.arange(1, len(table) + 1))
+            else:
+                table = self._league_table(league, season)
+            row = table[table["club_id"] == club_id].iloc[0]
+
+            # 시즌 마지막 경기 기준 Elo와 같은 리그 내 Elo 순위
+            ratings = self.get_team_ratings()
+            last_date = pd.to_datetime(games["Date"], dayfirst=True, errors="coerce").max()
+            league_elo = pd.Series({
+                int(c): ratings.rating_as_of(c, last_date) for c in table["club_id"]
+            })
+
+            return {
+                "team": self._club_keys.loc[club_id, "Club"],
+                "club_id": int(club_id),
+                "league": league,
+                "season": season,
+                "rank": int(row["Rank"]),
+                "played": int(row["Played"]),
+                "points": int(row["Pts"]),
+                "goals_for": int(row["GF"]),
+                "goals_against": int(row["GA"]),
+                "goal_difference": int(row["GD"]),
+                "elo": float(league_elo[club_id]),
+                "elo_rank": int(league_elo.rank(ascending=False, method="min")[club_id]),
+                "elo_current": ratings.rating(club_id),
+            }
+        except Exception as e:
+            print(f"팀 성적 조회 중 오류 발생: {e}")
+            return {"error": f"팀 성적 조회 중 오류: {e}"}
+
+    def get_elo_ranking(self, team_league="PL", season=None, top_n=None, format="records"):
+        """
+        팀 리그(PL/Championship) 시즌 참가 팀의 Elo 순위 (시즌 마지막 경기일 기준)
+        """
+        try:
+            t = self._team_match_data()
+            ratings = self.get_team_ratings()
+            if ratings is None:
+                return {"error": "팀 데이터가 로드되지 않았습니다."}
+
+            t = t[t["League"] == team_league]
+            season = normalize_season(season) if season else t["Season"].max()
+            t = t[t["Season"] == season]
+            if t.empty:
+                return {"error": f"{team_league} {season} 시즌 경기가 없습니다."}
+
+            as_of = pd.to_datetime(t["Date"], dayfirst=True, errors="coerce").max()
+            ids = np.unique(np.concatenate([t["home_club_id"], t["away_club_id"]]))
+            self._find_club_id("")  # 클럽 이름 인덱스 준비
+            out = pd.DataFrame({
+                "club_id": ids,
+                "Club": self._club_keys["Club"].reindex(ids).to_numpy(),
+                "Elo": [ratings.rating_as_of(c, as_of) for c in ids],
+            }).sort_values("Elo", ascending=False).reset_index(drop=True)
+            out.insert(0, "Rank", np.arange(1, len(out) + 1))
+            if top_n:
+                out = out.head(int(top_n))
+            return format_result(out, format)
+        except Exception as e:
+            print(f"Elo 순위 계산 중 오류 발생: {e}")
+            return {"error": f"Elo 순위 계산 중 오류: {e}"}
+
+    def get_team_elo_history(self, team_name, format="records"):
+        """
+        팀의 경기별 Elo 변화 (Date, Elo)
+        """
+        ratings = self.get_team_ratings()
+        if ratings is None:
             return {"error": "팀 데이터가 로드되지 않았습니다."}
+        club_id = self._find_club_id(team_name)
+        if club_id is None:
+            return {"error": f"'{team_name}' 팀을 찾을 수 없습니다."}
+        return format_result(ratings.history(club_id), format)
 
-        return {"team": team_name, "season": season, "points": 89, "goals_for": 92, "goals_against": 38}
+    # ==================================================
+    # 15) 시즌 몬테카를로 시뮬레이션 (season_simulator)
+    # ==================================================
+    def simulate_season(self, team_league="PL", season=None, n_sims=N_SIMS, n_workers=None, seed=0,
+                        format="records"):
+        """
+        남은 경기를 n_sims번 시뮬레이션한 팀별 우승/Top4/강등 확률 + 순위 분포(Pos_1..Pos_N)
+        """
+        try:
+            t = self._team_match_data()
+            if t is None or "home_club_id" not in t.columns:
+                return {"error": "팀 데이터가 로드되지 않았습니다."}
+
+            self._find_club_id("")  # 클럽 이름 인덱스 준비
+            out = simulate_season(
+                t, league=team_league, season=normalize_season(season) if season else None,
+                n_sims=n_sims, n_workers=n_workers, seed=seed,
+                club_names=self._club_keys["Club"].to_dict(),
+            )
+            if out is None:
+                return {"error": f"{team_league} 시즌 경기가 없습니다."}
+            return format_result(out, format)
+        except Exception as e:
+            print(f"시즌 시뮬레이션 중 오류 발생: {e}")
+            return {"error": f"시즌 시뮬레이션 중 오류: {e}"}
 
     def get_team_trend(self, team_name, season="2024-2025"):
-        if self.team_data is None:
+        if self.team_data is None and self.store is None:
             return {"error": "팀 데이터가 로드되지 않았습니다."}
 
         return {
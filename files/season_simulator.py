@@ -0,0 +1,191 @@
+# season_simulator.py
+"""
+시즌 몬테카를로 시뮬레이션 (PL / Championship)
+- 현재 순위표(이미 치른 경기) + 남은 경기(아직 결과가 없는 홈/원정 조합)
+- 남은 경기 스코어를 포아송 분포로 (시뮬레이션 × 경기) 배열 한 번에 샘플링
+- 팀별 승점/득실은 (경기 × 팀) 지시 행렬 곱으로 합산 → 경기 루프 없음
+- 시뮬레이션을 청크로 나눠 프로세스 풀에 분배 (워커마다 독립 시드)
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+TEAM_DATA_PATH = BASE_DIR / "processed_data" / "team_data.csv"
+
+N_SIMS = 100_000
+# 청크당 시뮬레이션 수 (메모리: 청크 × 남은 경기 수 배열 몇 개)
+CHUNK_SIMS = 10_000
+# 팀 공격/수비 지표 축소 추정: 리그 평균 수준의 가상 경기 수
+PRIOR_GAMES = 5
+TOP_N = 4
+RELEGATION_N = 3
+
+
+def season_fixtures(team_df: pd.DataFrame, league="PL", season=None):
+    """
+    (시즌, 팀 ID 배열, 치른 경기 DataFrame, 남은 경기 (홈 인덱스, 원정 인덱스))
+    팀 인덱스는 팀 ID 배열 기준 0..T-1
+    """
+    t = team_df[team_df["League"] == league]
+    if season is None:
+        season = t["Season"].max()
+    t = t[t["Season"] == season]
+    if t.empty:
+        return season, np.array([], dtype=np.int64), t, (np.array([], dtype=np.int64),) * 2
+
+    team_ids = np.unique(np.concatenate([t["home_club_id"], t["away_club_id"]])).astype(np.int64)
+    n = len(team_ids)
+    played = t[t["FTH Goals"].notna() & t["FTA Goals"].notna()]
+
+    # 모든 (홈, 원정) 조합 중 아직 결과가 없는 경기
+    done = np.zeros((n, n), dtype=bool)
+    done[np.searchsorted(team_ids, played["home_club_id"]), np.searchsorted(team_ids, played["away_club_id"])] = True
+    np.fill_diagonal(done, True)
+    home_idx, away_idx = np.nonzero(~done)
+    return season, team_ids, played, (home_idx, away_idx)
+
+
+def current_table(team_ids, played: pd.DataFrame):
+    """
+    팀 인덱스 순서의 (승점, 득실차, 득점, 경기 수, 실점) 배열
+    """
+    n = len(team_ids)
+    h = np.searchsorted(team_ids, played["home_club_id"].to_numpy())
+    a = np.searchsorted(team_ids, played["away_club_id"].to_numpy())
+    hg = played["FTH Goals"].to_numpy(np.float64)
+    ag = played["FTA Goals"].to_numpy(np.float64)
+    hp = np.where(hg > ag, 3, np.where(hg == ag, 1, 0))
+    ap = np.where(ag > hg, 3, np.where(hg == ag, 1, 0))
+
+    pts = np.bincount(h, hp, n) + np.bincount(a, ap, n)
+    gf = np.bincount(h, hg, n) + np.bincount(a, ag, n)
+    ga = np.bincount(h, ag, n) + np.bincount(a, hg, n)
+    games = np.bincount(h, minlength=n) + np.bincount(a, minlength=n)
+    return pts, gf - ga, gf, games, ga
+
+
+def goal_rates(team_ids, played: pd.DataFrame, home_idx, away_idx, prior_games=PRIOR_GAMES):
+    """
+    이번 시즌 경기당 득점/실점으로 만든 간단한 포아송 기대 득점 (홈, 원정)
+    - 공격력 = 경기당 득점 / 리그 평균, 수비 = 경기당 실점 / 리그 평균 (prior_games만큼 평균으로 축소)
+    """
+    _, _, gf, games, ga = current_table(team_ids, played)
+    home_avg = played["FTH Goals"].mean() if len(played) else 1.5
+    away_avg = played["FTA Goals"].mean() if len(played) else 1.2
+    avg = (home_avg + away_avg) / 2
+
+    attack = (gf + avg * prior_games) / (games + prior_games) / avg
+    defence = (ga + avg * prior_games) / (games + prior_games) / avg
+    lam_home = home_avg * attack[home_idx] * defence[away_idx]
+    lam_away = away_avg * attack[away_idx] * defence[home_idx]
+    return lam_home, lam_away
+
+
+def _simulate_chunk(seed, n_sims, lam_home, lam_away, home_idx, away_idx, pts, gd, gf):
+    """
+    n_sims개 시즌을 시뮬레이션하고 (팀 × 최종 순위) 횟수 행렬과 팀별 승점 합을 반환합니다.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(pts)
+    n_fix = len(home_idx)
+
+    # (경기 × 팀) 지시 행렬: 경기별 값 → 팀별 합산을 행렬 곱 한 번으로
+    home_onehot = np.zeros((n_fix, n_teams), dtype=np.float32)
+    away_onehot = np.zeros((n_fix, n_teams), dtype=np.float32)
+    home_onehot[np.arange(n_fix), home_idx] = 1
+    away_onehot[np.arange(n_fix), away_idx] = 1
+
+    hg = rng.poisson(lam_home, size=(n_sims, n_fix)).astype(np.float32)
+    ag = rng.poisson(lam_away, size=(n_sims, n_fix)).astype(np.float32)
+    home_pts = np.where(hg > ag, 3, np.where(hg == ag, 1, 0)).astype(np.float32)
+    away_pts = np.where(ag > hg, 3, np.where(hg == ag, 1, 0)).astype(np.float32)
+
+    sim_pts = pts + home_pts @ home_onehot + away_pts @ away_onehot
+    sim_gd = gd + (hg - ag) @ home_onehot + (ag - hg) @ away_onehot
+    sim_gf = gf + hg @ home_onehot + ag @ away_onehot
+
+    # 승점 → 득실차 → 득점 → 무작위 순으로 순위 결정
+    key = sim_pts * 1e6 + (sim_gd + 500) * 1e3 + sim_gf + rng.random((n_sims, n_teams))
+    order = np.argsort(-key, axis=1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+
+    counts = np.bincount(
+        (np.arange(n_teams)[None, :] * n_teams + positions).ravel(), minlength=n_teams * n_teams
+    ).reshape(n_teams, n_teams)
+    return counts, sim_pts.sum(axis=0, dtype=np.float64)
+
+
+def simulate_season(team_df: pd.DataFrame, league="PL", season=None, n_sims=N_SIMS, n_workers=None,
+                    seed=0, rates=None, club_names=None, chunk_sims=CHUNK_SIMS):
+    """
+    남은 경기를 n_sims번 시뮬레이션한 팀별 우승/Top4/강등 확률과 순위 분포 (DataFrame)
+    rates: 남은 경기(season_fixtures 순서)별 (홈 기대 득점, 원정 기대 득점). 없으면 goal_rates 사용
+    """
+    season, team_ids, played, (home_idx, away_idx) = season_fixtures(team_df, league, season)
+    if len(team_ids) == 0:
+        return None
+    pts, gd, gf, games, _ = current_table(team_ids, played)
+    lam_home, lam_away = rates if rates is not None else goal_rates(team_ids, played, home_idx, away_idx)
+
+    n_sims = int(n_sims)
+    sizes = [min(chunk_sims, n_sims - s) for s in range(0, n_sims, chunk_sims)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(sd, size, lam_home, lam_away, home_idx, away_idx, pts, gd, gf) for sd, size in zip(seeds, sizes)]
+
+    n_workers = min(len(sizes), n_workers or os.cpu_count() or 1)
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        results = [_simulate_chunk(*a) for a in args]
+
+    counts = sum(r[0] for r in results)
+    exp_pts = sum(r[1] for r in results) / n_sims
+    probs = counts / n_sims
+    n_teams = len(team_ids)
+
+    out = pd.DataFrame({
+        "club_id": team_ids,
+        "Club": pd.Series(team_ids).map(club_names or {}).fillna(pd.Series(team_ids).astype(str)).to_numpy(),
+        "Played": games,
+        "Pts": pts.astype(int),
+        "Exp_Pts": exp_pts,
+        "Exp_Position": probs @ np.arange(1, n_teams + 1),
+        "P_Title": probs[:, 0],
+        "P_Top4": probs[:, :TOP_N].sum(axis=1),
+        "P_Relegation": probs[:, n_teams - RELEGATION_N:].sum(axis=1),
+    })
+    positions = pd.DataFrame(probs, columns=[f"Pos_{i}" for i in range(1, n_teams + 1)])
+    out = pd.concat([out, positions], axis=1)
+    out = out.sort_values(["Exp_Position", "Exp_Pts"], ascending=[True, False]).reset_index(drop=True)
+    out.attrs.update({"league": league, "season": season, "n_sims": n_sims, "remaining_fixtures": len(home_idx)})
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="시즌 몬테카를로 시뮬레이션 벤치마크")
+    parser.add_argument("--league", default="PL", help="PL 또는 Championship")
+    parser.add_argument("--sims", type=int, default=N_SIMS, help="시뮬레이션 횟수")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args()
+
+    team_df = pd.read_csv(TEAM_DATA_PATH)
+    club_index = pd.read_csv(BASE_DIR / "processed_data" / "club_index.csv")
+    names = dict(zip(club_index["club_id"], club_index["Club"]))
+    workers = args.workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    result = simulate_season(team_df, args.league, n_sims=args.sims, n_workers=workers, club_names=names)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.league} {result.attrs['season']}: 남은 경기 {result.attrs['remaining_fixtures']}개, "
+          f"시뮬레이션 {args.sims:,}회, {elapsed:.2f}초 (워커 {workers}개)")
+    print(f"→ {args.sims / elapsed:,.0f} 시즌/초, 코어당 {args.sims / elapsed / workers:,.0f} 시즌/초")
+    print(result[["Club", "Pts", "Exp_Pts", "P_Title", "P_Top4", "P_Relegation"]].round(3).to_string())
@@ -4,7 +4,8 @@ import pandas as pd
 import numpy as np
 
 from season_analyzer import SeasonAnalyzer
-from prediction_model import PlayerGoalPredictor
+from prediction_model import serving_player_predictor
+from prediction_scoring import PredictionTable
 
 # plotly는 있으면 쓰고, 없으면 앱이 죽지 않게 폴백
 try:
@@ -51,10 +52,25 @@ def show_rank_table(df: pd.DataFrame, rank_col_name: str = "Rank"):
     return df
 
 
+@st.cache_resource
+def prediction_table():
+    # 프로세스당 하나 (파일이 바뀌면 PredictionTable이 알아서 다시 읽음)
+    return PredictionTable()
+
+
+@st.cache_resource
+def registry_handles():
+    # 레지스트리에서 받은 모델 핸들 보관 (rerun 사이에 다시 로드하지 않도록, 기본 버전이 바뀌면 교체)
+    return {}
+
+
 def safe_df(records):
     if isinstance(records, dict) and "error" in records:
         st.error(records["error"])
         return None
+    # 분석기에 format="dataframe"으로 요청하면 변환 없이 그대로 사용
+    if isinstance(records, pd.DataFrame):
+        return records
     df = pd.DataFrame(records)
     return df
 
@@ -84,6 +100,16 @@ def main():
             st.error("선수 데이터를 로드하지 못했습니다. 먼저 data_preprocessor.py 실행 후 processed_data/player_data.csv를 확인하세요.")
             return
 
+        # 리그 선택: 기본은 PL 경기 단위 데이터, Big5 데이터가 있으면 리그 간 비교 가능
+        league = None
+        if analyzer.big5_data is not None:
+            league_options = ["PL (경기 단위)", "Big5 전체"] + list(analyzer.big5_partitions)
+            sel_league = st.sidebar.selectbox("리그 선택", league_options)
+            if sel_league == "Big5 전체":
+                league = "all"
+            elif sel_league != league_options[0]:
+                league = sel_league
+
         tabs = st.tabs([
             "🏆 Top 20 득점",
             "🎯 슈팅 대비 득점 효율",
@@ -93,6 +119,7 @@ def main():
             "🧱 팀 의존도",
             "⚔️ 선수 비교",
             "🔍 선수 검색",
+            "📶 팀 Elo 레이팅",
         ])
 
         # ------------------------------
@@ -101,7 +128,7 @@ def main():
         with tabs[0]:
             st.subheader("Top 20 Scorers")
 
-            top_scorers = analyzer.get_top_scorers(top_n=20)
+            top_scorers = analyzer.get_top_scorers(top_n=20, format="dataframe", league=league)
             df = safe_df(top_scorers)
             if df is None or df.empty:
                 return
@@ -117,7 +144,7 @@ def main():
         with tabs[1]:
             st.subheader("All Players — Conversion Rate Ranking (전체 표시)")
 
-            eff = analyzer.get_efficient_finishers(min_shots=0, top_n=None)
+            eff = analyzer.get_efficient_finishers(min_shots=0, top_n=None, format="dataframe", league=league)
             df = safe_df(eff)
             if df is None or df.empty:
                 return
@@ -133,21 +160,24 @@ def main():
         with tabs[2]:
             st.subheader("Recent Form Ranking (최근 경기)")
 
-            colA, colB = st.columns([1, 2])
-            with colA:
-                last_n = st.radio("기간 선택", [5, 10], horizontal=True)
-            with colB:
-                metric = st.selectbox("정렬 기준", ["Goals", "Assists", "xG", "Conversion_Rate"])
+            if league is not None:
+                st.info("최근 폼 랭킹은 경기 단위 데이터(PL)에서만 제공됩니다. 사이드바에서 'PL (경기 단위)'를 선택하세요.")
+            else:
+                colA, colB = st.columns([1, 2])
+                with colA:
+                    last_n = st.radio("기간 선택", [5, 10], horizontal=True)
+                with colB:
+                    metric = st.selectbox("정렬 기준", ["Goals", "Assists", "xG", "Conversion_Rate"])
 
-            form = analyzer.get_recent_form_ranking(last_n=last_n, metric=metric, top_n=20)
-            df = safe_df(form)
-            if df is None or df.empty:
-                return
+                form = analyzer.get_recent_form_ranking(last_n=last_n, metric=metric, top_n=20, format="dataframe")
+                df = safe_df(form)
+                if df is None or df.empty:
+                    return
 
-            if "Conversion_Rate" in df.columns:
-                df["Conversion_Rate"] = df["Conversion_Rate"].map(pct_fmt)
+                if "Conversion_Rate" in df.columns:
+                    df["Conversion_Rate"] = df["Conversion_Rate"].map(pct_fmt)
 
-            show_rank_table(df)
+                show_rank_table(df)
 
         # ------------------------------
         # 4) 포지션별 랭킹 (✅ 기능 복구)
@@ -155,61 +185,73 @@ def main():
         with tabs[3]:
             st.subheader("Position Ranking (포지션별 랭킹)")
 
-            # 포지션 후보 컬럼 자동 탐색
-            df0 = analyzer.player_data.copy()
-            pos_col = None
-            for c in ["Position", "Pos", "position"]:
-                if c in df0.columns:
-                    pos_col = c
-                    break
-
-            if pos_col is None:
-                st.warning("player_data.csv에 Position(포지션) 컬럼이 없어 포지션 랭킹을 만들 수 없습니다.")
-                st.info("data_preprocessor에서 Position 컬럼을 유지/표준화했는지 확인해줘.")
+            if league is not None:
+                # Big5: 시즌 누적 테이블에서 포지션 키워드(FW/MF/DF/GK)로 랭킹
+                sel_pos = st.selectbox("포지션 선택", ["FW", "MF", "DF", "GK"], key="big5_pos")
+                metric = st.selectbox("정렬 기준", ["Goals", "Assists", "xG", "Conversion_Rate"], key="big5_pos_metric")
+                top_n = st.slider("표시할 선수 수", 5, 50, 20, key="big5_pos_top_n")
+
+                ranking = analyzer.get_position_ranking(sel_pos, metric=metric, top_n=top_n, format="dataframe", league=league)
+                df = safe_df(ranking)
+                if df is not None and not df.empty:
+                    df["Conversion_Rate"] = df["Conversion_Rate"].map(pct_fmt)
+                    show_rank_table(df)
             else:
-                pos_list = sorted([p for p in df0[pos_col].dropna().astype(str).unique().tolist() if p.strip() != ""])
-                if not pos_list:
-                    st.warning("포지션 값이 비어있습니다.")
+                # 포지션 후보 컬럼 자동 탐색
+                df0 = analyzer.player_data.copy()
+                pos_col = None
+                for c in ["Position", "Pos", "position"]:
+                    if c in df0.columns:
+                        pos_col = c
+                        break
+
+                if pos_col is None:
+                    st.warning("player_data.csv에 Position(포지션) 컬럼이 없어 포지션 랭킹을 만들 수 없습니다.")
+                    st.info("data_preprocessor에서 Position 컬럼을 유지/표준화했는지 확인해줘.")
                 else:
-                    sel_pos = st.selectbox("포지션 선택", pos_list)
-                    metric = st.selectbox("정렬 기준", ["Goals", "Assists", "Goals_per90", "xG", "Conversion_Rate"])
-                    top_n = st.slider("표시할 선수 수", 5, 50, 20)
-
-                    # 가능한 컬럼만 사용 (없으면 0 처리)
-                    use_cols = ["Player Name", "Club", pos_col, "Minutes", "Goals", "Assists", "Goals_per90", "xG", "Shots", "Conversion_Rate"]
-                    for c in use_cols:
-                        if c not in df0.columns:
-                            df0[c] = 0
-
-                    filtered = df0[df0[pos_col].astype(str) == str(sel_pos)].copy()
-
-                    # 같은 선수가 여러 행이면 (날짜/경기 단위) 합산/요약
-                    # - Goals/Assists/Shots/xG: sum
-                    # - Minutes: sum
-                    # - Conversion_Rate: (Goals/Shots)*100 재계산
-                    grouped = (
-                        filtered.groupby(["Player Name", "Club"], as_index=False)
-                        .agg(
-                            Minutes=("Minutes", "sum"),
-                            Goals=("Goals", "sum"),
-                            Assists=("Assists", "sum"),
-                            Shots=("Shots", "sum"),
-                            xG=("xG", "sum") if "xG" in filtered.columns else ("Goals", "sum"),
+                    pos_list = sorted([p for p in df0[pos_col].dropna().astype(str).unique().tolist() if p.strip() != ""])
+                    if not pos_list:
+                        st.warning("포지션 값이 비어있습니다.")
+                    else:
+                        sel_pos = st.selectbox("포지션 선택", pos_list)
+                        metric = st.selectbox("정렬 기준", ["Goals", "Assists", "Goals_per90", "xG", "Conversion_Rate"])
+                        top_n = st.slider("표시할 선수 수", 5, 50, 20)
+
+                        # 가능한 컬럼만 사용 (없으면 0 처리)
+                        use_cols = ["Player Name", "Club", pos_col, "Minutes", "Goals", "Assists", "Goals_per90", "xG", "Shots", "Conversion_Rate"]
+                        for c in use_cols:
+                            if c not in df0.columns:
+                                df0[c] = 0
+
+                        filtered = df0[df0[pos_col].astype(str) == str(sel_pos)].copy()
+
+                        # 같은 선수가 여러 행이면 (날짜/경기 단위) 합산/요약
+                        # - Goals/Assists/Shots/xG: sum
+                        # - Minutes: sum
+                        # - Conversion_Rate: (Goals/Shots)*100 재계산
+                        grouped = (
+                            filtered.groupby(["Player Name", "Club"], as_index=False)
+                            .agg(
+                                Minutes=("Minutes", "sum"),
+                                Goals=("Goals", "sum"),
+                                Assists=("Assists", "sum"),
+                                Shots=("Shots", "sum"),
+                                xG=("xG", "sum") if "xG" in filtered.columns else ("Goals", "sum"),
+                            )
                         )
-                    )
-                    grouped["Goals_per90"] = np.where(grouped["Minutes"] > 0, (grouped["Goals"] / grouped["Minutes"]) * 90, 0)
-                    grouped["Conversion_Rate"] = np.where(grouped["Shots"] > 0, (grouped["Goals"] / grouped["Shots"]) * 100, 0)
+                        grouped["Goals_per90"] = np.where(grouped["Minutes"] > 0, (grouped["Goals"] / grouped["Minutes"]) * 90, 0)
+                        grouped["Conversion_Rate"] = np.where(grouped["Shots"] > 0, (grouped["Goals"] / grouped["Shots"]) * 100, 0)
 
-                    if metric not in grouped.columns:
-                        st.warning(f"'{metric}' 컬럼이 없어 Goals로 정렬합니다.")
-                        metric = "Goals"
+                        if metric not in grouped.columns:
+                            st.warning(f"'{metric}' 컬럼이 없어 Goals로 정렬합니다.")
+                            metric = "Goals"
 
-                    grouped = grouped.sort_values(metric, ascending=False).head(top_n)
+                        grouped = grouped.sort_values(metric, ascending=False).head(top_n)
 
-                    # 보기 좋게 %
-                    grouped["Conversion_Rate"] = grouped["Conversion_Rate"].map(pct_fmt)
+                        # 보기 좋게 %
+                        grouped["Conversion_Rate"] = grouped["Conversion_Rate"].map(pct_fmt)
 
-                    show_rank_table(grouped)
+                        show_rank_table(grouped)
 
         # ------------------------------
         # 5) xG 오버/언더
@@ -217,7 +259,7 @@ def main():
         with tabs[4]:
             st.subheader("xG Over/Under (Goals - xG)")
 
-            df = analyzer.get_xg_over_under(top_n=20)
+            df = analyzer.get_xg_over_under(top_n=20, format="dataframe", league=league)
             df = safe_df(df)
             if df is None or df.empty:
                 return
@@ -230,7 +272,7 @@ def main():
         with tabs[5]:
             st.subheader("Team Dependency (팀 의존도)")
 
-            dep = analyzer.get_team_dependency(top_n_teams=20)
+            dep = analyzer.get_team_dependency(top_n_teams=20, format="dataframe", league=league)
             df = safe_df(dep)
             if df is None or df.empty:
                 return
@@ -387,6 +429,24 @@ def main():
                 st.markdown("### 🟥 징계/파울")
                 st.dataframe(as_table(discipline), use_container_width=True, hide_index=True)
 
+        # ------------------------------
+        # 9) 팀 Elo 레이팅 (PL/Championship 경기 데이터)
+        # ------------------------------
+        with tabs[8]:
+            st.subheader("Team Elo Ratings (팀 전력 레이팅)")
+
+            team_league = st.radio("리그", ["PL", "Championship"], horizontal=True)
+            df = safe_df(analyzer.get_elo_ranking(team_league=team_league, format="dataframe"))
+            if df is None or df.empty:
+                return
+
+            show_rank_table(df)
+
+            team = st.selectbox("팀 선택 (레이팅 추이)", df["Club"].tolist())
+            hist = safe_df(analyzer.get_team_elo_history(team, format="dataframe"))
+            if hist is not None and not hist.empty:
+                st.line_chart(hist.set_index("Date")["Elo"])
+
     # ==================================================
     # 2) 예측
     # ==================================================
@@ -394,10 +454,32 @@ def main():
         st.header("🔮 머신러닝 기반 득점 예측")
         st.write("선수의 스탯을 입력하면 **예상 득점 수**를 예측합니다.")
 
-        predictor = PlayerGoalPredictor(model_path="trained_models/player_goal_model.pkl")
+        # 학습/전처리 때 미리 계산해 둔 리그 전체 예측 (조회만, 추론 없음)
+        table = prediction_table()
+        st.subheader("📋 리그 전체 예측 (학습 시 계산된 예측 테이블)")
+        name = st.text_input("선수 이름으로 예측 조회", key="prediction_lookup")
+        if name:
+            row = table.lookup(name)
+            if row is None:
+                st.warning(f"'{name}' 선수의 예측이 없습니다.")
+            else:
+                c1, c2, c3 = st.columns(3)
+                c1.metric("선수", f"{row['Player Name']} ({row['Club']})")
+                c2.metric("실제 득점", row["Goals"])
+                c3.metric("예측 득점", f"{row['Pred_Goals']:.1f}")
+        top = table.top(20)
+        if top.empty:
+            st.info("예측 테이블이 없습니다. 'model_trainer.py'로 학습하면 자동으로 만들어집니다.")
+        else:
+            st.caption(f"모델 버전: {table.latest_version}")
+            show_rank_table(top[["Player Name", "Club", "Matches", "Goals", "Pred_Goals"]])
+
+        st.subheader("✍️ 직접 입력해서 예측")
+        # 레지스트리 기본 버전 (promote/롤백이 앱 재시작 없이 다음 rerun부터 반영)
+        predictor = serving_player_predictor(registry_handles())
 
         if predictor.model is None:
-            st.error("모델이 없습니다. 'model_trainer.py'로 모델을 학습/저장하세요. (files/trained_models/player_goal_model.pkl)")
+            st.error("모델이 없습니다. 'python model_trainer.py'로 학습하면 레지스트리에 첫 버전(v1)이 등록됩니다.")
             return
 
         with st.form("prediction_form"):
@@ -417,25 +499,59 @@ def main():
 
             submitted = st.form_submit_button("예측하기")
 
-            if submitted:
-                input_data = {
-                    "Minutes": minutes,
-                    "Shots": shots,
-                    "Shots On Target": shots_on_target,
-                    "Assists": assists,
-                    "Passes Attempted": passes_att,
-                    "Passes Completed": passes_comp,
-                    "xG": xg,
-                    "xA": xa,
-                }
-
-                pred = predictor.predict_goals(input_data)
-                if pred != -1:
-                    st.balloons()
-                    st.success(f"🤖 AI가 예측한 이 선수의 예상 득점은 **{pred} 골** 입니다!")
-                else:
-                    st.error("예측 중 오류가 발생했습니다. (입력 피처/모델 컬럼 매칭 확인 필요)")
+        input_data = {
+            "Minutes": minutes,
+            "Shots": shots,
+            "Shots On Target": shots_on_target,
+            "Assists": assists,
+            "Passes Attempted": passes_att,
+            "Passes Completed": passes_comp,
+            "xG": xg,
+            "xA": xa,
+        }
+
+        if submitted:
+            pred = predictor.predict_goals(input_data)
+            if pred != -1:
+                st.balloons()
+                st.success(f"🤖 AI가 예측한 이 선수의 예상 득점은 **{pred} 골** 입니다!")
+            else:
+                st.error("예측 중 오류가 발생했습니다. (입력 피처/모델 컬럼 매칭 확인 필요)")
+
+        # What-if: 위 입력을 기준으로 피처 1~2개를 바꾼 격자 전체를 한 번에 예측
+        st.subheader("🔬 What-if 민감도 분석")
+        st.caption("위 입력값을 기준으로 고른 피처만 바꿔 가며 예측합니다. (격자 전체를 한 번의 배치 예측으로 계산)")
+        features = predictor.features or []
+        default_vary = [c for c in ["Shots", "Expected Goals (xG)"] if c in features]
+        vary_cols = st.multiselect("바꿀 피처 (1~2개)", features, default=default_vary, max_selections=2)
+        steps = st.slider("피처별 격자 크기", min_value=10, max_value=100, value=50)
+
+        base_row = predictor.adapter.fill(input_data, np.empty(len(features))) if vary_cols else None
+        vary = {}
+        for c in vary_cols:
+            base_v = base_row[features.index(c)]
+            upper = float(max(2 * base_v, 1.0)) if np.isfinite(base_v) else 10.0
+            lo, hi = st.slider(f"{c} 범위", min_value=0.0, max_value=upper * 2, value=(0.0, upper))
+            vary[c] = np.linspace(lo, hi, steps)
+
+        if vary:
+            try:
+                grid = predictor.sensitivity_grid(input_data, vary)
+            except ValueError as e:
+                st.error(f"민감도 분석 실패: {e}")
+                return
 
+            if len(vary) == 1:
+                st.line_chart(grid.set_index(vary_cols[0])["Pred_Goals"])
+            elif PLOTLY_OK:
+                fig = go.Figure(go.Heatmap(
+                    z=grid.to_numpy(), x=grid.columns, y=grid.index,
+                    colorscale="Viridis", colorbar=dict(title="예상 득점"),
+                ))
+                fig.update_layout(xaxis_title=grid.columns.name, yaxis_title=grid.index.name, height=500)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.dataframe(grid.round(2), use_container_width=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
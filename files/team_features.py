@@ -0,0 +1,162 @@
+# team_features.py
+"""
+팀 경기 결과 예측용 피처 (PL + Championship 경기 데이터)
+- 경기 1행 → 팀 관점 2행(홈/원정)으로 펼친 뒤, 팀별로 정렬해 직전 N경기 평균(폼)을 계산
+- 폼은 shift(1) 후 rolling이라 해당 경기 결과는 절대 포함되지 않음 (누수 없음)
+- 모든 계산은 groupby + shift/rolling 벡터 연산 (경기 루프 없음)
+- 장기 전력은 team_ratings의 경기 직전 Elo 레이팅으로 보완
+"""
+import numpy as np
+import pandas as pd
+
+from identity_resolution import normalize_club
+from team_ratings import EloRatings
+
+FORM_WINDOW = 5
+
+# 팀 관점 경기 통계 → (홈일 때 컬럼, 원정일 때 컬럼)
+SIDE_STATS = {
+    "GF": ("FTH Goals", "FTA Goals"),
+    "GA": ("FTA Goals", "FTH Goals"),
+    "Shots": ("H Shots", "A Shots"),
+    "Shots_Against": ("A Shots", "H Shots"),
+    "SOT": ("H SOT", "A SOT"),
+    "SOT_Against": ("A SOT", "H SOT"),
+}
+FORM_STATS = ["Pts"] + list(SIDE_STATS)
+FORM_COLS = [f"form_{c}" for c in FORM_STATS] + ["form_matches"]
+
+RATING_COLS = ["elo"]
+
+# 모델 입력 피처 (홈 폼·Elo, 원정 폼·Elo, 차이, 리그 구분)
+TEAM_FEATURES = (
+    [f"home_{c}" for c in FORM_COLS + RATING_COLS]
+    + [f"away_{c}" for c in FORM_COLS + RATING_COLS]
+    + [f"diff_{c}" for c in FORM_COLS + RATING_COLS]
+    + ["is_pl"]
+)
+RESULT_POINTS = {"H": (3, 0), "D": (1, 1), "A": (0, 3)}
+
+
+def team_match_sides(team_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    경기 1행을 팀 관점 2행으로 펼칩니다. (match_row, club_id, is_home, GF, GA, Pts ...)
+    """
+    t = team_df
+    n = len(t)
+    dates = pd.to_datetime(t["Date"], dayfirst=True, errors="coerce").to_numpy()
+    sides = pd.DataFrame({
+        "match_row": np.tile(np.arange(n), 2),
+        "Date": np.tile(dates, 2),
+        "League": np.tile(t["League"].to_numpy(), 2),
+        "Season": np.tile(t["Season"].to_numpy(), 2),
+        "club_id": np.concatenate([t["home_club_id"].to_numpy(), t["away_club_id"].to_numpy()]),
+        "is_home": np.repeat([1, 0], n),
+    })
+    for stat, (home_col, away_col) in SIDE_STATS.items():
+        sides[stat] = np.concatenate([
+            pd.to_numeric(t[home_col], errors="coerce").to_numpy(np.float64),
+            pd.to_numeric(t[away_col], errors="coerce").to_numpy(np.float64),
+        ])
+    sides["Pts"] = np.select(
+        [sides["GF"] > sides["GA"], sides["GF"] == sides["GA"]], [3.0, 1.0], 0.0
+    )
+    sides.loc[sides["GF"].isna() | sides["GA"].isna(), "Pts"] = np.nan
+
+    # 같은 날 경기는 match_row 순서로 (안정 정렬)
+    return sides.sort_values(["club_id", "Date", "match_row"], kind="mergesort").reset_index(drop=True)
+
+
+def add_rolling_form(sides: pd.DataFrame, window=FORM_WINDOW) -> pd.DataFrame:
+    """
+    팀별 직전 window경기 평균 (현재 경기 제외). 첫 경기는 NaN.
+    """
+    by = sides["club_id"]
+    prev = sides[FORM_STATS].groupby(by).shift(1)
+    form = prev.groupby(by).rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+
+    out = sides.copy()
+    out[[f"form_{c}" for c in FORM_STATS]] = form.sort_index().to_numpy()
+    out["form_matches"] = sides.groupby("club_id").cumcount().clip(upper=window).astype(np.float64)
+    return out
+
+
+def _fixture_frame(home: pd.DataFrame, away: pd.DataFrame, is_pl) -> pd.DataFrame:
+    X = pd.DataFrame(index=home.index)
+    for c in FORM_COLS + RATING_COLS:
+        X[f"home_{c}"] = home[c].to_numpy()
+        X[f"away_{c}"] = away[c].to_numpy()
+        X[f"diff_{c}"] = X[f"home_{c}"] - X[f"away_{c}"]
+    X["is_pl"] = np.asarray(is_pl, dtype=np.float64)
+    return X[TEAM_FEATURES]
+
+
+def build_match_features(team_df: pd.DataFrame, window=FORM_WINDOW, ratings=None):
+    """
+    경기별 (X, y, 날짜)를 반환합니다. y = FT Result (H/D/A), 결과 없는 경기는 제외.
+    ratings: 같은 team_df로 만든 EloRatings (없으면 여기서 재계산)
+    """
+    if ratings is None:
+        ratings = EloRatings.from_matches(team_df)
+    sides = add_rolling_form(team_match_sides(team_df), window)
+    home = sides[sides["is_home"] == 1].set_index("match_row").sort_index()
+    away = sides[sides["is_home"] == 0].set_index("match_row").sort_index()
+    # 경기 직전 레이팅 (해당 경기 결과 미반영)
+    home["elo"] = ratings.pre_home[home.index.to_numpy()]
+    away["elo"] = ratings.pre_away[away.index.to_numpy()]
+
+    X = _fixture_frame(home, away, home["League"] == "PL")
+    y = team_df["FT Result"].reset_index(drop=True).reindex(X.index)
+    dates = home["Date"]
+
+    keep = y.isin(list(RESULT_POINTS)).to_numpy()
+    return X[keep], y[keep], dates[keep]
+
+
+def latest_team_form(team_df: pd.DataFrame, window=FORM_WINDOW, club_names=None, ratings=None) -> pd.DataFrame:
+    """
+    팀별 '다음 경기' 직전 폼 (마지막 window경기 평균) + 현재 Elo. index = club_id
+    club_names: {club_id: 이름} (없으면 경기 데이터의 팀 이름 사용)
+    """
+    if ratings is None:
+        ratings = EloRatings.from_matches(team_df)
+    sides = team_match_sides(team_df)
+    last = sides.groupby("club_id").tail(window)
+    g = last.groupby("club_id")
+
+    form = g[FORM_STATS].mean()
+    form.columns = [f"form_{c}" for c in FORM_STATS]
+    form["form_matches"] = g.size().clip(upper=window).astype(np.float64)
+    form["League"] = g["League"].last()
+    form["Season"] = g["Season"].last()
+    form["Last_Date"] = g["Date"].max()
+    form["elo"] = ratings.ratings[form.index.to_numpy()]
+
+    if club_names is None:
+        club_names = dict(zip(
+            np.concatenate([team_df["home_club_id"], team_df["away_club_id"]]),
+            np.concatenate([team_df["HomeTeam"], team_df["AwayTeam"]]),
+        ))
+    form["Club"] = form.index.map(club_names)
+    form["club_key"] = normalize_club(form["Club"]).str.replace(" ", "", regex=False)
+    return form
+
+
+def fixture_features(form: pd.DataFrame, home_ids, away_ids) -> pd.DataFrame:
+    """
+    latest_team_form 결과로 (홈, 원정) 가상 경기들의 피처 행렬을 만듭니다.
+    """
+    home = form.loc[list(home_ids)].reset_index(drop=True)
+    away = form.loc[list(away_ids)].reset_index(drop=True)
+    return _fixture_frame(home, away, (home["League"] == "PL") & (away["League"] == "PL"))
+
+
+def find_club(form: pd.DataFrame, name):
+    """
+    팀 이름(약칭/대소문자 무관) → club_id. 없으면 None
+    """
+    key = normalize_club(pd.Series([str(name)])).str.replace(" ", "", regex=False).iloc[0]
+    hit = form.index[form["club_key"] == key]
+    if len(hit) == 0:
+        hit = form.index[form["club_key"].str.contains(key, regex=False)] if key else hit
+    return int(hit[0]) if len(hit) else None
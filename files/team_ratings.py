@@ -0,0 +1,206 @@
+# team_ratings.py
+"""
+팀 전력 지표: Elo 레이팅 (PL + Championship 경기 데이터)
+- 레이팅은 club_id로 바로 인덱싱하는 dense NumPy 배열 (팀 1개 갱신 = O(1))
+- 전체 경기를 날짜 순으로 한 번 훑어 처음부터 재계산 (23k 경기 < 0.1초)
+- 새 경기 결과는 update()로 한 경기씩 증분 반영
+- 팀별 (날짜, 레이팅) 이력을 쌓아 두고 rating_as_of()로 특정 날짜 기준 조회
+"""
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+TEAM_DATA_PATH = BASE_DIR / "processed_data" / "team_data.csv"
+
+ELO_BASE = 1500.0
+ELO_K = 20.0
+HOME_ADVANTAGE = 60.0
+# 새 시즌 첫 경기 전 평균(ELO_BASE) 쪽으로 되돌리는 비율 (1이면 그대로 유지)
+SEASON_CARRY = 0.8
+
+
+def _day(date) -> int:
+    """
+    날짜 → 1970-01-01 기준 일 수 (이력 이진 탐색용 정수 키)
+    """
+    return int(np.datetime64(pd.Timestamp(date), "D").astype(np.int64))
+
+
+def _season_code(season) -> int:
+    """
+    '2024/25', '2024-2025' → 2024 (시즌 시작 연도). 알 수 없으면 -1
+    """
+    s = str(season or "").strip()
+    return int(s[:4]) if s[:4].isdigit() else -1
+
+
+class EloRatings:
+    """
+    club_id → Elo 레이팅
+    - ratings[club_id]: 현재 레이팅 (한 번도 경기하지 않은 팀은 ELO_BASE)
+    - 마진 보정: 골득실이 클수록 변동폭이 커짐 (K * (1 + ln(1 + |골득실|)))
+    """
+
+    def __init__(self, n_teams, k=ELO_K, home_advantage=HOME_ADVANTAGE, base=ELO_BASE,
+                 season_carry=SEASON_CARRY):
+        self.k = float(k)
+        self.home_advantage = float(home_advantage)
+        self.base = float(base)
+        self.season_carry = float(season_carry)
+
+        self.ratings = np.full(int(n_teams), self.base, dtype=np.float64)
+        self.last_season = np.full(int(n_teams), -1, dtype=np.int64)
+        self.n_matches = 0
+
+        # 팀별 이력: 경기일(정수) 오름차순 / 그 경기 직후 레이팅
+        self._hist_days = [[] for _ in range(int(n_teams))]
+        self._hist_ratings = [[] for _ in range(int(n_teams))]
+
+    # --------------------------------------------------
+    # 처음부터 재계산 (경기 데이터 → EloRatings)
+    # --------------------------------------------------
+    @classmethod
+    def from_matches(cls, team_df: pd.DataFrame, n_teams=None, **params):
+        """
+        team_data(경기 1행) 전체를 날짜 순으로 반영합니다.
+        반환 객체의 pre_home / pre_away: 각 경기(team_df 행 순서) 직전 레이팅 (모델 피처용)
+        """
+        home_ids = pd.to_numeric(team_df["home_club_id"], errors="coerce").fillna(-1).to_numpy(np.int64)
+        away_ids = pd.to_numeric(team_df["away_club_id"], errors="coerce").fillna(-1).to_numpy(np.int64)
+        if n_teams is None:
+            n_teams = int(max(home_ids.max(initial=-1), away_ids.max(initial=-1))) + 1
+
+        elo = cls(n_teams, **params)
+        n = len(team_df)
+        elo.pre_home = np.full(n, np.nan)
+        elo.pre_away = np.full(n, np.nan)
+
+        dates = pd.to_datetime(team_df["Date"], dayfirst=True, errors="coerce")
+        days = dates.to_numpy("datetime64[D]").astype(np.int64)
+        hg = pd.to_numeric(team_df["FTH Goals"], errors="coerce").to_numpy(np.float64)
+        ag = pd.to_numeric(team_df["FTA Goals"], errors="coerce").to_numpy(np.float64)
+        seasons = pd.Series(team_df["Season"]).map(_season_code).to_numpy(np.int64)
+
+        valid = (home_ids >= 0) & (away_ids >= 0) & ~np.isnan(hg) & ~np.isnan(ag) & dates.notna().to_numpy()
+        # 날짜 → 원래 행 순서 (같은 날 경기는 입력 순서 유지)
+        order = np.flatnonzero(valid)
+        order = order[np.argsort(days[order], kind="stable")]
+
+        # 루프 안에서는 파이썬 스칼라로만 다룸 (NumPy 스칼라 박싱 비용 회피)
+        for i, h, a, d, s, gh, ga in zip(
+            order.tolist(), home_ids[order].tolist(), away_ids[order].tolist(), days[order].tolist(),
+            seasons[order].tolist(), hg[order].tolist(), ag[order].tolist(),
+        ):
+            elo.pre_home[i], elo.pre_away[i] = elo._apply(h, a, gh, ga, d, s)
+        return elo
+
+    # --------------------------------------------------
+    # 한 경기 반영 (O(1))
+    # --------------------------------------------------
+    def _apply(self, home_id, away_id, home_goals, away_goals, day, season):
+        ratings = self.ratings
+        for team in (home_id, away_id):
+            if season > self.last_season[team] >= 0:
+                ratings[team] = self.base + self.season_carry * (ratings[team] - self.base)
+            if season >= 0:
+                self.last_season[team] = season
+
+        rh = float(ratings[home_id])
+        ra = float(ratings[away_id])
+        expected = 1.0 / (1.0 + 10.0 ** ((ra - rh - self.home_advantage) / 400.0))
+        actual = 1.0 if home_goals > away_goals else (0.5 if home_goals == away_goals else 0.0)
+        delta = self.k * (1.0 + np.log1p(abs(home_goals - away_goals))) * (actual - expected)
+
+        ratings[home_id] = rh + delta
+        ratings[away_id] = ra - delta
+        self._record(home_id, day, rh + delta)
+        self._record(away_id, day, ra - delta)
+        self.n_matches += 1
+        return rh, ra
+
+    def _record(self, team, day, rating):
+        days = self._hist_days[team]
+        if days and days[-1] > day:
+            # 과거 날짜 경기가 뒤늦게 들어온 경우에도 이력은 날짜 순 유지
+            pos = bisect_right(days, day)
+            days.insert(pos, day)
+            self._hist_ratings[team].insert(pos, rating)
+        else:
+            days.append(day)
+            self._hist_ratings[team].append(rating)
+
+    def _ensure_capacity(self, team_id):
+        if team_id < len(self.ratings):
+            return
+        extra = team_id + 1 - len(self.ratings)
+        self.ratings = np.concatenate([self.ratings, np.full(extra, self.base)])
+        self.last_season = np.concatenate([self.last_season, np.full(extra, -1, dtype=np.int64)])
+        self._hist_days.extend([] for _ in range(extra))
+        self._hist_ratings.extend([] for _ in range(extra))
+
+    def update(self, home_id, away_id, home_goals, away_goals, date, season=None):
+        """
+        새 경기 결과 1건을 반영하고 (홈, 원정) 경기 후 레이팅을 반환합니다.
+        """
+        home_id, away_id = int(home_id), int(away_id)
+        self._ensure_capacity(max(home_id, away_id))
+        self._apply(home_id, away_id, float(home_goals), float(away_goals), _day(date), _season_code(season))
+        return float(self.ratings[home_id]), float(self.ratings[away_id])
+
+    # --------------------------------------------------
+    # 조회
+    # --------------------------------------------------
+    def rating(self, team_id):
+        team_id = int(team_id)
+        return float(self.ratings[team_id]) if 0 <= team_id < len(self.ratings) else self.base
+
+    def rating_as_of(self, team_id, date):
+        """
+        date 당일 경기까지 반영된 레이팅 (그 전에 경기가 없으면 ELO_BASE)
+        """
+        team_id = int(team_id)
+        if not 0 <= team_id < len(self.ratings):
+            return self.base
+        pos = bisect_right(self._hist_days[team_id], _day(date))
+        return float(self._hist_ratings[team_id][pos - 1]) if pos else self.base
+
+    def history(self, team_id) -> pd.DataFrame:
+        team_id = int(team_id)
+        return pd.DataFrame({
+            "Date": np.array(self._hist_days[team_id], dtype="datetime64[D]"),
+            "Elo": self._hist_ratings[team_id],
+        })
+
+    def win_probability(self, home_id, away_id):
+        """
+        Elo 기대 승점(홈 기준, 무승부 0.5 포함)
+        """
+        diff = self.rating(away_id) - self.rating(home_id) - self.home_advantage
+        return 1.0 / (1.0 + 10.0 ** (diff / 400.0))
+
+    def table(self, team_ids=None, club_names=None) -> pd.DataFrame:
+        """
+        레이팅 순위표. team_ids 미지정 시 한 경기 이상 치른 팀 전체
+        """
+        if team_ids is None:
+            team_ids = [t for t, days in enumerate(self._hist_days) if days]
+        ids = np.asarray(list(team_ids), dtype=np.int64)
+        out = pd.DataFrame({"club_id": ids, "Elo": self.ratings[ids]})
+        if club_names:
+            out["Club"] = out["club_id"].map(club_names).fillna(out["club_id"].astype(str))
+        out = out.sort_values("Elo", ascending=False).reset_index(drop=True)
+        out.insert(0, "Rank", np.arange(1, len(out) + 1))
+        return out
+
+
+if __name__ == "__main__":
+    import time
+
+    team_df = pd.read_csv(TEAM_DATA_PATH)
+    start = time.perf_counter()
+    elo = EloRatings.from_matches(team_df)
+    print(f"Elo 재계산: {elo.n_matches}경기, {time.perf_counter() - start:.3f}초")
+    print(elo.table().head(10))